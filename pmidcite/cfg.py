@@ -13,6 +13,7 @@ from sys import stdout
 import configparser
 
 from pmidcite.icite.nih_grouper import NihGrouper
+from pmidcite.icite.dnldr.pmid_evict import NIHiCiteEvictor
 from pmidcite.eutils.apikey import API_INFO
 from pmidcite.eutils.apikey import DEFAULT_APIKEY
 
@@ -46,6 +47,12 @@ class Cfg(object):
 
             # Information downloaded from NIH iCite stored in a Python module
             'dir_icite_py': 'None',
+            # How iCite data is stored in dir_icite_py: auto, py (one p{PMID}.py per paper), or sqlite
+            'icite_cache': 'auto',
+            # Most bytes or entries kept in dir_icite_py; evict lru or oldest entries over the limit
+            'icite_cache_max_bytes': 'None',
+            'icite_cache_max_entries': 'None',
+            'icite_cache_evict': 'lru',
 
             # Directory for abstracts downloaded from PubMed
             'dir_pubmed_txt': 'None',
@@ -90,6 +97,22 @@ class Cfg(object):
         """Get the name of the directory containg PubMed entry text files"""
         return self.cfgparser['pmidcite']['dir_icite_py']
 
+    def get_icite_cache(self):
+        """Get how iCite data is stored in dir_icite_py: auto, py, or sqlite"""
+        return self.cfgparser['pmidcite']['icite_cache']
+
+    def get_icite_evictor(self):
+        """Get the evictor which keeps dir_icite_py within its size limits; None if unlimited"""
+        cfg = self.cfgparser['pmidcite']
+        max_bytes = cfg.get('icite_cache_max_bytes', 'None')
+        max_entries = cfg.get('icite_cache_max_entries', 'None')
+        if max_bytes == 'None' and max_entries == 'None':
+            return None
+        return NIHiCiteEvictor(
+            max_bytes=int(max_bytes) if max_bytes != 'None' else None,
+            max_entries=int(max_entries) if max_entries != 'None' else None,
+            policy=cfg.get('icite_cache_evict', 'lru'))
+
     def get_dir_icite(self):
         """Get the name of the directory containg PubMed entry text files"""
         return self.cfgparser['pmidcite']['dir_icite']
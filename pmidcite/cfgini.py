@@ -80,6 +80,27 @@ tool = {DEFAULT_TOOL}
 # dir_icite_py = ./icite  # $ mkdir ./icite
 dir_icite_py = None
 
+# How NIH citation data is stored in dir_icite_py:
+#   auto:   sqlite if <dir_icite_py>/icite.sqlite3 exists; otherwise py (default)
+#   py:     One p<PMID>.py file per paper
+#   sqlite: All papers in one SQLite database, <dir_icite_py>/icite.sqlite3,
+#           which is faster to read and write for tens of thousands of papers
+icite_cache = auto
+
+# Limit the size of the NIH citation data cached in dir_icite_py, in bytes or in papers.
+# After each bulk download, papers over the limit are removed:
+#   icite_cache_evict = lru:    Remove the papers read least recently (default)
+#   icite_cache_evict = oldest: Remove the papers downloaded first
+# lru uses the read times of p<PMID>.py files; where reads are not recorded
+# (relatime or noatime mounts, SQLite), lru falls back to the download time.
+#
+# Recommended values for small scratch disks:
+# icite_cache_max_bytes = 2000000000
+# icite_cache_max_entries = 1000000
+icite_cache_max_bytes = None
+icite_cache_max_entries = None
+icite_cache_evict = lru
+
 # --------------------------------------------------------------------------------
 # Store abstracts and publication data downloaded form PubMed in a dedicated directory
 #
@@ -15,6 +15,7 @@ from pmidcite.cli.utils import get_pmids
 from pmidcite.cli.entry_keyset import get_details_cites_refs
 from pmidcite.icite.nih_grouper import get_nihgrouper
 from pmidcite.icite.downloader import get_downloader
+from pmidcite.icite.refresh import NIHiCiteRefresh
 from pmidcite.icite.prt_hdrkey import prt_keys
 from pmidcite.icite.prt_hdrkey import prt_hdr
 
@@ -78,6 +79,9 @@ class NIHiCiteCli:
         parser.add_argument(
             '-r', '--load_references', action='store_true', default=False,
             help='Load and print the references for each requested paper.')
+        parser.add_argument(
+            '--top_n', type=int,
+            help='Print only the top N citations and references of each paper, as sorted by NIH group (default: all)')
         # pylint: disable=line-too-long
         parser.add_argument(
             '-R', '--no_references', action='store_true',
@@ -98,6 +102,18 @@ class NIHiCiteCli:
         parser.add_argument(
             '-D', '--force_download', action='store_true',
             help='Download PMID iCite information to a Python file, over-writing if necessary.')
+        parser.add_argument(
+            '--refresh_days', type=float,
+            help='Download cached PMID iCite information again if it was downloaded more than this many days ago')
+        parser.add_argument(
+            '--refresh_modified', action='store_true',
+            help="Download cached PMID iCite information again if NIH's last_modified has changed")
+        parser.add_argument(
+            '--max_workers', type=int, default=1,
+            help='Number of 1,000-PMID requests sent to NIH iCite concurrently (default=1)')
+        parser.add_argument(
+            '--num_procs', type=int, default=1,
+            help='Number of processes loading cached p<PMID>.py files; 0 uses one per CPU (default=1)')
         # - abstracts -------------------------------------------------------------------------
         parser.add_argument(
             '-p', '--pubmed', action='store_true',
@@ -107,6 +123,9 @@ class NIHiCiteCli:
         parser.add_argument(
             '--dir_icite_py', default=dflt_dir_icite_py,
             help=f'Write PMID iCite information into directory which contains temporary working files (default={dflt_dir_icite_py})')
+        parser.add_argument(
+            '--icite_cache', default=cfg.get_icite_cache(), choices=['auto', 'py', 'sqlite'],
+            help=f'Store iCite information in dir_icite_py as one p<PMID>.py per paper or in one SQLite database (default={cfg.get_icite_cache()})')
         parser.add_argument(
             '--dir_icite', default=dflt_dir_icite,
             help=f'Write PMID icite reports into directory (default={dflt_dir_icite})')
@@ -149,10 +168,10 @@ class NIHiCiteCli:
         if pmids:
             if len(pmids) > 10:
                 print(f'PROCESSING {len(pmids):,} PMIDs')
-            dnldr = self._get_downloader(args)
-            pmid2icitepaper = dnldr.get_pmid2paper(pmids, None)
-            ## print('XXXXXXXXXXXXXXXXXXXXXXXXXXXX pmid2icitepaper', pmid2icitepaper)
-            self.run_icite(pmid2icitepaper, dnldr, args, argparser)
+            with self._get_downloader(args) as dnldr:
+                pmid2icitepaper = dnldr.get_pmid2paper(pmids, None)
+                ## print('XXXXXXXXXXXXXXXXXXXXXXXXXXXX pmid2icitepaper', pmid2icitepaper)
+                self.run_icite(pmid2icitepaper, dnldr, args, argparser)
             if args.pubmed:
                 self.pubmed.dnld_wr1_per_pmid(pmids, args.force_download, args.dir_pubmed_txt)
         # pylint: disable=line-too-long
@@ -179,8 +198,7 @@ class NIHiCiteCli:
         if print_header:
             prt_hdr(prt)
 
-    @staticmethod
-    def _get_downloader(args):
+    def _get_downloader(self, args):
         """Get the downloader"""
         details_cites_refs = get_details_cites_refs(
             args.verbose,
@@ -188,11 +206,19 @@ class NIHiCiteCli:
             args.load_references,
             args.no_references)
         groupobj = get_nihgrouper(args.min1, args.min2, args.min3, args.min4)
+        refresh = None
+        if args.refresh_days is not None or args.refresh_modified:
+            refresh = NIHiCiteRefresh(args.refresh_days, args.refresh_modified)
         return get_downloader(
             groupobj,
             args.force_download,
             details_cites_refs,
-            args.dir_icite_py)
+            args.dir_icite_py,
+            max_workers=args.max_workers,
+            icite_cache=args.icite_cache,
+            num_procs=args.num_procs,
+            refresh=refresh,
+            evictor=self.cfg.get_icite_evictor())
 
     def _get_args(self, argparser):
         """Get args"""
@@ -220,7 +246,7 @@ class NIHiCiteCli:
             return
         # Write the report with citations and references for each PMID into its own file
         if args.O:
-            self._wr_papers(pmid2icitepaper_cur, dnldr, args.print_header)
+            self._wr_papers(pmid2icitepaper_cur, dnldr, args.print_header, args.top_n)
         # Write the succinct report each PMID to the screen
         else:
             self.run_icite_wr(pmid2icitepaper_cur, args, dnldr)
@@ -251,25 +277,26 @@ class NIHiCiteCli:
         dct = get_outfile(args.outfile, args.append_outfile, args.force_write)
         if dct['outfile'] is None and not args.O:
             #print('FFFFFFFFFFFFFFFFFFFFFFFFF')
-            dnldr.prt_papers(pmid2icitepaper, prt=stdout)
+            dnldr.prt_papers(pmid2icitepaper, prt=stdout, top_n=args.top_n)
         else:
             if args.verbose:
-                dnldr.prt_papers(pmid2icitepaper, prt=stdout)
+                dnldr.prt_papers(pmid2icitepaper, prt=stdout, top_n=args.top_n)
             elif args.append_outfile:
                 # Print TOP to stdout if append_outfile
                 for icitepaper in pmid2icitepaper.values():
                     icitepaper.prt_top(prt=stdout)
             if dct['outfile'] is not None:
-                dnldr.wr_papers(dct['outfile'], pmid2icitepaper, dct['force_write'], dct['mode'])
+                dnldr.wr_papers(dct['outfile'], pmid2icitepaper, dct['force_write'], dct['mode'],
+                                top_n=args.top_n)
 
-    def _wr_papers(self, pmid2icitepaper, dnldr, print_header):
+    def _wr_papers(self, pmid2icitepaper, dnldr, print_header, top_n=None):
         """Write one icite report per PMID into dir_icite/PMID.txt"""
         for pmid, paper in pmid2icitepaper.items():
             fout_txt = self.cfg.get_fullname_icite(f'{pmid}.txt')
             with open(fout_txt, 'w', encoding='utf8') as prt:
                 if print_header:
                     prt_hdr(prt)
-                dnldr.prt_papers({pmid:paper}, prt)
+                dnldr.prt_papers({pmid:paper}, prt, top_n)
                 print(f'  WROTE: {fout_txt}')
 
     @staticmethod
@@ -0,0 +1,312 @@
+"""Manage the NIH iCite data cached in dir_icite_py"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from sys import stdout
+from time import time
+from os import cpu_count
+from os.path import exists
+from argparse import ArgumentParser
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+from pmidcite.cli.utils import get_pmids
+from pmidcite.eutils.cmds.pubmed import PubMed
+from pmidcite.icite.entry import NIHiCiteEntry
+from pmidcite.icite.downloader import get_downloader
+from pmidcite.icite.dnldr.pmid_layout import NIHiCitePyLayout
+from pmidcite.icite.dnldr.pmid_literal import NIHiCiteLiteral
+from pmidcite.icite.dnldr.pmid_loader import NIHiCiteLoader
+from pmidcite.icite.dnldr.pmid_lock import NIHiCiteLock
+from pmidcite.icite.dnldr.pmid_evict import NIHiCiteEvictor
+from pmidcite.icite.dnldr.pmid_db import NIHiCiteDb
+from pmidcite.icite.dnldr.pmid_snapshot import NIHiCiteSnapshot
+
+
+class NIHiCiteCacheCli:
+    """Manage the NIH iCite data cached in dir_icite_py"""
+
+    # Upper bounds, in days, of the age groups printed by stats
+    ages_days = (1, 7, 30, 90, 365)
+
+    # Most entries sent to a worker process at once, bounding the memory used while compacting
+    max_chunk = 5000
+
+    def __init__(self, cfg):
+        self.cfg = cfg
+
+    def get_argparser(self):
+        """Argument parser for managing the NIH iCite cache"""
+        parser = ArgumentParser(description="Manage the NIH iCite data cached in dir_icite_py")
+        dflt_dir_icite_py = self.cfg.get_dir_icite_py()
+        parser.add_argument(
+            '--dir_icite_py', default=dflt_dir_icite_py,
+            help=f'Directory containing the cached NIH iCite data (default={dflt_dir_icite_py})')
+        subparsers = parser.add_subparsers(dest='command', required=True)
+        # - migrate --------------------------------------------------------------------------
+        parser_migrate = subparsers.add_parser(
+            'migrate',
+            help='Move the p<PMID>.py files into one flat directory or into sharded subdirectories')
+        parser_migrate.add_argument(
+            'layout', choices=NIHiCitePyLayout.layouts,
+            help='flat: ./icite/p33031632.py; sharded: ./icite/33/03/p33031632.py')
+        # - snapshot -------------------------------------------------------------------------
+        parser_snapshot = subparsers.add_parser(
+            'snapshot',
+            help='Write all cached NIH iCite data into one binary snapshot which can be memory-mapped')
+        parser_snapshot.add_argument(
+            'snapshot', help='Name of the snapshot file to write, e.g., icite.snapshot')
+        # - stats ----------------------------------------------------------------------------
+        subparsers.add_parser(
+            'stats',
+            help='Print the number of cached entries, their size in bytes, and their ages')
+        # - verify ---------------------------------------------------------------------------
+        parser_verify = subparsers.add_parser(
+            'verify',
+            help='Read every cached entry in parallel; quarantine entries which cannot be read')
+        self._add_num_procs(parser_verify)
+        # - evict ----------------------------------------------------------------------------
+        parser_evict = subparsers.add_parser(
+            'evict',
+            help='Remove cached entries which are too old or exceed a size limit')
+        parser_evict.add_argument(
+            '--max_days', type=float,
+            help='Remove entries downloaded more than this many days ago')
+        parser_evict.add_argument(
+            '--max_bytes', type=int,
+            help='Remove entries until the cached entries use no more than this many bytes')
+        parser_evict.add_argument(
+            '--max_entries', type=int,
+            help='Remove entries until no more than this many entries are cached')
+        parser_evict.add_argument(
+            '--policy', choices=NIHiCiteEvictor.policies, default='lru',
+            help='lru: remove entries read least recently (default); oldest: downloaded first. '
+                 'lru uses the read times of p<PMID>.py files; where reads are not recorded '
+                 '(relatime or noatime mounts, SQLite), lru falls back to the download time')
+        # - compact --------------------------------------------------------------------------
+        parser_compact = subparsers.add_parser(
+            'compact',
+            help=f'Move p<PMID>.py files into the SQLite database, {NIHiCiteDb.basename}, '
+                 'and reclaim the space of removed entries')
+        parser_compact.add_argument(
+            '--keep_py', action='store_true',
+            help='Keep the p<PMID>.py files after they are copied into the database')
+        self._add_num_procs(parser_compact)
+        # - prefetch -------------------------------------------------------------------------
+        parser_prefetch = subparsers.add_parser(
+            'prefetch',
+            help='Cache NIH iCite data for papers and their citations and references; print no report')
+        parser_prefetch.add_argument(
+            'pmids', metavar='PMID', nargs='*',
+            help='PubMed IDs (PMIDs) of the top papers')
+        parser_prefetch.add_argument(
+            '-i', '--infile', nargs='*',
+            help='Read PMIDs from files, one PMID per line, or from pmidcite output files')
+        parser_prefetch.add_argument(
+            '-q', '--query', nargs='*', default=[],
+            help='PubMed queries, e.g., \'"microglia"[Title] AND review[Filter]\'')
+        parser_prefetch.add_argument(
+            '--query_file', nargs='*', default=[],
+            help='Read one saved PubMed query from each file')
+        parser_prefetch.add_argument(
+            '--max_workers', type=int, default=4,
+            help='Number of 1,000-PMID requests sent to NIH iCite concurrently (default=4)')
+        parser_prefetch.add_argument(
+            '-f', '--force_download', action='store_true',
+            help='Download NIH iCite data, even if it is already cached')
+        return parser
+
+    @staticmethod
+    def _add_num_procs(parser):
+        """Add the number of processes used to read the cached entries"""
+        parser.add_argument(
+            '--num_procs', type=int, default=0,
+            help='Number of processes reading cached entries (default=0: one per CPU)')
+
+    def cli(self, args=None, prt=stdout):
+        """Run a command on the NIH iCite cache"""
+        args = self.get_argparser().parse_args(args)
+        dir_icite_py = args.dir_icite_py
+        if not dir_icite_py or dir_icite_py == 'None' or not exists(dir_icite_py):
+            raise RuntimeError(f'**FATAL: NO dir_icite_py DIRECTORY: {dir_icite_py}')
+        getattr(self, f'_run_{args.command}')(args, prt)
+
+    @staticmethod
+    def _run_migrate(args, prt):
+        """Move the p{PMID}.py files into the requested layout"""
+        NIHiCitePyLayout(args.dir_icite_py).migrate(args.layout, prt)
+
+    def _run_snapshot(self, args, prt):
+        """Write all cached NIH iCite data into one binary snapshot"""
+        snapshot = NIHiCiteSnapshot()
+        snapshot.add_nihdicts(self._iter_nihdicts(args.dir_icite_py))
+        snapshot.wr_snapshot(args.snapshot, prt)
+
+    def _run_stats(self, args, prt):
+        """Print the number of cached entries, their size in bytes, and their ages"""
+        dir_icite_py = args.dir_icite_py
+        pylayout = NIHiCitePyLayout(dir_icite_py)
+        self.prt_stats(pylayout.get_pmid2stat(),
+                       f'p{{PMID}}.py files ({pylayout.layout}): {dir_icite_py}', prt)
+        file_db = NIHiCiteDb.get_filename(dir_icite_py)
+        if exists(file_db):
+            nihdb = NIHiCiteDb(file_db)
+            self.prt_stats(nihdb.get_pmid2stat(), f'SQLite: {file_db}', prt)
+            nihdb.close()
+
+    def prt_stats(self, pmid2stat, name, prt=stdout):
+        """Print the number of entries, their size in bytes, and the ages of the entries"""
+        prt.write(f'{name}\n')
+        prt.write(f'  {len(pmid2stat):15,} entries\n')
+        prt.write(f'  {sum(nt.nbytes for nt in pmid2stat.values()):15,} bytes\n')
+        if not pmid2stat:
+            return
+        tic = time()
+        days = sorted((tic - nt.mtime)/86400.0 for nt in pmid2stat.values())
+        days_lo = 0
+        idx = 0
+        for days_hi in self.ages_days + (None,):
+            idx_hi = idx
+            while idx_hi < len(days) and (days_hi is None or days[idx_hi] < days_hi):
+                idx_hi += 1
+            txt = f'{days_lo:4}-{days_hi:<4} days' if days_hi is not None else f'{days_lo:4}+     days'
+            prt.write(f'  {idx_hi - idx:15,} entries {txt}\n')
+            idx = idx_hi
+            days_lo = days_hi
+        prt.write(f'  {days[-1]:15,.1f} days: oldest entry\n')
+
+    def _run_verify(self, args, prt):
+        """Read every cached entry in parallel; quarantine entries which cannot be read"""
+        dir_icite_py = args.dir_icite_py
+        num_procs = args.num_procs if args.num_procs > 0 else cpu_count()
+        pylayout = NIHiCitePyLayout(dir_icite_py)
+        files = list(pylayout.get_pmid2file().values())
+        num_corrupt = 0
+        for files_corrupt in self._map_procs(NIHiCiteLoader.get_files_corrupt, files, num_procs):
+            for file_pmid, err in files_corrupt:
+                pylayout.quarantine(file_pmid, err, prt)
+            num_corrupt += len(files_corrupt)
+        prt.write(f'{len(files) - num_corrupt:,} of {len(files):,} p{{PMID}}.py files are OK: '
+                  f'{dir_icite_py}\n')
+        file_db = NIHiCiteDb.get_filename(dir_icite_py)
+        if exists(file_db):
+            nihdb = NIHiCiteDb(file_db)
+            for err in nihdb.get_errors():
+                prt.write(f'**ERROR: {file_db}: {err}\n')
+            pmids = nihdb.get_pmids()
+            pmids_corrupt = []
+            get_pmids_corrupt = partial(NIHiCiteDb.get_pmids_corrupt, file_db)
+            for pmids_cur in self._map_procs(get_pmids_corrupt, pmids, num_procs):
+                pmids_corrupt.extend(pmids_cur)
+            if pmids_corrupt:
+                nihdb.quarantine(pmids_corrupt, prt)
+            prt.write(f'{len(pmids) - len(pmids_corrupt):,} of {len(pmids):,} SQLite entries are OK: '
+                      f'{file_db}\n')
+            nihdb.close()
+
+    @staticmethod
+    def _run_evict(args, prt):
+        """Remove cached entries which are too old or exceed a size limit, counting both stores"""
+        evictor = NIHiCiteEvictor(args.max_days, args.max_bytes, args.max_entries, args.policy)
+        if not evictor.is_bounded():
+            raise RuntimeError('**FATAL: evict NEEDS --max_days, --max_bytes, OR --max_entries')
+        dir_icite_py = args.dir_icite_py
+        pylayout = NIHiCitePyLayout(dir_icite_py)
+        file_db = NIHiCiteDb.get_filename(dir_icite_py)
+        nihdb = NIHiCiteDb(file_db) if exists(file_db) else None
+        # Downloaders in other processes do not write while entries are chosen and removed
+        with NIHiCiteLock(dir_icite_py):
+            # The limits apply to the p{PMID}.py files and the SQLite entries together
+            key2stat = {('py', p):nt for p, nt in pylayout.get_pmid2stat().items()}
+            if nihdb is not None:
+                key2stat.update((('db', p), nt) for p, nt in nihdb.get_pmid2stat().items())
+            keys = evictor.get_pmids_evict(key2stat)
+            num_rm = pylayout.rm_pmids(p for s, p in keys if s == 'py')
+            prt.write(f'{num_rm:,} p{{PMID}}.py files evicted: {dir_icite_py}\n')
+            if nihdb is not None:
+                num_rm = nihdb.rm_pmids(p for s, p in keys if s == 'db')
+                prt.write(f'{num_rm:,} iCite entries evicted: {file_db}\n')
+        if nihdb is not None:
+            nihdb.close()
+
+    def _run_compact(self, args, prt):
+        """Move p{PMID}.py files into the SQLite database and reclaim the space of removed entries"""
+        dir_icite_py = args.dir_icite_py
+        num_procs = args.num_procs if args.num_procs > 0 else cpu_count()
+        pylayout = NIHiCitePyLayout(dir_icite_py)
+        file_db = NIHiCiteDb.get_filename(dir_icite_py)
+        nihdb = NIHiCiteDb(file_db)
+        # Downloaders in other processes do not write p{PMID}.py files while they are moved
+        with NIHiCiteLock(dir_icite_py):
+            pmid2stat = pylayout.get_pmid2stat()
+            # Keep the download times of the p{PMID}.py files, so refreshing by age still works
+            pmid2downloaded = {pmid:nt.mtime for pmid, nt in pmid2stat.items()}
+            files = [pylayout.get_file_pmid(p) for p in sorted(pmid2stat)]
+            pmids_moved = []
+            for nihdicts, files_corrupt in self._map_procs(NIHiCiteLoader.load_nihdicts, files, num_procs):
+                nihdb.wr_nihdicts(nihdicts, pmid2downloaded)
+                pmids_moved.extend(d['pmid'] for d in nihdicts)
+                for file_pmid, err in files_corrupt:
+                    pylayout.quarantine(file_pmid, err, prt)
+            if not args.keep_py:
+                pylayout.rm_pmids(pmids_moved)
+                pylayout.rm_dirs_shard()
+        prt.write(f'{len(pmids_moved):,} p{{PMID}}.py files copied into {file_db}\n')
+        nihdb.vacuum()
+        prt.write(f'{nihdb.get_num_pmids():,} iCite entries in {file_db}\n')
+        nihdb.close()
+
+    def _run_prefetch(self, args, prt):
+        """Cache NIH iCite data for papers and their citations and references"""
+        pmids = get_pmids(args.pmids, args.infile)
+        queries = list(args.query)
+        for fin in args.query_file:
+            with open(fin, encoding='utf-8') as ifstrm:
+                queries.append(ifstrm.read().strip())
+        if queries:
+            cfg = self.cfg
+            pubmed = PubMed(email=cfg.get_email(), apikey=cfg.get_apikey(), tool=cfg.get_tool())
+            for query in queries:
+                pmids.extend(int(p) for p in pubmed.dnld_query_pmids(query, num_ids_p_epost=100000))
+        if not pmids:
+            raise RuntimeError('**FATAL: prefetch NEEDS PMIDs, -i FILE, -q QUERY, OR --query_file FILE')
+        with get_downloader(
+                self.cfg.get_nihgrouper(),
+                args.force_download,
+                set(NIHiCiteEntry.associated_pmid_keys),
+                args.dir_icite_py,
+                max_workers=args.max_workers,
+                icite_cache=self.cfg.get_icite_cache(),
+                evictor=self.cfg.get_icite_evictor()) as dnldr:
+            dnldr.prefetch(list(dict.fromkeys(pmids)), prt)
+
+    def _map_procs(self, fnc, items, num_procs):
+        """Yield the results of running fnc on chunks of items, in order, across processes"""
+        num_items = len(items)
+        if num_items == 0:
+            return
+        # Several chunks per process so that processes which finish early take more work
+        num_chunk = min(-(-num_items//(num_procs*4)), self.max_chunk)
+        chunks = (items[i:i+num_chunk] for i in range(0, num_items, num_chunk))
+        if num_procs == 1:
+            yield from map(fnc, chunks)
+            return
+        with ProcessPoolExecutor(max_workers=num_procs) as executor:
+            yield from executor.map(fnc, chunks)
+
+    @staticmethod
+    def _iter_nihdicts(dir_icite_py):
+        """Yield all cached NIH iCite dicts, ordered by PMID, from the SQLite or p{PMID}.py cache"""
+        file_db = NIHiCiteDb.get_filename(dir_icite_py)
+        if exists(file_db):
+            nihdb = NIHiCiteDb(file_db)
+            yield from nihdb.iter_nihdicts()
+            nihdb.close()
+        else:
+            pmid2file = NIHiCitePyLayout(dir_icite_py).get_pmid2file()
+            for pmid in sorted(pmid2file):
+                yield NIHiCiteLiteral.load_nihdict(pmid2file[pmid])
+
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
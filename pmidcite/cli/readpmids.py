@@ -81,7 +81,8 @@ class ReadPmids:
             grouperobj,
             args.force_download,
             details_cites_refs,
-            self.cfg.get_dir_icite_py())
+            self.cfg.get_dir_icite_py(),
+            evictor=self.cfg.get_icite_evictor())
         pmid2icitepaper_all = dnldr.get_pmid2paper(pmids, None)
         pmid2icitepaper_cur = {p: o for p, o in pmid2icitepaper_all.items() if o is not None}
         if outfile is not None:
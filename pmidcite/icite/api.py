@@ -4,11 +4,20 @@
 __copyright__ = "Copyright (C) 2019-present, DV Klopfenstein, PhD. All rights reserved."
 __author__ = "DV Klopfenstein, PhD"
 
-## from timeit import default_timer
 import traceback
+from time import sleep
+from threading import Lock
+from timeit import default_timer
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import wait
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3Error
 
-from pmidcite.icite.utils import split_list
+from pmidcite.icite.api_csv import NIHiCiteCsv
+from pmidcite.icite.retry import RetryPolicy
+from pmidcite.icite.chunker import ChunkSizer
 ## from tests.prt_hms import prt_hms
 
 
@@ -17,37 +26,112 @@ class NIHiCiteAPI:
 
     opt_keys = {
         # Number of publications to return. The maximum allowed is 1000.
-        'limit'
+        'limit',
         # Only return publications with a PMID greater than this
         # Example: /api/pubs?offset=23456789&limit=10&format=csv
-        'offset'
+        'offset',
         # Only return publications from the given year.
-        'year'
+        'year',
         # Only return publications with the given PubMed IDs.
         # Separate multiple IDs with commas to request up to 1000 at a time.
         # If this parameter is provided, all other parameters are ignored.
-        'pmids'
+        'pmids',
         # only return publications with the given fields.
         # Separate multiple fields with commas (no space).
         # Field names are very specific and listed in Response example below.
         # No fl param will return all fields.
         # Example: /api/pubs?pmids=28968381,28324054,23843509&fl=pmid,year,title,apt
-        'fl'
+        'fl',
         # return csv (comma separated value) by specifying format=csv rather than the default JSON.
         'format'}
 
     #           https://icite.od.nih.gov/api
     url_base = 'https://icite.od.nih.gov/api/pubs'
 
-    def __init__(self, **kws):
+    # Errors raised while a response body is read, e.g., a connection reset or a truncated row
+    errs_read = (requests.exceptions.RequestException, Urllib3Error, OSError, ValueError)
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, pool_maxsize=10, max_workers=1, retry=None, chunker=None, **kws):
         self.kws = {k:v for k, v in kws.items() if k in self.opt_keys}
         self.msgs = []
+        # Failed requests are retried with exponential backoff; failed chunks are split in two
+        self.retry = retry if retry is not None else RetryPolicy()
+        # PMIDs per request are sized by URL length and by the latency and size of responses
+        self.chunker = chunker if chunker is not None else ChunkSizer()
+        # Number of 1,000-PMID chunks downloaded concurrently; 1 downloads chunks one at a time
+        self.max_workers = max_workers
+        # Keep-alive connections are pooled so each request does not pay for a new TCP+TLS handshake
+        self.pool_maxsize = max(pool_maxsize, max_workers)
+        # Concurrent workers share one session, created once
+        self.session = None
+        self.lock_session = Lock()
+        self._init_fl()
+
+    def get_fields(self):
+        """Get the list of fields requested from NIH iCite. None means all fields"""
+        fields = self.kws.get('fl')
+        if not fields:
+            return None
+        return fields.split(',') if isinstance(fields, str) else list(fields)
+
+    def add_fields(self, fields):
+        """Add fields to a projected request; A request for all fields is unchanged"""
+        if (fields_cur := self.get_fields()) is not None:
+            self.kws['fl'] = self._get_fl(fields_cur + [f for f in fields if f not in fields_cur])
+
+    def _init_fl(self):
+        """Ensure a projected request always returns the PMID, which keys each entry"""
+        if (fields := self.get_fields()) is not None:
+            self.kws['fl'] = self._get_fl(fields if 'pmid' in fields else ['pmid'] + fields)
+
+    @staticmethod
+    def _get_fl(fields):
+        """Get the value of the fl parameter: field names separated by commas (no space)"""
+        return ','.join(fields)
+
+    def _get_params(self):
+        """Get the optional parameters appended to the request, e.g. &fl=pmid,year&format=csv"""
+        s_kws = self.kws
+        return ''.join(f'&{k}={v}' for k in ('fl', 'format') if (v := s_kws.get(k)))
+
+    def is_csv(self):
+        """Return True if NIH citation data is downloaded in CSV format rather than JSON"""
+        return self.kws.get('format') == 'csv'
+
+    def get_session(self):
+        """Get the keep-alive HTTP session, creating its connection pool on first use"""
+        if (session := self.session) is not None:
+            return session
+        with self.lock_session:
+            if self.session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self.session = session
+            return self.session
+
+    def close(self):
+        """Close the HTTP session and release its pooled connections"""
+        with self.lock_session:
+            if self.session is not None:
+                self.session.close()
+                self.session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
 
     def dnld_nihdict(self, pmid):
         """Download NIH citation data for one researcher-spedified PMID. Return a corrected json"""
         # pylint: disable=line-too-long
         ##req_nihocc = f'{self.url_base}?{pmid}'  # v0.0.50 WAS https://icite.od.nih.gov/api/pubs?33031632
         req_nihocc = f'{self.url_base}/{pmid}'    # v0.0.51 NOW https://icite.od.nih.gov/api/pubs/33031632
+        if (params := self._get_params()):
+            req_nihocc = f'{req_nihocc}?{params[1:]}'
         rsp_json = self._send_request(req_nihocc)
         ##print(f'AAAAAAAAAAAAAAAAAAAAAAAAAAAAAA {rsp_json}')
         ##print(f'AAAAAAAAAAAAAAAAAAAAAAAAAAAAAA rsp_json["data"][{len(rsp_json["data"])}] = {rsp_json["data"]}')
@@ -61,33 +145,99 @@ class NIHiCiteAPI:
 
     def dnld_nihdicts(self, pmids):
         """Download a list of NIH citation data for given PMIDs"""
-        return self._dnld_gtmax(pmids) if len(pmids) > 1000 else self._dnld_ltmax(pmids)
+        pmid_list_all = pmids if isinstance(pmids, list) else list(pmids)
+        if len(pmid_list_all) <= 1:
+            return self._dnld_ltmax(pmid_list_all) if pmid_list_all else []
+        return self._dnld_gtmax(pmid_list_all)
 
-    def _dnld_gtmax(self, pmids):
+    def _get_len_url(self):
+        """Get the length of a request URL that does not yet contain any PMIDs"""
+        return len(f'{self.url_base}?pmids={self._get_params()}')
+
+    def _dnld_gtmax(self, pmid_list_all):
         """Run iCite on given PubMed IDs"""
+        if self.max_workers > 1:
+            return self._dnld_lists_concurrent(pmid_list_all)
         nih_dicts_all = []
-        max_limit = 1000
-        pmid_list_all = pmids if isinstance(pmids, list) else list(pmids)
-        num_total = len(pmids)
-        # The NIH-OCC allows for a maximum of 1,000 PMIDs to be downloaded at once
-        for pmid_list_cur in split_list(pmid_list_all, max_limit):
-            nih_dicts_cur = self._dnld_ltmax(pmid_list_cur)
+        num_total = len(pmid_list_all)
+        prt_progress = num_total > self.chunker.max_pmids
+        len_url = self._get_len_url()
+        s_get_idx_end = self.chunker.get_idx_end
+        idx_beg = 0
+        # The NIH-OCC allows for a maximum of 1,000 PMIDs to be downloaded at once.
+        # Each chunk is sized using the latency and payload of the chunks before it.
+        while idx_beg < num_total:
+            idx_end = s_get_idx_end(pmid_list_all, idx_beg, len_url)
+            nih_dicts_cur = self._dnld_ltmax(pmid_list_all[idx_beg:idx_end])
             if nih_dicts_cur:
                 nih_dicts_all.extend(nih_dicts_cur)
-            # pylint: disable=line-too-long
+            idx_beg = idx_end
+            if prt_progress:
+                print(f'NIH citation data downloaded: {len(nih_dicts_all):,} of {num_total:,}')
+        return nih_dicts_all
+
+    def _dnld_lists_concurrent(self, pmid_list_all):
+        """Download chunks of PMIDs concurrently, keeping the chunks in the requested order"""
+        futures = []
+        num_total = len(pmid_list_all)
+        len_url = self._get_len_url()
+        s_get_idx_end = self.chunker.get_idx_end
+        s_max_workers = self.max_workers
+        idx_beg = 0
+        with ThreadPoolExecutor(max_workers=s_max_workers) as executor:
+            while idx_beg < num_total:
+                # Keep at most max_workers chunks in flight so new chunks are sized w/recent responses
+                if len(running := [f for f in futures if not f.done()]) >= s_max_workers:
+                    wait(running, return_when=FIRST_COMPLETED)
+                    continue
+                idx_end = s_get_idx_end(pmid_list_all, idx_beg, len_url)
+                futures.append(executor.submit(self._dnld_ltmax, pmid_list_all[idx_beg:idx_end]))
+                idx_beg = idx_end
+        # Chunk results are combined in the order the chunks were submitted
+        nih_dicts_all = []
+        for future in futures:
+            if (nih_dicts_cur := future.result()):
+                nih_dicts_all.extend(nih_dicts_cur)
+        if num_total > self.chunker.max_pmids:
             print(f'NIH citation data downloaded: {len(nih_dicts_all):,} of {num_total:,}')
         return nih_dicts_all
 
-    def _dnld_ltmax(self, pmids):
+    def _dnld_ltmax(self, pmids, depth=0):
         """Download NIH citation data using a request using their API"""
-        ## tic = default_timer()
         pmids_str = ','.join(str(p) for p in pmids)
         # pylint: disable=line-too-long
-        req_nihocc = f'{self.url_base}?pmids={pmids_str}' # https://icite.od.nih.gov/api/pubs?pmids=33031632
-        ## tic = prt_hms(tic, "Create request")
+        req_nihocc = f'{self.url_base}?pmids={pmids_str}{self._get_params()}' # https://icite.od.nih.gov/api/pubs?pmids=33031632
         # Note: rsp_json['data'] returned from NIH not in same order as requested
-        rsp_json = self._send_request(req_nihocc)
-        ## tic = prt_hms(tic, "Send request. Get response")
+        if (read := self._get_response(req_nihocc, stream=self.is_csv(),
+                                       read=lambda rsp: self._read_nihdicts(rsp, pmids, pmids_str))):
+            (nih_dicts, num_bytes), secs = read
+            self.chunker.update(len(pmids), secs, num_bytes)
+            return nih_dicts
+        # All tries failed: Request each half of the chunk separately
+        if len(pmids) > 1 and depth < self.retry.bisect_depth:
+            return self._dnld_bisect(list(pmids), depth + 1)
+        return self._get_nihdicts(None, pmids, pmids_str)
+
+    def _read_nihdicts(self, rsp, pmids, pmids_str):
+        """Read NIH citation data from a response body. Return the data and the bytes read"""
+        if self.is_csv():
+            nih_dicts = self._get_nihdicts({'data': NIHiCiteCsv().iter_nihdicts(rsp)}, pmids, pmids_str)
+            return nih_dicts, rsp.raw.tell()
+        nih_dicts = self._get_nihdicts(rsp.json(), pmids, pmids_str)
+        return nih_dicts, len(rsp.content)
+
+    def _dnld_bisect(self, pmids, depth):
+        """Download a chunk of PMIDs which failed as two smaller requests"""
+        print(f'**NOTE: SPLITTING {len(pmids):,} PMIDs INTO TWO REQUESTS')
+        nih_dicts = []
+        half = len(pmids)//2
+        for pmids_half in (pmids[:half], pmids[half:]):
+            if (nih_dicts_cur := self._dnld_ltmax(pmids_half, depth)):
+                nih_dicts.extend(nih_dicts_cur)
+        return nih_dicts
+
+    def _get_nihdicts(self, rsp_json, pmids, pmids_str):
+        """Adjust the downloaded NIH citation data and report PMIDs which were not downloaded"""
         if rsp_json is not None:
             # Adjust the jsons downloaded for NIH citation data
             nih_dicts = []
@@ -101,29 +251,61 @@ class NIHiCiteAPI:
             pmids_missing = set(pmids).difference(pmids_downloaded)
             # pylint: disable=line-too-long
             if pmids_missing:
-                print(f"**WARNING: {len(pmids_str):,} NIH CITATION DATA NOT DOWNLOADED FOR PMIDs: {pmids_str}")
+                pmids_missing_str = ' '.join(str(p) for p in sorted(pmids_missing))
+                print(f"**WARNING: {len(pmids_missing):,} NIH CITATION DATA NOT DOWNLOADED FOR PMIDs: {pmids_missing_str}")
             return nih_dicts
         # pylint: disable=line-too-long
-        print(f"**WARNING: {len(pmids_str):,} NIH CITATION DATA NOT DOWNLOADED FOR PMIDs: {pmids_str}")
+        print(f"**WARNING: {len(pmids):,} NIH CITATION DATA NOT DOWNLOADED FOR PMIDs: {pmids_str}")
         return None
 
 
     def _send_request(self, cmd, timeout=500):
         """Send the request to iCite"""
-        try:
-            rsp = requests.get(cmd, timeout=timeout)
-            if rsp.status_code == 200:
-                return rsp.json()
-            self._prt_errmsg(self._err_msg(rsp))
-            return None
-        except requests.exceptions.ConnectionError as errobj:
-            self._prt_errmsg(f'**ERROR: ConnectionError = {str(errobj)}\n')
-            return None
-        # TODO: Consider explicitly re-raising using
-        # 'raise RuntimeError(f'**ERROR DOWNLOADING {cmd}\n{error}') from error'
-        except Exception as exc:
-            traceback.print_exc()
-            raise RuntimeError(f'**ERROR DOWNLOADING {cmd}') from exc
+        rsp = self._get_response(cmd, timeout)
+        return rsp.json() if rsp is not None else None
+
+    # pylint: disable=too-many-branches
+    def _get_response(self, cmd, timeout=500, stream=False, read=None):
+        """Send the request to iCite. Return the response, or read(response) and the seconds
+           the successful try took, w/o waits before retries, if it was successful"""
+        s_retry = self.retry
+        session = self.get_session()
+        for attempt in range(1, s_retry.max_tries + 1):
+            retry_after = None
+            tic = default_timer()
+            try:
+                rsp = session.get(cmd, timeout=timeout, stream=stream)
+                if rsp.status_code == 200:
+                    if read is None:
+                        return rsp
+                    # A body streamed after the headers may still fail, e.g., a connection reset
+                    try:
+                        with rsp:
+                            return read(rsp), default_timer() - tic
+                    except self.errs_read as errobj:
+                        errmsg = f'**ERROR READING RESPONSE: {type(errobj).__name__} = {str(errobj)}\n'
+                else:
+                    errmsg = self._err_msg(rsp)
+                    retry_after = s_retry.get_retry_after(rsp)
+                    rsp.close()
+                    if not s_retry.do_retry(rsp.status_code):
+                        self._prt_errmsg(errmsg)
+                        return None
+            # Includes bodies which fail while they are read, e.g., ChunkedEncodingError
+            except requests.exceptions.RequestException as errobj:
+                errmsg = f'**ERROR: {type(errobj).__name__} = {str(errobj)}\n'
+            # TODO: Consider explicitly re-raising using
+            # 'raise RuntimeError(f'**ERROR DOWNLOADING {cmd}\n{error}') from error'
+            except Exception as exc:
+                traceback.print_exc()
+                raise RuntimeError(f'**ERROR DOWNLOADING {cmd}') from exc
+            if attempt == s_retry.max_tries:
+                self._prt_errmsg(errmsg)
+                return None
+            delay = s_retry.get_delay(attempt, retry_after)
+            print(f'**RETRY {attempt} of {s_retry.max_tries - 1} IN {delay:.1f} SECONDS: {errmsg}')
+            sleep(delay)
+        return None
 
     def _prt_errmsg(self, errmsg):
         """Print the error and add the error to the list of API messages"""
@@ -140,17 +322,21 @@ class NIHiCiteAPI:
         ##print('5 ERR text       ', rsp.text)
         ##print('6 ERR cmd        ', rsp.url)
         txt = 'NO JSON DATA'
-        if rsp.json() is not None:
-            txt =' '.join(f'{k}({v})' for k, v in sorted(rsp.json().items()))
+        try:
+            if (rsp_json := rsp.json()) is not None:
+                txt =' '.join(f'{k}({v})' for k, v in sorted(rsp_json.items()))
+        except ValueError:
+            pass
         return f'{rsp.status_code} {rsp.reason} URL[{len(rsp.url)}]: {rsp.url}\n  {txt}'
 
     def _adjust_json_entry(self, entry_dct):
         """Adjust values in the json dict['data']; This fnc has side effects on entry_dct"""
         dct = entry_dct
         ##self._prt_dct(entry_dct, "ENTRY")
-        if (title := entry_dct['title']) is not None:
+        # Fields not requested using fl (e.g., fl=pmid,year) are not present
+        if (title := entry_dct.get('title')) is not None:
             self._adjust_title(dct, title.strip())
-        if (authors := entry_dct['authors']) is not None:
+        if (authors := entry_dct.get('authors')) is not None:
             if (typ := type(authors)) is list:
                 # List of dicts w/keys: firstName lastName & fullName
                 dct['authors'] = authors
@@ -0,0 +1,129 @@
+"""Given PubMed IDs (PMIDs), download NIH citation data without blocking the asyncio event loop"""
+# https://icite.od.nih.gov/api
+#
+# Requires aiohttp:
+#     $ pip install pmidcite[async]
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+import asyncio
+import aiohttp
+
+from pmidcite.icite.api import NIHiCiteAPI
+
+
+class AsyncNIHiCiteAPI(NIHiCiteAPI):
+    """Download NIH citation data for many PMIDs concurrently on one asyncio event loop"""
+
+    def __init__(self, max_concurrent=10, timeout=500, **kws):
+        NIHiCiteAPI.__init__(self, pool_maxsize=max_concurrent, **kws)
+        # Responses are read as JSON
+        self.kws.pop('format', None)
+        # Maximum number of 1,000-PMID requests in flight at once
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self.aiosession = None
+
+    async def dnld_nihdict(self, pmid):
+        """Download NIH citation data for one PMID. Return a corrected json"""
+        req_nihocc = f'{self.url_base}/{pmid}'
+        if (params := self._get_params()):
+            req_nihocc = f'{req_nihocc}?{params[1:]}'
+        rsp_json = await self._send_request_async(req_nihocc)
+        if rsp_json:
+            assert 'data' in rsp_json, rsp_json
+            if (data := rsp_json['data']) and len(data) == 1:
+                return self._adjust_json_entry(data[0])
+            raise RuntimeError("EXPCETED 'data' in json returned for a single PMID")
+        return None
+
+    async def dnld_nihdicts(self, pmids):
+        """Download a list of NIH citation data for given PMIDs, keeping the requested order"""
+        pmid_list_all = pmids if isinstance(pmids, list) else list(pmids)
+        if not pmid_list_all:
+            return []
+        # The NIH-OCC allows for a maximum of 1,000 PMIDs to be downloaded at once
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        s_dnld_ltmax = self._dnld_ltmax_async
+        pmid_lists = self.chunker.split_list(pmid_list_all, self._get_len_url())
+        # asyncio.gather returns results in the order the chunks were given
+        lists_nih_dicts = await asyncio.gather(*[s_dnld_ltmax(lst, semaphore) for lst in pmid_lists])
+        nih_dicts_all = []
+        for nih_dicts_cur in lists_nih_dicts:
+            if nih_dicts_cur:
+                nih_dicts_all.extend(nih_dicts_cur)
+        return nih_dicts_all
+
+    async def _dnld_ltmax_async(self, pmids, semaphore, depth=0):
+        """Download NIH citation data for up to 1,000 PMIDs"""
+        pmids_str = ','.join(str(p) for p in pmids)
+        async with semaphore:
+            rsp_json = await self._send_request_async(
+                f'{self.url_base}?pmids={pmids_str}{self._get_params()}')
+        if rsp_json is not None:
+            return self._get_nihdicts(rsp_json, pmids, pmids_str)
+        # All tries failed: Request each half of the chunk separately
+        if len(pmids) > 1 and depth < self.retry.bisect_depth:
+            return await self._dnld_bisect_async(list(pmids), semaphore, depth + 1)
+        return self._get_nihdicts(None, pmids, pmids_str)
+
+    async def _dnld_bisect_async(self, pmids, semaphore, depth):
+        """Download a chunk of PMIDs which failed as two smaller requests"""
+        print(f'**NOTE: SPLITTING {len(pmids):,} PMIDs INTO TWO REQUESTS')
+        half = len(pmids)//2
+        lists_nih_dicts = await asyncio.gather(
+            *[self._dnld_ltmax_async(lst, semaphore, depth) for lst in (pmids[:half], pmids[half:])])
+        nih_dicts = []
+        for nih_dicts_cur in lists_nih_dicts:
+            if nih_dicts_cur:
+                nih_dicts.extend(nih_dicts_cur)
+        return nih_dicts
+
+    async def _send_request_async(self, cmd):
+        """Send the request to iCite, retrying failed requests w/the retry policy"""
+        s_retry = self.retry
+        for attempt in range(1, s_retry.max_tries + 1):
+            retry_after = None
+            try:
+                async with self._get_aiosession().get(cmd) as rsp:
+                    if rsp.status == 200:
+                        return await rsp.json()
+                    errmsg = f'{rsp.status} {rsp.reason} URL[{len(str(rsp.url))}]: {rsp.url}'
+                    retry_after = s_retry.get_retry_after(rsp)
+                    if not s_retry.do_retry(rsp.status):
+                        self._prt_errmsg(errmsg)
+                        return None
+            # Includes ContentTypeError and truncated JSON from rsp.json(), so other chunks continue
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as errobj:
+                errmsg = f'**ERROR: {type(errobj).__name__} = {str(errobj)}\n'
+            if attempt == s_retry.max_tries:
+                self._prt_errmsg(errmsg)
+                return None
+            delay = s_retry.get_delay(attempt, retry_after)
+            print(f'**RETRY {attempt} of {s_retry.max_tries - 1} IN {delay:.1f} SECONDS: {errmsg}')
+            await asyncio.sleep(delay)
+        return None
+
+    def _get_aiosession(self):
+        """Get the aiohttp session, creating it on first use inside the running event loop"""
+        if self.aiosession is None:
+            self.aiosession = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrent),
+                timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self.aiosession
+
+    async def aclose(self):
+        """Close the aiohttp session and release its pooled connections"""
+        if self.aiosession is not None:
+            await self.aiosession.close()
+            self.aiosession = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_tb):
+        await self.aclose()
+
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
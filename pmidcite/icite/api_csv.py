@@ -0,0 +1,68 @@
+"""Convert NIH iCite data downloaded in CSV format into the dict returned in JSON format"""
+# https://icite.od.nih.gov/api
+#   Example: https://icite.od.nih.gov/api/pubs?pmids=33031632&format=csv
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from csv import reader
+from io import TextIOWrapper
+
+
+class NIHiCiteCsv:
+    """Convert NIH iCite data downloaded in CSV format into the dict returned in JSON format"""
+
+    int_keys = {'pmid', 'year', 'citation_count'}
+    bool_keys = {'is_research_article', 'is_clinical', 'provisional'}
+    pmids_keys = {'cited_by_clin', 'cited_by', 'references'}
+    str_keys = {'title', 'journal', 'doi', 'last_modified'}
+    bool_true = {'yes', 'true', '1'}
+    # Values not listed above are float (relative_citation_ratio, nih_percentile, apt, ...)
+
+    def iter_nihdicts(self, rsp):
+        """Yield one dict per CSV row, reading the streamed response incrementally"""
+        rsp.raw.decode_content = True
+        # newline='' keeps newlines inside quoted fields intact for the csv reader
+        rows = reader(TextIOWrapper(rsp.raw, encoding='utf-8', newline=''))
+        header = next(rows, None)
+        if header is None:
+            return
+        s_get_val = self._get_val
+        num_cols = len(header)
+        for row in rows:
+            if row:
+                if len(row) != num_cols:
+                    raise ValueError(f'CSV ROW HAS {len(row)} OF {num_cols} VALUES: {row[:1]}')
+                yield {key:s_get_val(key, val) for key, val in zip(header, row)}
+
+    def _get_val(self, key, val):
+        """Convert one CSV value to the type found in the JSON response"""
+        # pylint: disable=too-many-return-statements
+        if key in self.pmids_keys:
+            return [int(p) for p in val.replace(',', ' ').split()]
+        if key == 'authors':
+            return [self._get_author(a) for a in val.split(', ') if a]
+        if key in self.str_keys:
+            return val
+        if val == '':
+            return None
+        if key in self.int_keys:
+            return int(val)
+        if key in self.bool_keys:
+            return val.lower() in self.bool_true
+        try:
+            return float(val)
+        except ValueError:
+            return val
+
+    @staticmethod
+    def _get_author(fullname):
+        """Get an author dict w/keys firstName lastName & fullName, as in the JSON response"""
+        fullname = fullname.strip()
+        names = fullname.rsplit(' ', 1)
+        if len(names) == 1:
+            return {'firstName': '', 'lastName': fullname, 'fullName': fullname}
+        return {'firstName': names[0], 'lastName': names[1], 'fullName': fullname}
+
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
@@ -0,0 +1,66 @@
+"""Size chunks of PMIDs sent to NIH iCite by URL length, and by observed latency and payload size"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from threading import Lock
+
+
+class ChunkSizer:
+    """Size chunks of PMIDs sent to NIH iCite by URL length, and by observed latency and payload size"""
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, max_pmids=1000, max_url_len=8000, target_secs=30.0,
+                 target_bytes=25000000, min_pmids=20):
+        # The NIH-OCC allows for a maximum of 1,000 PMIDs to be downloaded at once
+        self.max_pmids = max_pmids
+        # Many web servers reject request lines longer than 8 KB
+        self.max_url_len = max_url_len
+        # Chunks are shrunk if a response is slower or larger than these targets
+        self.target_secs = target_secs
+        self.target_bytes = target_bytes
+        self.min_pmids = min_pmids
+        # Current number of PMIDs per chunk; adjusted after each response
+        self.num_pmids = max_pmids
+        self.lock = Lock()
+
+    def get_idx_end(self, pmids, idx_beg, len_url):
+        """Get the end index of the next chunk, starting at idx_beg, w/a URL of len_url w/no PMIDs"""
+        idx_max = min(len(pmids), idx_beg + self.num_pmids)
+        max_url_len = self.max_url_len
+        idx_end = idx_beg
+        while idx_end < idx_max:
+            # Each PMID adds its digits plus a comma
+            len_url += len(str(pmids[idx_end])) + 1
+            if len_url > max_url_len and idx_end != idx_beg:
+                break
+            idx_end += 1
+        return idx_end
+
+    def split_list(self, pmids, len_url):
+        """Split a long list of PMIDs into chunks using the current chunk size"""
+        chunks = []
+        idx_beg = 0
+        num_pmids = len(pmids)
+        s_get_idx_end = self.get_idx_end
+        while idx_beg < num_pmids:
+            idx_end = s_get_idx_end(pmids, idx_beg, len_url)
+            chunks.append(pmids[idx_beg:idx_end])
+            idx_beg = idx_end
+        return chunks
+
+    def update(self, num_pmids, secs, num_bytes):
+        """Adjust the chunk size using the latency and payload size of a downloaded chunk"""
+        if num_pmids < self.min_pmids:
+            return
+        ratio = min(self.target_secs/max(secs, 1e-3), self.target_bytes/max(num_bytes, 1))
+        with self.lock:
+            if ratio < 1.0:
+                # Shrink in proportion to how far the response overshot its targets
+                self.num_pmids = max(self.min_pmids, int(num_pmids*ratio))
+            elif num_pmids >= self.num_pmids:
+                # Grow by at most half of the chunk size for each fast, small response
+                self.num_pmids = min(self.max_pmids, int(num_pmids*min(ratio, 1.5)))
+
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
@@ -0,0 +1,115 @@
+"""Share in-flight and recent NIH iCite downloads so a PMID is requested only once"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from time import time
+from threading import Lock
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class NIHiCiteCoalescer:
+    """Share in-flight and recent NIH iCite downloads so a PMID is requested only once"""
+
+    def __init__(self, api, max_done=0, max_secs=None):
+        self.api = api
+        self.lock = Lock()
+        # PMIDs currently being downloaded by a caller; other callers wait on the Future
+        self.pmid2future = {}
+        # In-flight PMIDs that at least one other caller is waiting on
+        self.pmids_waited = set()
+        # Optional: the most recently downloaded NIH iCite dicts, e.g., for the next of several
+        # PubMed queries. Kept for no more than max_secs, if given. Default: in-flight PMIDs only
+        self.max_done = max_done if max_done else 0
+        self.max_secs = max_secs
+        self.pmid2done = OrderedDict()  # {pmid: (secs_downloaded, nihdict)}
+
+    def dnld_nihdict(self, pmid, use_done=True):
+        """Download NIH citation data for one PMID, or wait for a download already in flight"""
+        pmid2nihdict = self._dnld([pmid], lambda pmids: [d for d in [self.api.dnld_nihdict(pmid)] if d],
+                                  use_done)
+        return pmid2nihdict.get(pmid)
+
+    def dnld_nihdicts(self, pmids, use_done=True):
+        """Download NIH citation data for PMIDs, waiting for any PMIDs already in flight"""
+        pmids = list(dict.fromkeys(pmids))  # Remove duplicates, keeping order
+        pmid2nihdict = self._dnld(pmids, self.api.dnld_nihdicts, use_done)
+        return [pmid2nihdict[p] for p in pmids if p in pmid2nihdict]
+
+    def _dnld(self, pmids, fnc_dnld, use_done):
+        """Download PMIDs not in flight; wait for the PMIDs being downloaded by other callers"""
+        pmid2future_mine = {}
+        pmid2future_other = {}
+        pmid2nihdict_done = {}
+        # Forced and refreshing downloads do not use the recent downloads
+        use_done = use_done and self.max_done
+        secs_min = time() - self.max_secs if self.max_secs is not None else None
+        with self.lock:
+            s_pmid2future = self.pmid2future
+            s_pmid2done = self.pmid2done
+            for pmid in pmids:
+                if use_done and (done := s_pmid2done.get(pmid)) is not None and \
+                   (secs_min is None or done[0] >= secs_min):
+                    s_pmid2done.move_to_end(pmid)
+                    pmid2nihdict_done[pmid] = done[1]
+                elif (future := s_pmid2future.get(pmid)) is not None:
+                    pmid2future_other[pmid] = future
+                    self.pmids_waited.add(pmid)
+                else:
+                    future = Future()
+                    s_pmid2future[pmid] = future
+                    pmid2future_mine[pmid] = future
+        pmid2nihdict = self._dnld_mine(pmid2future_mine, fnc_dnld) if pmid2future_mine else {}
+        for pmid, future in pmid2future_other.items():
+            if (nihdict := future.result()) is not None:
+                # Each caller gets its own dict; NIHiCiteEntry.from_jsondct adds keys to it
+                pmid2nihdict[pmid] = dict(nihdict)
+        for pmid, nihdict in pmid2nihdict_done.items():
+            pmid2nihdict[pmid] = dict(nihdict)
+        return pmid2nihdict
+
+    def _dnld_mine(self, pmid2future, fnc_dnld):
+        """Download the PMIDs which this caller is responsible for and share the results"""
+        try:
+            nihdicts = fnc_dnld(list(pmid2future.keys()))
+        except BaseException as exc:
+            self._set_futures(pmid2future, exc=exc)
+            raise
+        pmid2nihdict = {d['pmid']:d for d in nihdicts} if nihdicts else {}
+        self._set_futures(pmid2future, pmid2nihdict)
+        return pmid2nihdict
+
+    def _set_futures(self, pmid2future, pmid2nihdict=None, exc=None):
+        """Give waiting callers the downloaded data and stop tracking the PMIDs as in flight"""
+        with self.lock:
+            s_pmid2future = self.pmid2future
+            s_pmids_waited = self.pmids_waited
+            s_pmid2done = self.pmid2done
+            tic = time()
+            for pmid, future in pmid2future.items():
+                del s_pmid2future[pmid]
+                if exc is not None:
+                    s_pmids_waited.discard(pmid)
+                    future.set_exception(exc)
+                    continue
+                # Later and waiting callers get a copy made before this caller modifies its dict
+                if (nihdict := pmid2nihdict.get(pmid)) is not None and self.max_done:
+                    nihdict = dict(nihdict)
+                    s_pmid2done[pmid] = (tic, nihdict)
+                    s_pmid2done.move_to_end(pmid)
+                if pmid in s_pmids_waited:
+                    s_pmids_waited.discard(pmid)
+                    future.set_result(dict(nihdict) if nihdict is not None else None)
+                else:
+                    future.set_result(None)
+            while len(s_pmid2done) > self.max_done:
+                s_pmid2done.popitem(last=False)
+
+    def clear(self):
+        """Forget the recently downloaded NIH iCite dicts, e.g., to download them again"""
+        with self.lock:
+            self.pmid2done.clear()
+
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
@@ -0,0 +1,173 @@
+"""Store NIH iCite data for many PMIDs in one SQLite database"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+import sqlite3
+from sys import stdout
+from json import dumps
+from json import loads
+from time import time
+from os.path import join
+
+from pmidcite.icite.dnldr.pmid_evict import NIHiCiteEvictor
+
+
+class NIHiCiteDb:
+    """Store NIH iCite data for many PMIDs in one SQLite database"""
+
+    basename = 'icite.sqlite3'
+
+    # Number of PMIDs in each 'WHERE pmid IN (...)'; SQLite limits the number of parameters
+    max_params = 900
+
+    sql_create = (
+        'CREATE TABLE IF NOT EXISTS icite ('
+        'pmid INTEGER PRIMARY KEY, '
+        'last_modified TEXT, '   # last_modified value downloaded from NIH iCite
+        'downloaded REAL, '      # Time downloaded, in seconds since the epoch
+        'nihdict TEXT)')         # NIH iCite data as a JSON str
+
+    # Corrupt rows are moved here, so they are downloaded again
+    sql_create_quarantine = (
+        'CREATE TABLE IF NOT EXISTS icite_quarantine ('
+        'pmid INTEGER, quarantined REAL, nihdict TEXT)')
+
+    def __init__(self, file_db):
+        self.file_db = file_db
+        self.conn = sqlite3.connect(file_db, timeout=60)
+        # Readers do not block the writer; writers from other processes wait up to the timeout
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(self.sql_create)
+        self.conn.execute(self.sql_create_quarantine)
+        self.conn.commit()
+
+    @classmethod
+    def get_filename(cls, dir_icite_py):
+        """Get the name of the SQLite database in the iCite cache directory"""
+        return join(dir_icite_py, cls.basename)
+
+    def wr_nihdicts(self, nihdicts, pmid2downloaded=None):
+        """Insert or replace NIH iCite data for many PMIDs in one transaction"""
+        tic = time()
+        # pmid2downloaded keeps the download times of entries copied from another cache
+        get_downloaded = pmid2downloaded.get if pmid2downloaded is not None else {}.get
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO icite (pmid, last_modified, downloaded, nihdict) '
+                'VALUES (?, ?, ?, ?)',
+                ((d['pmid'], d.get('last_modified'), get_downloaded(d['pmid'], tic), dumps(d))
+                 for d in nihdicts))
+
+    def load_nihdicts(self, pmids):
+        """Load NIH iCite data for the PMIDs which are stored in the database"""
+        nihdicts = []
+        pmids_corrupt = []
+        for pmid, nihdict in self._select('pmid, nihdict', pmids):
+            try:
+                nihdicts.append(loads(nihdict))
+            except (ValueError, TypeError):
+                pmids_corrupt.append(pmid)
+        if pmids_corrupt:
+            self.quarantine(pmids_corrupt)
+        return nihdicts
+
+    def quarantine(self, pmids, prt=stdout):
+        """Move corrupt rows into the icite_quarantine table"""
+        tic = time()
+        with self.conn:
+            self.conn.executemany(
+                'INSERT INTO icite_quarantine (pmid, quarantined, nihdict) '
+                'SELECT pmid, ?, nihdict FROM icite WHERE pmid = ?',
+                ((tic, p) for p in pmids))
+            self.conn.executemany('DELETE FROM icite WHERE pmid = ?', ((p,) for p in pmids))
+        prt.write(f'**WARNING: {len(pmids):,} CORRUPT iCite ENTRIES MOVED TO icite_quarantine: '
+                  f'{self.file_db}\n')
+
+    def get_pmid2downloaded(self, pmids):
+        """Get the download time, in seconds since the epoch, of the PMIDs stored in the database"""
+        return dict(self._select('pmid, downloaded', pmids))
+
+    def get_pmids_cached(self, pmids):
+        """Get the set of PMIDs which are stored in the database"""
+        return set(pmid for (pmid,) in self._select('pmid', pmids))
+
+    def get_pmid2stat(self):
+        """Get the size and download time of all stored PMIDs"""
+        # Reads are not recorded, so least-recently-used is approximated by the download time
+        s_ntstat = NIHiCiteEvictor.ntstat
+        return {pmid:s_ntstat(nbytes, downloaded, downloaded) for pmid, nbytes, downloaded in
+                self.conn.execute('SELECT pmid, LENGTH(nihdict), downloaded FROM icite')}
+
+    def rm_pmids(self, pmids):
+        """Remove PMIDs from the database; Return the number of rows removed"""
+        num_rm = 0
+        pmids = list(pmids)
+        s_max = self.max_params
+        with self.conn:
+            for idx in range(0, len(pmids), s_max):
+                pmids_cur = pmids[idx:idx+s_max]
+                sql = f'DELETE FROM icite WHERE pmid IN ({",".join("?"*len(pmids_cur))})'
+                num_rm += self.conn.execute(sql, pmids_cur).rowcount
+        return num_rm
+
+    def get_ntsize(self, pmids=None):
+        """Get the number and total size of the entries for PMIDs, or of all entries"""
+        if pmids is None:
+            num_entries, nbytes = self.conn.execute(
+                'SELECT COUNT(*), TOTAL(LENGTH(nihdict)) FROM icite').fetchone()
+            return NIHiCiteEvictor.ntsize(num_entries, int(nbytes))
+        nbytes_all = [nbytes for (nbytes,) in self._select('LENGTH(nihdict)', pmids)]
+        return NIHiCiteEvictor.ntsize(len(nbytes_all), sum(n for n in nbytes_all if n is not None))
+
+    def get_errors(self):
+        """Check the structure of the database file; Return a list of errors found"""
+        return [msg for (msg,) in self.conn.execute('PRAGMA quick_check') if msg != 'ok']
+
+    def vacuum(self):
+        """Rebuild the database file, returning the space of removed entries to the file system"""
+        self.conn.execute('VACUUM')
+
+    @classmethod
+    def get_pmids_corrupt(cls, file_db, pmids):
+        """Get stored PMIDs whose data cannot be read; Run in worker processes by a process pool"""
+        nihdb = cls(file_db)
+        pmids_corrupt = []
+        for pmid, nihdict in nihdb._select('pmid, nihdict', pmids):
+            try:
+                if loads(nihdict)['pmid'] != pmid:
+                    pmids_corrupt.append(pmid)
+            except (ValueError, TypeError, KeyError):
+                pmids_corrupt.append(pmid)
+        nihdb.close()
+        return pmids_corrupt
+
+    def get_pmids(self):
+        """Get all stored PMIDs, ordered by PMID"""
+        return [pmid for (pmid,) in self.conn.execute('SELECT pmid FROM icite ORDER BY pmid')]
+
+    def iter_nihdicts(self):
+        """Yield NIH iCite data for all stored PMIDs, ordered by PMID"""
+        for (nihdict,) in self.conn.execute('SELECT nihdict FROM icite ORDER BY pmid'):
+            yield loads(nihdict)
+
+    def get_num_pmids(self):
+        """Get the number of PMIDs stored in the database"""
+        return self.conn.execute('SELECT COUNT(*) FROM icite').fetchone()[0]
+
+    def _select(self, columns, pmids):
+        """Yield rows for the PMIDs which are stored in the database"""
+        pmids = list(pmids)
+        s_conn = self.conn
+        s_max = self.max_params
+        for idx in range(0, len(pmids), s_max):
+            pmids_cur = pmids[idx:idx+s_max]
+            sql = f'SELECT {columns} FROM icite WHERE pmid IN ({",".join("?"*len(pmids_cur))})'
+            yield from s_conn.execute(sql, pmids_cur)
+
+    def close(self):
+        """Close the connection to the database"""
+        self.conn.close()
+
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
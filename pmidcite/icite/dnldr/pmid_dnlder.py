@@ -4,42 +4,82 @@
 __copyright__ = "Copyright (C) 2019-present, DV Klopfenstein, PhD. All rights reserved."
 __author__ = "DV Klopfenstein, PhD"
 
+from os import cpu_count
+from os import getpid
+from os import remove
+from os import replace
+from threading import get_ident
 from os.path import exists
-from os.path import join
+from os.path import getmtime
+from concurrent.futures import ProcessPoolExecutor
 
 from pmidcite.icite.dnldr.pmid_dnlder_base import NIHiCiteDownloaderBase
 from pmidcite.icite.dnldr.pmid_loader import NIHiCiteLoader
-from pmidcite.icite.entry import NIHiCiteEntry
+from pmidcite.icite.dnldr.pmid_layout import NIHiCitePyLayout
+from pmidcite.icite.dnldr.pmid_lock import NIHiCiteLock
+from pmidcite.icite.dnldr.pmid_evict import NIHiCiteCacheSize
 
 
 class NIHiCiteDownloader(NIHiCiteDownloaderBase):
     """Given a PubMed ID (PMID), download a list of publications which cite and reference it"""
 
-    def __init__(self, dir_download, force_download, details_cites_refs=None, nih_grouper=None):
+    # Loading fewer cached PMIDs than this is faster in one process than starting a process pool
+    min_pmids_procs = 2000
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, dir_download, force_download, details_cites_refs=None, nih_grouper=None,
+                 api=None, coalescer=None, num_procs=1, py_layout='auto', lru=None, refresh=None,
+                 evictor=None, entry_cls=None):
         # https://stackoverflow.com/questions/10482953/python-extending-with-using-super-python-3-vs-python-2
         ##super(NIHiCiteDownloader, self).__init__(details_cites_refs, nih_grouper)
-        NIHiCiteDownloaderBase.__init__(self, details_cites_refs, nih_grouper)
+        NIHiCiteDownloaderBase.__init__(
+            self, details_cites_refs, nih_grouper, api, coalescer, lru, refresh, entry_cls)
         self.dnld_force = force_download
         self.dir_dnld = dir_download  # Recommended dir_icite_py: ./icite
-        self.loader = NIHiCiteLoader(self.nihgrouper, dir_download, self.details_cites_refs)
+        # p{PMID}.py files are in dir_download (flat) or in subdirectories (sharded)
+        self.pylayout = NIHiCitePyLayout(dir_download, py_layout)
+        self.loader = NIHiCiteLoader(
+            self.nihgrouper, dir_download, self.details_cites_refs, self.pylayout, self.entry_cls)
+        # Number of processes loading cached p{PMID}.py files; 0 uses one per CPU
+        self.num_procs = num_procs if num_procs else cpu_count()
+        # NIHiCiteEvictor: remove p{PMID}.py files over the cache size limits after bulk writes
+        self.cachesize = NIHiCiteCacheSize(evictor, self.pylayout) if evictor is not None else None
         if not exists(dir_download):
             raise RuntimeError(f'**FATAL: NO DIRECTORY: {dir_download}')
 
-    def get_icites(self, pmids):
+    def close(self):
+        """Release the HTTP connections; remove p{PMID}.py files older than the evictor's max_days"""
+        NIHiCiteDownloaderBase.close(self)
+        if self.cachesize is not None and self.cachesize.evictor.max_secs is not None:
+            with NIHiCiteLock(self.dir_dnld):
+                self.cachesize.evict()
+
+    def _get_icites(self, pmids):
         """Download NIH iCite data for requested PMIDs"""
         # Python module filenames
-        s_dir_dnld = self.dir_dnld
-        pmid2py = {pmid:join(s_dir_dnld, f'p{pmid}.py') for pmid in pmids}
+        s_get_file_pmid = self.pylayout.get_file_pmid
+        pmid2py = {pmid:s_get_file_pmid(pmid) for pmid in pmids}
         if self.dnld_force:
             pmid2nihentry = {o.pmid: o for o in self._dnld_icites(pmid2py)}
             return [pmid2nihentry[pmid] for pmid in pmids if pmid in pmid2nihentry]
         # Separate PMIDs into those stored in Python modules and those not
         nihentries_all = []
-        pmids_pyexist1 = set(pmid for pmid, py in pmid2py.items() if exists(py))
+        pmids_pyexist1 = self.pylayout.get_pmids_cached(pmid2py.keys())
+        s_refresh = self.refresh
+        if s_refresh is not None and s_refresh.max_secs is not None:
+            # Files written more than max_days ago are downloaded again
+            pmids_pyexist1.difference_update(s_refresh.get_pmids_old(
+                {p:getmtime(pmid2py[p]) for p in pmids_pyexist1}))
         pmids_pyexist0 = set(pmids).difference(pmids_pyexist1)
         if pmids_pyexist1:
             nihentries_loaded = self._load_icites(pmids_pyexist1, pmid2py)
+            # Corrupt files were quarantined; download them again
+            if len(nihentries_loaded) != len(pmids_pyexist1):
+                pmids_pyexist0.update(pmids_pyexist1.difference(o.pmid for o in nihentries_loaded))
             if nihentries_loaded:
+                if s_refresh is not None:
+                    nihentries_loaded, pmids_modified = s_refresh.get_nihentries_fresh(nihentries_loaded)
+                    pmids_pyexist0.update(pmids_modified)
                 nihentries_all.extend(nihentries_loaded)
         if pmids_pyexist0:
             nihentries_all.extend(self._dnld_icites({p:pmid2py[p] for p in pmids_pyexist0}))
@@ -49,59 +89,112 @@ class NIHiCiteDownloader(NIHiCiteDownloaderBase):
 
     def _dnld_icites(self, pmid2foutpy):
         """Download a list of NIH citation data for PMIDs"""
-        nihdicts = self.api.dnld_nihdicts(pmid2foutpy.keys())
+        nihdicts = self.coalescer.dnld_nihdicts(pmid2foutpy.keys(), self._use_done())
         if nihdicts:
-            s_wrpy = self._wrpy
-            for nih_dict in nihdicts:
-                s_wrpy(pmid2foutpy[nih_dict['pmid']], nih_dict)
+            # Partial entries downloaded using fl are not cached; the cache holds all fields
+            if self.api.get_fields() is None:
+                # Processes sharing dir_icite_py write their downloads one bulk write at a time
+                with NIHiCiteLock(self.dir_dnld):
+                    if self.cachesize is None:
+                        self._wr_nihdicts(nihdicts, pmid2foutpy)
+                    else:
+                        self.cachesize.wr_pmids([d['pmid'] for d in nihdicts],
+                                                lambda: self._wr_nihdicts(nihdicts, pmid2foutpy))
             s_get_group = self.nihgrouper.get_group
             # pylint: disable=line-too-long
-            return [NIHiCiteEntry.from_jsondct(d, s_get_group(d['nih_percentile'])) for d in nihdicts]
+            return [self.entry_cls.from_jsondct(d, s_get_group(d.get('nih_percentile'))) for d in nihdicts]
         return []
 
-    def get_icite(self, pmid):
+    def _get_icite(self, pmid):
         """Load or download NIH iCite data for requested PMID"""
         ##print(f'DOWNLOADER: {pmid}')
-        file_pmid = join(self.dir_dnld, f'p{pmid}.py')
-        if self.dnld_force or not exists(file_pmid):
-            nih_dict = self.api.dnld_nihdict(pmid)
-            ##print(f'nih_dict: {nih_dict}')
-            if nih_dict:
+        if self.refresh is not None:
+            nihentries = self._get_icites([pmid])
+            return nihentries[0] if nihentries else None
+        file_pmid = self.pylayout.get_file_pmid(pmid)
+        # A missing or corrupt (quarantined) file is downloaded
+        if not self.dnld_force and (nihentry := self.loader.load_icite(file_pmid)) is not None:
+            return nihentry
+        nih_dict = self.coalescer.dnld_nihdict(pmid, self._use_done())
+        ##print(f'nih_dict: {nih_dict}')
+        if nih_dict:
+            if self.api.get_fields() is None:
                 self._wrpy(file_pmid, nih_dict)
-                return NIHiCiteEntry.from_jsondct(
-                    nih_dict,
-                    self.nihgrouper.get_group(nih_dict['nih_percentile']))
-        return self.loader.load_icite(file_pmid)  # NIHiCiteEntry
+            return self.entry_cls.from_jsondct(
+                nih_dict,
+                self.nihgrouper.get_group(nih_dict.get('nih_percentile')))
+        return self.loader.load_icite(file_pmid) if self.dnld_force else None  # NIHiCiteEntry
 
     # -------------------------------------------------------------------------------------
     def _get_pmids_missing(self, pmids_all):
         """Get PMIDs that have not yet been downloaded"""
-        pmids_missing = set()
-        for pmid_cur in pmids_all:
-            file_pmid = join(self.dir_dnld, f'p{pmid_cur}.py')
-            if not exists(file_pmid):
-                pmids_missing.add(pmid_cur)
-        return pmids_missing
+        pmids_all = set(pmids_all)
+        if self.dnld_force:
+            return pmids_all
+        return pmids_all.difference(self.pylayout.get_pmids_cached(pmids_all))
+
+    def _get_pmid2downloaded(self, pmids):
+        """Get the times cached p{PMID}.py files were written"""
+        s_get_file_pmid = self.pylayout.get_file_pmid
+        pmid2py = {p:s_get_file_pmid(p) for p in pmids}
+        return {p:getmtime(pmid2py[p]) for p in self.pylayout.get_pmids_cached(pmid2py.keys())}
+
+    def _wr_nihdicts(self, nihdicts, pmid2foutpy):
+        """Write downloaded NIH iCite data into p{PMID}.py files"""
+        s_wrpy = self._wrpy
+        for nih_dict in nihdicts:
+            s_wrpy(pmid2foutpy[nih_dict['pmid']], nih_dict)
 
     def _wrpy(self, fout_py, dct, log=None):
         """Write NIH iCite to a Python module"""
-        with open(fout_py, 'w', encoding='utf-8') as prt:
-            self.api.prt_dct(dct, prt)
-            # Setting prt to sys.stdout -> WROTE: ./icite/p10802651.py
-            if log:
-                log.write(f'  WROTE: {fout_py}\n')
+        self.pylayout.mk_dir_pmid(fout_py)
+        # Write a temporary file, then rename it: readers never see a partly written file
+        fout_tmp = f'{fout_py}.{getpid()}.{get_ident()}.tmp'
+        try:
+            with open(fout_tmp, 'w', encoding='utf-8') as prt:
+                self.api.prt_dct(dct, prt)
+            replace(fout_tmp, fout_py)
+        except BaseException:
+            if exists(fout_tmp):
+                remove(fout_tmp)
+            raise
+        # Setting prt to sys.stdout -> WROTE: ./icite/p10802651.py
+        if log:
+            log.write(f'  WROTE: {fout_py}\n')
 
     def _load_icites(self, pmids, pmid2py):
         """Load a list of NIH citation data for PMIDs"""
+        if self.num_procs > 1 and len(pmids) >= self.min_pmids_procs:
+            return self._load_icites_procs(pmids, pmid2py)
         nihentries_loaded = []
         s_load_icite = self.loader.load_icite
         num_exist = len(pmids)
         for idx, pmid in enumerate(pmids, 1):
-            nihentries_loaded.append(s_load_icite(pmid2py[pmid]))
+            if (nihentry := s_load_icite(pmid2py[pmid])) is not None:
+                nihentries_loaded.append(nihentry)
             if idx%1000 == 0:
                 print(f'NIH citation data loaded: {idx:,} of {num_exist:,}')
         ## nihentries_all.extend([s_load_icite(pmid2py[p]) for p in pmids_pyexist1])
         return nihentries_loaded
 
+    def _load_icites_procs(self, pmids, pmid2py):
+        """Load a list of NIH citation data for PMIDs, splitting the files across processes"""
+        files = [pmid2py[p] for p in pmids]
+        num_files = len(files)
+        # Several chunks per process so that processes which finish early take more work
+        num_chunk = -(-num_files//(self.num_procs*4))
+        nihentries_loaded = []
+        s_get_group = self.nihgrouper.get_group
+        with ProcessPoolExecutor(max_workers=self.num_procs) as executor:
+            chunks = (files[i:i+num_chunk] for i in range(0, num_files, num_chunk))
+            # Workers return the plain dicts, which are smaller to send back than NIHiCiteEntry
+            for nihdicts, files_corrupt in executor.map(NIHiCiteLoader.load_nihdicts, chunks):
+                # pylint: disable=line-too-long
+                nihentries_loaded.extend(self.entry_cls.from_jsondct(d, s_get_group(d.get('nih_percentile'))) for d in nihdicts)
+                for file_pmid, err in files_corrupt:
+                    self.pylayout.quarantine(file_pmid, err)
+                print(f'NIH citation data loaded: {len(nihentries_loaded):,} of {num_files:,}')
+        return nihentries_loaded
+
 
 # Copyright (C) 2019-present DV Klopfenstein, PhD. All rights reserved.
@@ -13,27 +13,133 @@ from collections import OrderedDict
 from pmidcite.cli.utils import read_top_pmids
 from pmidcite.icite.entry import NIHiCiteEntry
 from pmidcite.icite.api import NIHiCiteAPI
+from pmidcite.icite.coalescer import NIHiCiteCoalescer
 from pmidcite.icite.nih_grouper import NihGrouper
 from pmidcite.icite.paper import NIHiCitePaper
 
 
+# pylint: disable=too-many-instance-attributes
 class NIHiCiteDownloaderBase:
     """Given a PubMed ID (PMID), download a list of publications which cite and reference it"""
 
-    def __init__(self, details_cites_refs=None, nih_grouper=None):
-        self.api = NIHiCiteAPI()
+    # pylint: disable=too-many-arguments
+    def __init__(self, details_cites_refs=None, nih_grouper=None, api=None, coalescer=None, lru=None,
+                 refresh=None, entry_cls=None):
+        # Downloads go through the coalescer, so PMIDs already in flight are not requested again.
+        # Downloaders sharing a coalescer also share its API.
+        if coalescer is not None:
+            if api is not None and api is not coalescer.api:
+                raise RuntimeError('**FATAL: DOWNLOADERS SHARING A COALESCER USE ITS API: '
+                                   'PASS EITHER api OR coalescer')
+            api = coalescer.api
+        # The downloader owns the API and its pool of keep-alive HTTP connections
+        self.api = api if api is not None else NIHiCiteAPI()
+        self.coalescer = coalescer if coalescer is not None else NIHiCiteCoalescer(self.api)
         # Default:set()  Options:{'cited_by_clin', 'cited_by', 'references'}
         self.details_cites_refs = self._init_details_cites_refs(details_cites_refs)
+        # If only some fields are requested from NIH (fl), include the citations/references needed
+        self.api.add_fields(sorted(self.details_cites_refs))
         self.nihgrouper = nih_grouper if nih_grouper is not None else NihGrouper()
+        # Class of the entries built from NIH iCite dicts, e.g., NIHiCiteEntryCompact
+        self.entry_cls = entry_cls if entry_cls is not None else NIHiCiteEntry
+        # Optional NIHiCiteLru: recently used entries are returned without loading or downloading
+        self.lru = lru
+        # Optional NIHiCiteRefresh: cached entries which are old or modified at NIH are downloaded
+        self.refresh = refresh
+        # Downloaders w/a cache set this: True downloads all PMIDs, rather than loading cached PMIDs
+        self.dnld_force = False
+
+    def _use_done(self):
+        """Return True if the coalescer may return recent downloads: not forced and not refreshing"""
+        return not self.dnld_force and self.refresh is None
+
+    def close(self):
+        """Release the HTTP connections held by the NIH iCite API"""
+        self.api.close()
+        if self.refresh is not None:
+            self.refresh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
 
     def get_icites(self, pmids):
+        """Load or download NIH iCite data for requested PMIDs"""
+        if self.lru is None:
+            return self._get_icites(pmids)
+        if self.dnld_force:
+            # Downloaded entries replace any older entries in memory
+            nihentries = self._get_icites(pmids)
+            self.lru.add_entries(nihentries)
+            return nihentries
+        pmids = list(pmids)
+        pmid2nihentry = self.lru.get_pmid2entry(pmids)
+        if self.refresh is not None and pmid2nihentry:
+            for pmid in self._get_pmids_stale(pmid2nihentry.values()):
+                del pmid2nihentry[pmid]
+        pmids_missing = [p for p in dict.fromkeys(pmids) if p not in pmid2nihentry]
+        if pmids_missing:
+            nihentries = self._get_icites(pmids_missing)
+            self.lru.add_entries(nihentries)
+            pmid2nihentry.update((o.pmid, o) for o in nihentries)
+        return [pmid2nihentry[pmid] for pmid in pmids if pmid in pmid2nihentry]
+
+    def get_icite(self, pmid):
+        """Load or download NIH iCite data for requested PMID"""
+        if self.lru is None:
+            return self._get_icite(pmid)
+        if not self.dnld_force and (nihentry := self.lru.get(pmid)) is not None:
+            if self.refresh is None or not self._get_pmids_stale([nihentry]):
+                return nihentry
+        if (nihentry := self._get_icite(pmid)) is not None:
+            self.lru.add_entries([nihentry])
+        return nihentry
+
+    def _get_pmids_stale(self, nihentries):
+        """Get PMIDs of entries in memory which the refresh policy says to download again"""
+        s_refresh = self.refresh
+        pmids_stale = set()
+        if s_refresh.max_secs is not None:
+            pmids_stale = s_refresh.get_pmids_old(self._get_pmid2downloaded([o.pmid for o in nihentries]))
+        if s_refresh.check_modified:
+            _, pmids_modified = s_refresh.get_nihentries_fresh(
+                [o for o in nihentries if o.pmid not in pmids_stale])
+            pmids_stale.update(pmids_modified)
+        return pmids_stale
+
+    def _get_pmid2downloaded(self, pmids):
+        """Get the times cached PMIDs were downloaded; derived classes with a cache check it"""
+        # pylint: disable=unused-argument
+        return {}
+
+    def prefetch(self, pmids_top, prt=stdout):
+        """Cache NIH iCite data for PMIDs, their citations, and their references; no papers are made"""
+        nihentries_top = self.get_icites(pmids_top)
+        pmids_top = set(o.pmid for o in nihentries_top)
+        s_keys = self.details_cites_refs if self.details_cites_refs else NIHiCiteEntry.associated_pmid_keys
+        pmids_assc = set().union(*(o.get_assc_pmids(s_keys) for o in nihentries_top)).difference(pmids_top)
+        # Cached entries are not loaded, unless they may need to be refreshed
+        pmids_fetch = self._get_pmids_missing(pmids_assc) if self.refresh is None else pmids_assc
+        num_fetched = len(self.get_icites(sorted(pmids_fetch))) if pmids_fetch else 0
+        if prt:
+            prt.write(f'{len(pmids_top):,} top PMIDs and {len(pmids_assc):,} citations and references '
+                      f'cached; {num_fetched:,} of {len(pmids_fetch):,} uncached entries fetched\n')
+        return pmids_top.union(pmids_assc)
+
+    def _get_pmids_missing(self, pmids_all):
+        """Get PMIDs that have not yet been downloaded; derived classes with a cache check it"""
+        return set(pmids_all)
+
+    def _get_icites(self, pmids):
         """Citation data should be downloaded or loaded by derived classes"""
-        raise RuntimeError("**FATAL NIHiCiteDownloaderBase:get_icites(pmids)")
+        raise RuntimeError("**FATAL NIHiCiteDownloaderBase:_get_icites(pmids)")
         ## return []
 
-    def get_icite(self, pmid):
+    def _get_icite(self, pmid):
         """Citation data should be downloaded or loaded by derived classes"""
-        raise RuntimeError("**FATAL NIHiCiteDownloaderBase:get_icite(pmid)")
+        raise RuntimeError("**FATAL NIHiCiteDownloaderBase:_get_icite(pmid)")
         ## return False
 
     def prt_api_msgs(self):
@@ -47,20 +153,20 @@ class NIHiCiteDownloaderBase:
         """Print one detailed line summarizing the paper"""
         prt.write(f'TOP {paper.str_line()}\n')
 
-    def prt_papers(self, pmid2icitepaper, prt=stdout):
+    def prt_papers(self, pmid2icitepaper, prt=stdout, top_n=None):
         """Print papers, including citation counts, cite_by and references list"""
         for pmid, paper in pmid2icitepaper.items():
             if paper is not None:
-                self.prt_paper(paper, pmid, pmid, prt)
+                self.prt_paper(paper, pmid, pmid, prt, top_n)
             else:
                 print(f'**WARNING: NO iCite ENTRY FOUND FOR: {pmid}')
 
-    def prt_paper(self, paper, pmid, name, prt=stdout):
-        """Print one paper, including citation counts, cite_by and references list"""
+    def prt_paper(self, paper, pmid, name, prt=stdout, top_n=None):
+        """Print one paper, including citation counts; only the top_n citations and references, if given"""
         if paper is not None:
             if self.details_cites_refs:
                 ## print('DVK self.details_cites_refs ------------------------')
-                paper.prt_summary(prt, sortby_cites='nih_group', sortby_refs='nih_group')
+                paper.prt_summary(prt, sortby_cites='nih_group', sortby_refs='nih_group', top_n=top_n)
                 prt.write('\n')
             else:
                 ## print('DVK prt_top ----------------------------------------')
@@ -195,7 +301,7 @@ class NIHiCiteDownloaderBase:
         return set(details_cites_refs).intersection(NIHiCiteEntry.associated_pmid_keys)
 
     # pylint: disable=too-many-arguments
-    def wr_papers(self, fout_txt, pmid2icitepaper, force_overwrite=False, mode='w', query=None):
+    def wr_papers(self, fout_txt, pmid2icitepaper, force_overwrite=False, mode='w', query=None, top_n=None):
         """Run iCite for user-provided PMIDs and write to a file"""
         if not pmid2icitepaper:
             return
@@ -209,7 +315,7 @@ class NIHiCiteDownloaderBase:
                 with open(fout_txt, mode, encoding='utf-8') as prt:
                     if query is not None:
                         prt.write(f'QUERY: {query}\n')
-                    self.prt_papers(pmid2icitepaper, prt)
+                    self.prt_papers(pmid2icitepaper, prt, top_n)
                 if mode == 'w':
                     print(f'  WROTE: {fout_txt}')
                 else:  # mode  == 'a'
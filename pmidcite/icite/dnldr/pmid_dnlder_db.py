@@ -0,0 +1,98 @@
+"""Download NIH iCite data for PMIDs, storing it in one SQLite database for later use"""
+# https://icite.od.nih.gov/api
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from os.path import exists
+
+from pmidcite.icite.dnldr.pmid_dnlder_base import NIHiCiteDownloaderBase
+from pmidcite.icite.dnldr.pmid_db import NIHiCiteDb
+from pmidcite.icite.dnldr.pmid_evict import NIHiCiteCacheSize
+
+
+class NIHiCiteDownloaderDb(NIHiCiteDownloaderBase):
+    """Download NIH iCite data for PMIDs, storing it in one SQLite database for later use"""
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, dir_download, force_download, details_cites_refs=None, nih_grouper=None,
+                 api=None, coalescer=None, lru=None, refresh=None, evictor=None, entry_cls=None):
+        NIHiCiteDownloaderBase.__init__(
+            self, details_cites_refs, nih_grouper, api, coalescer, lru, refresh, entry_cls)
+        if not exists(dir_download):
+            raise RuntimeError(f'**FATAL: NO DIRECTORY: {dir_download}')
+        self.dnld_force = force_download
+        self.dir_dnld = dir_download  # Recommended dir_icite_py: ./icite
+        self.nihdb = NIHiCiteDb(NIHiCiteDb.get_filename(dir_download))
+        # NIHiCiteEvictor: remove entries over the cache size limits after bulk writes
+        self.cachesize = NIHiCiteCacheSize(evictor, self.nihdb) if evictor is not None else None
+
+    def close(self):
+        """Release the HTTP connections and the connection to the SQLite database"""
+        NIHiCiteDownloaderBase.close(self)
+        # Remove entries older than the evictor's max_days once, rather than after each write
+        if self.cachesize is not None and self.cachesize.evictor.max_secs is not None:
+            self.cachesize.evict()
+        self.nihdb.close()
+
+    def _get_icites(self, pmids):
+        """Load or download NIH iCite data for requested PMIDs"""
+        pmids = list(pmids)
+        if self.dnld_force:
+            nihentries_all = self._dnld_icites(pmids)
+        else:
+            # Load all stored PMIDs with one SELECT per 900 PMIDs; Download the rest
+            pmids_load = pmids
+            s_refresh = self.refresh
+            if s_refresh is not None and s_refresh.max_secs is not None:
+                # Entries downloaded more than max_days ago are downloaded again
+                pmids_old = s_refresh.get_pmids_old(self.nihdb.get_pmid2downloaded(pmids))
+                pmids_load = [p for p in pmids if p not in pmids_old]
+            nihentries_all = self._get_nihentries(self.nihdb.load_nihdicts(pmids_load))
+            if s_refresh is not None:
+                nihentries_all, _ = s_refresh.get_nihentries_fresh(nihentries_all)
+            pmids_missing = set(pmids).difference(o.pmid for o in nihentries_all)
+            if pmids_missing:
+                nihentries_all.extend(self._dnld_icites([p for p in pmids if p in pmids_missing]))
+        # Return results sorted in the same order as input PMIDs
+        pmid2nihentry = {o.pmid:o for o in nihentries_all}
+        return [pmid2nihentry[pmid] for pmid in pmids if pmid in pmid2nihentry]
+
+    def _get_icite(self, pmid):
+        """Load or download NIH iCite data for requested PMID"""
+        nihentries = self._get_icites([pmid])
+        return nihentries[0] if nihentries else None
+
+    def _get_pmids_missing(self, pmids_all):
+        """Get PMIDs that have not yet been downloaded"""
+        pmids_all = set(pmids_all)
+        if self.dnld_force:
+            return pmids_all
+        return pmids_all.difference(self.nihdb.get_pmids_cached(pmids_all))
+
+    def _get_pmid2downloaded(self, pmids):
+        """Get the times cached PMIDs were downloaded"""
+        return self.nihdb.get_pmid2downloaded(pmids)
+
+    def _dnld_icites(self, pmids):
+        """Download a list of NIH citation data for PMIDs and store it in the database"""
+        nihdicts = self.coalescer.dnld_nihdicts(pmids, self._use_done())
+        if nihdicts:
+            # Partial entries downloaded using fl are not cached; the cache holds all fields
+            if self.api.get_fields() is None:
+                if self.cachesize is None:
+                    self.nihdb.wr_nihdicts(nihdicts)
+                else:
+                    self.cachesize.wr_pmids([d['pmid'] for d in nihdicts],
+                                            lambda: self.nihdb.wr_nihdicts(nihdicts))
+            return self._get_nihentries(nihdicts)
+        return []
+
+    def _get_nihentries(self, nihdicts):
+        """Create NIHiCiteEntry objects from NIH iCite dicts"""
+        s_get_group = self.nihgrouper.get_group
+        # pylint: disable=line-too-long
+        return [self.entry_cls.from_jsondct(d, s_get_group(d.get('nih_percentile'))) for d in nihdicts]
+
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
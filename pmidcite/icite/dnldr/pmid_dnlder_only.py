@@ -5,7 +5,6 @@ __copyright__ = "Copyright (C) 2019-present, DV Klopfenstein, PhD. All rights re
 __author__ = "DV Klopfenstein, PhD"
 
 from pmidcite.icite.dnldr.pmid_dnlder_base import NIHiCiteDownloaderBase
-from pmidcite.icite.entry import NIHiCiteEntry
 
 
 class NIHiCiteDownloaderOnly(NIHiCiteDownloaderBase):
@@ -14,28 +13,28 @@ class NIHiCiteDownloaderOnly(NIHiCiteDownloaderBase):
     ##def __init__(self, details_cites_refs=None, nih_grouper=None):
     ##    super(NIHiCiteDownloaderOnly, self).__init__(details_cites_refs, nih_grouper)
 
-    def get_icites(self, pmids):
+    def _get_icites(self, pmids):
         """Download NIH iCite data for requested PMIDs"""
         pmid2nihentry = {o.pmid: o for o in self._dnld_icites(pmids)}
         return [pmid2nihentry[pmid] for pmid in pmids if pmid in pmid2nihentry]
 
     def _dnld_icites(self, pmids):
         """Download a list of NIH citation data for PMIDs"""
-        nihdicts = self.api.dnld_nihdicts(pmids)
+        nihdicts = self.coalescer.dnld_nihdicts(pmids, self._use_done())
         if nihdicts:
             s_get_group = self.nihgrouper.get_group
             # pylint: disable=line-too-long
-            return [NIHiCiteEntry.from_jsondct(d, s_get_group(d['nih_percentile'])) for d in nihdicts]
+            return [self.entry_cls.from_jsondct(d, s_get_group(d.get('nih_percentile'))) for d in nihdicts]
         return []
 
-    def get_icite(self, pmid):
+    def _get_icite(self, pmid):
         """Load or download NIH iCite data for requested PMID"""
         ##print(f'DOWNLOADER-ONLY: {pmid}')
-        nih_dict = self.api.dnld_nihdict(pmid)
+        nih_dict = self.coalescer.dnld_nihdict(pmid, self._use_done())
         if nih_dict:
-            return NIHiCiteEntry.from_jsondct(
+            return self.entry_cls.from_jsondct(
                 nih_dict,
-                self.nihgrouper.get_group(nih_dict['nih_percentile']))
+                self.nihgrouper.get_group(nih_dict.get('nih_percentile')))
         return None
 
 
@@ -0,0 +1,99 @@
+"""Choose cached NIH iCite entries to evict by age, total size, or number of entries"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from time import time
+from collections import namedtuple
+
+
+class NIHiCiteEvictor:
+    """Choose cached NIH iCite entries to evict by age, total size, or number of entries"""
+
+    # One cached entry: size in bytes, time written, and time last read (seconds since the epoch)
+    ntstat = namedtuple('NtStat', 'nbytes mtime atime')
+
+    # Many cached entries: number of entries and their total size in bytes
+    ntsize = namedtuple('NtSize', 'num_entries nbytes')
+
+    # lru: evict the entries read least recently; oldest: evict the entries written first
+    policies = ('lru', 'oldest')
+
+    def __init__(self, max_days=None, max_bytes=None, max_entries=None, policy='lru'):
+        if policy not in self.policies:
+            raise RuntimeError(f'**FATAL: UNKNOWN EVICTION POLICY({policy}): EXPECTED lru or oldest')
+        self.max_secs = max_days*86400.0 if max_days is not None else None
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.policy = policy
+
+    def is_bounded(self):
+        """Return True if any limit is set"""
+        return self.max_secs is not None or self.max_bytes is not None or self.max_entries is not None
+
+    def get_pmids_evict(self, pmid2stat):
+        """Get the PMIDs (or other keys) to evict so the remaining entries are within the limits"""
+        pmids_evict = set()
+        if self.max_secs is not None:
+            secs_min = time() - self.max_secs
+            pmids_evict = set(p for p, nt in pmid2stat.items() if nt.mtime < secs_min)
+        num_entries = len(pmid2stat) - len(pmids_evict)
+        nbytes = sum(nt.nbytes for p, nt in pmid2stat.items() if p not in pmids_evict)
+        if not self.is_over(num_entries, nbytes):
+            return pmids_evict
+        idx = 2 if self.policy == 'lru' else 1
+        pmid_stat = sorted((t for t in pmid2stat.items() if t[0] not in pmids_evict),
+                           key=lambda t: t[1][idx])
+        for pmid, ntstat in pmid_stat:
+            pmids_evict.add(pmid)
+            num_entries -= 1
+            nbytes -= ntstat.nbytes
+            if not self.is_over(num_entries, nbytes):
+                break
+        return pmids_evict
+
+    def is_over(self, num_entries, nbytes):
+        """Return True if the entries exceed the count or size limit"""
+        return (self.max_entries is not None and num_entries > self.max_entries) or \
+               (self.max_bytes is not None and nbytes > self.max_bytes)
+
+
+class NIHiCiteCacheSize:
+    """Running totals of the entries and bytes in one cache, so limits are checked w/o reading it all"""
+
+    def __init__(self, evictor, store):
+        self.evictor = evictor
+        # NIHiCitePyLayout or NIHiCiteDb: get_ntsize, get_pmid2stat, and rm_pmids
+        self.store = store
+        # Counted once at the first bulk write, then updated by each bulk write.
+        # Writes from other processes are not counted until the next eviction recounts the cache
+        self.num_entries = None
+        self.nbytes = None
+
+    def wr_pmids(self, pmids, fnc_wr):
+        """Run one bulk write of PMIDs, updating the totals; evict only if over the limits"""
+        s_store = self.store
+        if self.num_entries is None:
+            fnc_wr()
+            self.num_entries, self.nbytes = s_store.get_ntsize()
+        else:
+            # Entries which are replaced are subtracted from the totals
+            ntsize_old = s_store.get_ntsize(pmids)
+            fnc_wr()
+            ntsize_new = s_store.get_ntsize(pmids)
+            self.num_entries += ntsize_new.num_entries - ntsize_old.num_entries
+            self.nbytes += ntsize_new.nbytes - ntsize_old.nbytes
+        if self.evictor.is_over(self.num_entries, self.nbytes):
+            self.evict()
+
+    def evict(self):
+        """Remove the entries over the limits, then recount the totals from the entries kept"""
+        pmid2stat = self.store.get_pmid2stat()
+        pmids_evict = self.evictor.get_pmids_evict(pmid2stat)
+        num_rm = self.store.rm_pmids(pmids_evict)
+        self.num_entries = len(pmid2stat) - len(pmids_evict)
+        self.nbytes = sum(nt.nbytes for p, nt in pmid2stat.items() if p not in pmids_evict)
+        return num_rm
+
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
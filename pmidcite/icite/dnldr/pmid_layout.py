@@ -0,0 +1,243 @@
+"""Locations of the p{PMID}.py files in dir_icite_py: one flat directory or sharded subdirectories"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from sys import stdout
+from time import time
+from collections import defaultdict
+from os import listdir
+from os import stat
+from os import scandir
+from os import makedirs
+from os import replace
+from os import rmdir
+from os import remove
+from os.path import join
+from os.path import exists
+from os.path import getsize
+from os.path import dirname
+from os.path import basename
+
+from pmidcite.icite.dnldr.pmid_lock import NIHiCiteLock
+from pmidcite.icite.dnldr.pmid_evict import NIHiCiteEvictor
+
+
+class NIHiCitePyLayout:
+    """Locations of the p{PMID}.py files in dir_icite_py: one flat directory or sharded subdirectories"""
+
+    layouts = ('flat', 'sharded')
+
+    # Marks dir_icite_py as sharded: e.g., ./icite/33/03/p33031632.py
+    file_sharded = 'LAYOUT_SHARDED'
+
+    # Corrupt p{PMID}.py files are moved here, so they are downloaded again
+    dir_quarantine = 'quarantine'
+
+    # Checking this many PMIDs or more may list directories, rather than checking each file exists
+    min_pmids_listdir = 64
+
+    # Listing a directory costs about half as much per file as checking one file exists:
+    # A directory is listed if it holds at most this many files for each PMID checked in it
+    max_files_per_pmid = 2
+
+    # Approximate bytes per file in a directory's size; estimates the files in an unlisted directory
+    nbytes_direntry = 32
+
+    def __init__(self, dir_icite_py, layout='auto'):
+        self.dir_icite_py = dir_icite_py
+        self.layout = self._init_layout(layout)
+        self.sharded = self.layout == 'sharded'
+        # Number of p{PMID}.py files found the last time each directory was listed
+        self.dir2num = {}
+
+    def get_file_pmid(self, pmid):
+        """Get the name of the p{PMID}.py file for one PMID"""
+        if self.sharded:
+            pmid_str = f'{pmid:0>4}'
+            return join(self.dir_icite_py, pmid_str[:2], pmid_str[2:4], f'p{pmid}.py')
+        return join(self.dir_icite_py, f'p{pmid}.py')
+
+    def mk_dir_pmid(self, file_pmid):
+        """Create the subdirectory for a p{PMID}.py file, if needed"""
+        if self.sharded:
+            makedirs(dirname(file_pmid), exist_ok=True)
+
+    def quarantine(self, file_pmid, err, prt=stdout):
+        """Move a corrupt p{PMID}.py file out of the cache, keeping it for inspection"""
+        dir_quarantine = join(self.dir_icite_py, self.dir_quarantine)
+        makedirs(dir_quarantine, exist_ok=True)
+        file_quarantine = join(dir_quarantine, f'{basename(file_pmid)}.{int(time())}')
+        try:
+            replace(file_pmid, file_quarantine)
+        except FileNotFoundError:
+            # Another process quarantined or replaced the file
+            return None
+        prt.write(f'**WARNING: CORRUPT iCite FILE({file_pmid}) MOVED TO {file_quarantine}: {err}\n')
+        return file_quarantine
+
+    def get_pmids_cached(self, pmids):
+        """Get the set of PMIDs which have p{PMID}.py files"""
+        if len(pmids) < self.min_pmids_listdir:
+            return self._get_pmids_exist(pmids)
+        if not self.sharded:
+            dir2pmids = {self.dir_icite_py: pmids}
+        else:
+            dir2pmids = defaultdict(list)
+            s_get_file_pmid = self.get_file_pmid
+            for pmid in pmids:
+                dir2pmids[dirname(s_get_file_pmid(pmid))].append(pmid)
+        pmids_cached = set()
+        for dir_files, pmids_dir in dir2pmids.items():
+            # List a directory which is not much larger than the request; else check each file
+            if len(pmids_dir)*self.max_files_per_pmid >= self._get_num_files(dir_files):
+                pmids_cached.update(self._get_pmids_dir(dir_files).intersection(pmids_dir))
+            else:
+                pmids_cached.update(self._get_pmids_exist(pmids_dir))
+        return pmids_cached
+
+    def _get_pmids_exist(self, pmids):
+        """Get the set of PMIDs which have p{PMID}.py files, checking each file exists"""
+        s_get_file_pmid = self.get_file_pmid
+        return set(pmid for pmid in pmids if exists(s_get_file_pmid(pmid)))
+
+    def _get_num_files(self, dir_files):
+        """Estimate the number of files in a directory w/o listing it"""
+        try:
+            num_files = stat(dir_files).st_size//self.nbytes_direntry
+        except FileNotFoundError:
+            return 0
+        # Some file systems do not grow the size of a directory w/its files
+        return max(num_files, self.dir2num.get(dir_files, 0))
+
+    def get_pmid2file(self):
+        """Get all PMIDs which have p{PMID}.py files in dir_icite_py, listing each directory once"""
+        if not self.sharded:
+            return self._get_pmid2file_dir(self.dir_icite_py)
+        pmid2file = {}
+        for dir_shard in self._get_dirs_shard(self.dir_icite_py):
+            for dir_sub in self._get_dirs_shard(dir_shard):
+                pmid2file.update(self._get_pmid2file_dir(dir_sub))
+        return pmid2file
+
+    def get_pmid2stat(self):
+        """Get the size, modification time, and access time of all p{PMID}.py files"""
+        if not self.sharded:
+            return self._get_pmid2stat_dir(self.dir_icite_py)
+        pmid2stat = {}
+        for dir_shard in self._get_dirs_shard(self.dir_icite_py):
+            for dir_sub in self._get_dirs_shard(dir_shard):
+                pmid2stat.update(self._get_pmid2stat_dir(dir_sub))
+        return pmid2stat
+
+    def rm_pmids(self, pmids):
+        """Remove the p{PMID}.py files for PMIDs; Return the number of files removed"""
+        num_rm = 0
+        s_get_file_pmid = self.get_file_pmid
+        for pmid in pmids:
+            try:
+                remove(s_get_file_pmid(pmid))
+                num_rm += 1
+            except FileNotFoundError:
+                pass
+        return num_rm
+
+    def get_ntsize(self, pmids=None):
+        """Get the number and total size of the p{PMID}.py files for PMIDs, or of all files"""
+        if pmids is None:
+            pmid2stat = self.get_pmid2stat()
+            return NIHiCiteEvictor.ntsize(len(pmid2stat), sum(nt.nbytes for nt in pmid2stat.values()))
+        num_entries = 0
+        nbytes = 0
+        s_get_file_pmid = self.get_file_pmid
+        for pmid in pmids:
+            try:
+                nbytes += getsize(s_get_file_pmid(pmid))
+                num_entries += 1
+            except FileNotFoundError:
+                pass
+        return NIHiCiteEvictor.ntsize(num_entries, nbytes)
+
+    def migrate(self, layout, prt=stdout):
+        """Move all p{PMID}.py files into the requested layout"""
+        if layout == self.layout:
+            prt.write(f'  {self.dir_icite_py} IS ALREADY {layout}\n')
+            return 0
+        dst = NIHiCitePyLayout(self.dir_icite_py, layout)
+        # Downloaders in other processes do not write while the files are moved
+        with NIHiCiteLock(self.dir_icite_py):
+            pmid2file = self.get_pmid2file()
+            for pmid, file_src in pmid2file.items():
+                file_dst = dst.get_file_pmid(pmid)
+                dst.mk_dir_pmid(file_dst)
+                replace(file_src, file_dst)
+        # Mark the layout after all files are moved; an interrupted migration can be rerun
+        file_sharded = join(self.dir_icite_py, self.file_sharded)
+        if dst.sharded:
+            with open(file_sharded, 'w', encoding='utf-8') as prt_sharded:
+                prt_sharded.write('p{PMID}.py files are in subdirectories: ./33/03/p33031632.py\n')
+        else:
+            if exists(file_sharded):
+                remove(file_sharded)
+            self.rm_dirs_shard()
+        self.layout = layout
+        self.sharded = dst.sharded
+        prt.write(f'{len(pmid2file):,} p{{PMID}}.py files moved to {layout} layout: {self.dir_icite_py}\n')
+        return len(pmid2file)
+
+    def rm_dirs_shard(self):
+        """Remove empty shard subdirectories"""
+        for dir_shard in self._get_dirs_shard(self.dir_icite_py):
+            for dir_sub in self._get_dirs_shard(dir_shard):
+                if not listdir(dir_sub):
+                    rmdir(dir_sub)
+            if not listdir(dir_shard):
+                rmdir(dir_shard)
+
+    @staticmethod
+    def _get_pmid2file_dir(dir_files):
+        """Get the PMIDs and names of the p{PMID}.py files in one directory"""
+        return {int(f[1:-3]):join(dir_files, f) for f in listdir(dir_files)
+                if f[:1] == 'p' and f[-3:] == '.py' and f[1:-3].isdigit()}
+
+    @staticmethod
+    def _get_pmid2stat_dir(dir_files):
+        """Get the size, modification time, and access time of the p{PMID}.py files in one directory"""
+        pmid2stat = {}
+        s_ntstat = NIHiCiteEvictor.ntstat
+        with scandir(dir_files) as entries:
+            for entry in entries:
+                name = entry.name
+                if name[:1] == 'p' and name[-3:] == '.py' and name[1:-3].isdigit():
+                    try:
+                        stat_file = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    pmid2stat[int(name[1:-3])] = s_ntstat(stat_file.st_size, stat_file.st_mtime, stat_file.st_atime)
+        return pmid2stat
+
+    def _get_pmids_dir(self, dir_files):
+        """Get the PMIDs of the p{PMID}.py files in one directory"""
+        try:
+            pmids = set(int(f[1:-3]) for f in listdir(dir_files)
+                        if f[:1] == 'p' and f[-3:] == '.py' and f[1:-3].isdigit())
+        except FileNotFoundError:
+            return set()
+        self.dir2num[dir_files] = len(pmids)
+        return pmids
+
+    @staticmethod
+    def _get_dirs_shard(dir_parent):
+        """Get the two-digit shard subdirectories in a directory"""
+        return [join(dir_parent, d) for d in listdir(dir_parent) if len(d) == 2 and d.isdigit()]
+
+    def _init_layout(self, layout):
+        """Get the layout; auto is sharded if dir_icite_py is marked as sharded"""
+        if layout is None or layout == 'auto':
+            return 'sharded' if exists(join(self.dir_icite_py, self.file_sharded)) else 'flat'
+        if layout not in self.layouts:
+            raise RuntimeError(f'**FATAL: UNKNOWN py_layout({layout}): EXPECTED auto, flat, or sharded')
+        return layout
+
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
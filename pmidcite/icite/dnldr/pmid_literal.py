@@ -0,0 +1,82 @@
+"""Read the ICITE dict in a p{PMID}.py file without importing or executing the file"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from ast import literal_eval
+
+
+class NIHiCiteLiteral:
+    """Read the ICITE dict in a p{PMID}.py file without importing or executing the file"""
+
+    # First line of the dict written by NIHiCiteAPI.prt_dct
+    head = 'ICITE = {\n'
+    consts = {'None': None, 'True': True, 'False': False}
+
+    @classmethod
+    def load_nihdict(cls, file_pmid):
+        """Load the NIH iCite dict stored in a p{PMID}.py file"""
+        with open(file_pmid, encoding='utf-8') as ifstrm:
+            return cls.get_nihdict(ifstrm.read())
+
+    @classmethod
+    def get_nihdict(cls, text):
+        """Get the NIH iCite dict from the text of a p{PMID}.py file"""
+        if (idx_beg := text.find(cls.head)) == -1:
+            raise ValueError('NO "ICITE = {" FOUND')
+        nihdict = cls._get_nihdict_lines(text, idx_beg + len(cls.head))
+        if nihdict is not None and 'pmid' in nihdict:
+            return nihdict
+        # Values spanning lines or files not written by NIHiCiteAPI.prt_dct: parse the whole dict
+        nihdict = literal_eval(text[idx_beg + len(cls.head) - 2:])
+        if not isinstance(nihdict, dict) or 'pmid' not in nihdict:
+            raise ValueError('ICITE IS NOT A dict CONTAINING A pmid')
+        return nihdict
+
+    @classmethod
+    def _get_nihdict_lines(cls, text, idx_beg):
+        """Parse one "    'key': value," line per key; Return None if a line has another format"""
+        nihdict = {}
+        s_get_val = cls._get_val
+        for line in text[idx_beg:].split('\n'):
+            if line == '}':
+                return nihdict
+            if line[:5] != "    '" or line[-1:] != ',' or (idx_colon := line.find("': ", 5)) == -1:
+                return None
+            try:
+                nihdict[line[5:idx_colon]] = s_get_val(line[idx_colon+3:-1])
+            except (ValueError, SyntaxError):
+                return None
+        return None
+
+    @classmethod
+    def _get_val(cls, txt):
+        """Convert the text of one value to a Python value, trying the common cases first"""
+        if txt in cls.consts:
+            return cls.consts[txt]
+        chr0 = txt[:1]
+        # PMIDs: cited_by, cited_by_clin, references
+        if chr0 == '[':
+            if txt == '[]':
+                return []
+            if txt[1:2].isdigit():
+                try:
+                    return [int(pmid) for pmid in txt[1:-1].split(', ')]
+                except ValueError:
+                    pass
+        # Strings written in triple quotes: title, journal, doi, last_modified
+        elif chr0 == '"':
+            if len(txt) >= 6 and txt[:3] == '"""' and txt[-3:] == '"""':
+                val = txt[3:-3]
+                if '"' not in val and '\\' not in val:
+                    return val
+        elif chr0.isdigit() or chr0 == '-':
+            try:
+                return int(txt)
+            except ValueError:
+                return float(txt)
+        # Authors and any other value: parse the literal without executing code
+        return literal_eval(txt)
+
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
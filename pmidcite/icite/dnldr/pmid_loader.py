@@ -4,33 +4,39 @@ __copyright__ = "Copyright (C) 2019-present, DV Klopfenstein, PhD. All rights re
 __author__ = "DV Klopfenstein, PhD"
 
 from sys import stdout
-from os.path import join
 from os.path import exists
-from importlib.util import spec_from_file_location
-from importlib.util import module_from_spec
+from os.path import basename
 
 from pmidcite.icite.entry import NIHiCiteEntry
+from pmidcite.icite.dnldr.pmid_literal import NIHiCiteLiteral
+from pmidcite.icite.dnldr.pmid_layout import NIHiCitePyLayout
 
 
 class NIHiCiteLoader:
     """Load iCite citations that are stored as a dict in a Python module"""
 
-    def __init__(self, nih_grouper, dir_icitepy, assc_pmid_keysset, icitepypat='p{PMID}.py'):
+    # Raised reading a truncated or otherwise corrupt p{PMID}.py file
+    exceptions_corrupt = (ValueError, SyntaxError, TypeError, UnicodeDecodeError, RecursionError)
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, nih_grouper, dir_icitepy, assc_pmid_keysset, pylayout=None, entry_cls=None):
         self.nih_grouper = nih_grouper
         self.dir_dnld = dir_icitepy  # e.g., ./icite
         self.associated_pmid_keysset = assc_pmid_keysset
-        self.icitepypat = icitepypat
+        # p{PMID}.py files are in dir_icitepy or in its sharded subdirectories
+        self.pylayout = pylayout if pylayout is not None else NIHiCitePyLayout(dir_icitepy)
+        # Class of the entries loaded, e.g., NIHiCiteEntryCompact
+        self.entry_cls = entry_cls if entry_cls is not None else NIHiCiteEntry
 
     def load_icites(self, pmids, prt=stdout):
         """Load multiple NIH iCite data from Python modules"""
         if not pmids:
             return []
         icites = []
-        s_icitepat = self.icitepypat
+        s_get_file_pmid = self.pylayout.get_file_pmid
         s_load_icite = self.load_icite
         for pmid in pmids:
-            file_pmid = join(self.dir_dnld, s_icitepat.format(PMID=pmid))
-            iciteobj = s_load_icite(file_pmid)
+            iciteobj = s_load_icite(s_get_file_pmid(pmid))
             if iciteobj is not None:
                 icites.append(iciteobj)
         if prt:
@@ -45,7 +51,7 @@ class NIHiCiteLoader:
     def load_icite_mods_all(self, pmids_top):
         """Load NIHiCiteEntry for the citations and references of PMIDs in pmids_top"""
         icites_top = self.load_icites(pmids_top)                             # [NIHiCiteEntry]
-        pmids_top = set(o.dct['pmid'] for o in icites_top)
+        pmids_top = set(o.pmid for o in icites_top)
         pmids_linked = self._get_pmids_linked(icites_top)                    # [NIHiCiteEntry]
         icites_linked = self.load_icites(pmids_linked.difference(pmids_top)) # [NIHiCiteEntry]
         ## print('LLLLLLLLLL NIHiCiteLoader load_icite_mods_all icites_top', icites_top)
@@ -55,19 +61,57 @@ class NIHiCiteLoader:
 
     def get_file_pmid(self, pmid):
         """Get the name of the icite file for one PMID"""
-        return join(self.dir_dnld, self.icitepypat.format(PMID=pmid))
+        return self.pylayout.get_file_pmid(pmid)
 
     def load_icite(self, file_pmid):
         """Load NIH iCite information from Python modules"""
         if exists(file_pmid):
-            spec = spec_from_file_location("module.name", file_pmid)
-            mod = module_from_spec(spec)
-            spec.loader.exec_module(mod)
+            # Read the ICITE dict as literals; the file is not imported or executed
+            try:
+                nihdict = NIHiCiteLiteral.load_nihdict(file_pmid)
+            except FileNotFoundError:
+                return None
+            except self.exceptions_corrupt as err:
+                self.pylayout.quarantine(file_pmid, err)
+                return None
             ## print('LLLLLLLLLLLLL load_icite', file_pmid)
             # pylint: disable=line-too-long
-            return NIHiCiteEntry.from_jsondct(mod.ICITE, self.nih_grouper.get_group(mod.ICITE['nih_percentile']))
+            return self.entry_cls.from_jsondct(nihdict, self.nih_grouper.get_group(nihdict.get('nih_percentile')))
         return None
 
+    @classmethod
+    def load_nihdicts(cls, files_pmid):
+        """Load NIH iCite dicts from p{PMID}.py files; Run in worker processes by a process pool"""
+        nihdicts = []
+        files_corrupt = []
+        s_load_nihdict = NIHiCiteLiteral.load_nihdict
+        for file_pmid in files_pmid:
+            try:
+                nihdicts.append(s_load_nihdict(file_pmid))
+            except FileNotFoundError:
+                pass
+            except cls.exceptions_corrupt as err:
+                # The parent process quarantines the corrupt files
+                files_corrupt.append((file_pmid, str(err)))
+        return nihdicts, files_corrupt
+
+    @classmethod
+    def get_files_corrupt(cls, files_pmid):
+        """Get p{PMID}.py files which cannot be read; Run in worker processes by a process pool"""
+        files_corrupt = []
+        s_load_nihdict = NIHiCiteLiteral.load_nihdict
+        for file_pmid in files_pmid:
+            try:
+                pmid = s_load_nihdict(file_pmid)['pmid']
+            except FileNotFoundError:
+                continue
+            except cls.exceptions_corrupt as err:
+                files_corrupt.append((file_pmid, str(err)))
+                continue
+            if f'p{pmid}.py' != basename(file_pmid):
+                files_corrupt.append((file_pmid, f'CONTAINS PMID({pmid})'))
+        return files_corrupt
+
     def load_pmid(self, pmid):
         """Get NIHiCiteEntry for a PMID"""
         fin_py = self.get_file_pmid(pmid)
@@ -76,7 +120,7 @@ class NIHiCiteLoader:
     def _get_pmids_linked(self, icites_top):
         """Get the PMIDs for the citations and references of top NIHiCiteEntry"""
         s_asscpmid_keys = self.associated_pmid_keysset
-        return set(pmid for o in icites_top for f in s_asscpmid_keys for pmid in o.dct[f])
+        return set(pmid for o in icites_top for f in s_asscpmid_keys for pmid in o.get(f) or [])
         ## pmids_linked = set()
         ## for obj in icites_top:
         ##     for fld in self.associated_pmid_keysset:
@@ -0,0 +1,39 @@
+"""Cross-process lock on dir_icite_py, held while many cache files are written, moved, or removed"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from os.path import join
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: each cache file is still replaced atomically, but bulk writers are not serialized
+    fcntl = None
+
+
+class NIHiCiteLock:
+    """Cross-process lock on dir_icite_py, held while many cache files are written, moved, or removed"""
+
+    basename = '.lock'
+
+    def __init__(self, dir_icite_py):
+        self.file_lock = join(dir_icite_py, self.basename)
+        self.ostrm = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            # pylint: disable=consider-using-with
+            self.ostrm = open(self.file_lock, 'a', encoding='utf-8')
+            # Blocks until no other process or thread holds the lock
+            fcntl.flock(self.ostrm.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        if self.ostrm is not None:
+            fcntl.flock(self.ostrm.fileno(), fcntl.LOCK_UN)
+            self.ostrm.close()
+            self.ostrm = None
+
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
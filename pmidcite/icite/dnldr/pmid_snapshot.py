@@ -0,0 +1,135 @@
+"""Write NIH iCite data for many PMIDs into one binary, columnar snapshot which can be memory-mapped"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+import sys
+from sys import stdout
+from os import replace
+from json import dumps
+from array import array
+from struct import pack
+
+
+class NIHiCiteSnapshot:
+    """Write NIH iCite data for many PMIDs into one binary, columnar snapshot which can be memory-mapped"""
+
+    # File layout:
+    #   magic                     16 bytes
+    #   len(header)               uint64, little-endian
+    #   header                    JSON: byteorder, num_pmids, and the offset and typecode of each column
+    #   columns                   Each column starts on an 8-byte boundary, relative to the data start
+    magic = b'PMIDCITE-SNAP\x00\x00\x01'
+    align = 8
+
+    # Fixed-width scalar columns; None is stored as none_uint or NaN
+    ints = ('year', 'citation_count')
+    floats = (
+        'nih_percentile', 'relative_citation_ratio',
+        'human', 'animal', 'molecular_cellular', 'apt',
+        'citations_per_year', 'expected_citations_per_year', 'field_citation_rate',
+        'x_coord', 'y_coord')
+    # One byte per PMID: bit N is the value and bit N+4 is set if the value is not None
+    flags = ('is_research_article', 'is_clinical', 'provisional')
+    # CSR columns: PMIDs for paper idx are {key}[{key}_offsets[idx]:{key}_offsets[idx+1]]
+    pmidlists = ('cited_by', 'cited_by_clin', 'references')
+    # All other fields (title, authors, journal, doi, ...) are stored as UTF-8 JSON in CSR 'extra'
+    keys_cols = set(('pmid',) + ints + floats + flags + pmidlists)
+    none_uint = 0xFFFFFFFF
+
+    def __init__(self):
+        self.cols = self._init_cols()
+        self.pmid_prev = -1
+
+    def add_nihdicts(self, nihdicts):
+        """Add NIH iCite dicts, which must be ordered by ascending PMID"""
+        for nihdict in nihdicts:
+            self.add_nihdict(nihdict)
+
+    def add_nihdict(self, nihdict):
+        """Add the NIH iCite dict for one PMID; PMIDs must be added in ascending order"""
+        pmid = nihdict['pmid']
+        if pmid <= self.pmid_prev:
+            raise RuntimeError(f'**FATAL: PMIDS MUST BE ADDED IN ASCENDING ORDER: {self.pmid_prev} {pmid}')
+        self.pmid_prev = pmid
+        cols = self.cols
+        cols['pmid'].append(pmid)
+        none_uint = self.none_uint
+        for key in self.ints:
+            cols[key].append(none_uint if (val := nihdict.get(key)) is None else val)
+        nan = float('nan')
+        for key in self.floats:
+            cols[key].append(nan if (val := nihdict.get(key)) is None else val)
+        bits = 0
+        for bit, key in enumerate(self.flags):
+            if (val := nihdict.get(key)) is not None:
+                bits |= (1 << (bit + 4)) | (int(bool(val)) << bit)
+        cols['flags'].append(bits)
+        for key in self.pmidlists:
+            col = cols[key]
+            col.extend(nihdict.get(key) or [])
+            cols[f'{key}_offsets'].append(len(col))
+        extra = {k:v for k, v in nihdict.items() if k not in self.keys_cols}
+        cols['extra'].frombytes(dumps(extra).encode('utf-8'))
+        cols['extra_offsets'].append(len(cols['extra']))
+
+    def get_num_pmids(self):
+        """Get the number of PMIDs added to the snapshot"""
+        return len(self.cols['pmid'])
+
+    def wr_snapshot(self, fout, prt=stdout):
+        """Write the snapshot; the file is replaced only after it is completely written"""
+        header, data_beg = self._get_header()
+        fout_tmp = f'{fout}.tmp'
+        with open(fout_tmp, 'wb') as ostrm:
+            hdr_bytes = dumps(header).encode('utf-8')
+            ostrm.write(self.magic)
+            ostrm.write(pack('<Q', len(hdr_bytes)))
+            ostrm.write(hdr_bytes)
+            for name, col in self.cols.items():
+                ostrm.write(b'\x00'*(data_beg + header['columns'][name]['offset'] - ostrm.tell()))
+                col.tofile(ostrm)
+        replace(fout_tmp, fout)
+        if prt:
+            prt.write(f'{self.get_num_pmids():,} PMIDs WROTE: {fout}\n')
+
+    def _get_header(self):
+        """Get the snapshot header and the file position where the columns start"""
+        columns = {}
+        offset = 0
+        for name, col in self.cols.items():
+            offset = -(-offset//self.align)*self.align
+            nbytes = len(col)*col.itemsize
+            columns[name] = {'typecode': col.typecode, 'offset': offset, 'nbytes': nbytes}
+            offset += nbytes
+        header = {
+            'version': 1,
+            'byteorder': sys.byteorder,
+            'num_pmids': self.get_num_pmids(),
+            'ints': self.ints,
+            'floats': self.floats,
+            'flags': self.flags,
+            'pmidlists': self.pmidlists,
+            'columns': columns,
+        }
+        len_hdr = len(dumps(header).encode('utf-8'))
+        data_beg = -(-(len(self.magic) + 8 + len_hdr)//self.align)*self.align
+        return header, data_beg
+
+    def _init_cols(self):
+        """Create the empty columns"""
+        cols = {'pmid': array('I')}
+        for key in self.ints:
+            cols[key] = array('I')
+        for key in self.floats:
+            cols[key] = array('d')
+        cols['flags'] = array('B')
+        for key in self.pmidlists:
+            cols[f'{key}_offsets'] = array('Q', [0])
+            cols[key] = array('I')
+        cols['extra_offsets'] = array('Q', [0])
+        cols['extra'] = array('B')
+        return cols
+
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
@@ -0,0 +1,152 @@
+"""Load NIH iCite data lazily from a memory-mapped, columnar snapshot"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+import sys
+from sys import stdout
+from json import loads
+from mmap import mmap
+from mmap import ACCESS_READ
+from struct import unpack_from
+from bisect import bisect_left
+
+from pmidcite.icite.entry import NIHiCiteEntry
+from pmidcite.icite.dnldr.pmid_snapshot import NIHiCiteSnapshot
+
+
+# pylint: disable=too-many-instance-attributes
+class NIHiCiteSnapshotLoader:
+    """Load NIH iCite data lazily from a memory-mapped, columnar snapshot"""
+
+    def __init__(self, nih_grouper, file_snapshot, assc_pmid_keysset=None, entry_cls=None):
+        self.nih_grouper = nih_grouper
+        self.file_snapshot = file_snapshot
+        self.associated_pmid_keysset = assc_pmid_keysset if assc_pmid_keysset is not None else \
+            NIHiCiteEntry.associated_pmid_keys
+        with open(file_snapshot, 'rb') as ifstrm:
+            self.mmap = mmap(ifstrm.fileno(), 0, access=ACCESS_READ)
+        self.header = self._init_header()
+        # Columns are views on the mapped file; pages are read only when a value is used
+        self.cols = self._init_cols()
+        self.pmids = self.cols['pmid']
+        # Class of the entries loaded, e.g., NIHiCiteEntryCompact
+        self.entry_cls = entry_cls if entry_cls is not None else NIHiCiteEntry
+
+    def __len__(self):
+        return len(self.pmids)
+
+    def __contains__(self, pmid):
+        return self._get_idx(pmid) is not None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def load_icites(self, pmids, prt=stdout):
+        """Load NIHiCiteEntry for the PMIDs in the snapshot"""
+        if not pmids:
+            return []
+        s_load_pmid = self.load_pmid
+        icites = [o for o in (s_load_pmid(p) for p in pmids) if o is not None]
+        if prt:
+            num_icites = len(icites)
+            num_pmids = len(pmids)
+            if num_icites != num_pmids:
+                prt.write(f'{num_icites:5,} of {num_pmids:5,} PMIDs have iCite entries\n')
+        return icites
+
+    def load_icite_mods_all(self, pmids_top):
+        """Load NIHiCiteEntry for the citations and references of PMIDs in pmids_top"""
+        icites_top = self.load_icites(pmids_top)
+        pmids_top = set(o.pmid for o in icites_top)
+        s_asscpmid_keys = self.associated_pmid_keysset
+        pmids_linked = set(p for o in icites_top for f in s_asscpmid_keys for p in o.get(f) or [])
+        return icites_top + self.load_icites(pmids_linked.difference(pmids_top))
+
+    def load_pmid(self, pmid):
+        """Get NIHiCiteEntry for a PMID"""
+        if (nihdict := self.get_nihdict(pmid)) is not None:
+            # pylint: disable=line-too-long
+            return self.entry_cls.from_jsondct(nihdict, self.nih_grouper.get_group(nihdict.get('nih_percentile')))
+        return None
+
+    def get_pmids_cached(self, pmids):
+        """Get the set of PMIDs which are in the snapshot"""
+        s_get_idx = self._get_idx
+        return set(pmid for pmid in pmids if s_get_idx(pmid) is not None)
+
+    def get_pmids(self, pmid, key):
+        """Get the PMIDs in cited_by, cited_by_clin, or references for one PMID, without a dict"""
+        if (idx := self._get_idx(pmid)) is None:
+            return None
+        offsets = self.cols[f'{key}_offsets']
+        return self.cols[key][offsets[idx]:offsets[idx+1]].tolist()
+
+    def get_nihdict(self, pmid):
+        """Get the NIH iCite dict for one PMID, or None if the PMID is not in the snapshot"""
+        if (idx := self._get_idx(pmid)) is None:
+            return None
+        cols = self.cols
+        hdr = self.header
+        nihdict = {'pmid': pmid}
+        none_uint = NIHiCiteSnapshot.none_uint
+        for key in hdr['ints']:
+            val = cols[key][idx]
+            nihdict[key] = val if val != none_uint else None
+        for key in hdr['floats']:
+            val = cols[key][idx]
+            nihdict[key] = val if val == val else None  # NaN is None
+        bits = cols['flags'][idx]
+        for bit, key in enumerate(hdr['flags']):
+            nihdict[key] = bool(bits & (1 << bit)) if bits & (1 << (bit + 4)) else None
+        for key in hdr['pmidlists']:
+            offsets = cols[f'{key}_offsets']
+            nihdict[key] = cols[key][offsets[idx]:offsets[idx+1]].tolist()
+        offsets = cols['extra_offsets']
+        nihdict.update(loads(bytes(cols['extra'][offsets[idx]:offsets[idx+1]])))
+        return nihdict
+
+    def close(self):
+        """Release the views on the mapped file and unmap it"""
+        for col in self.cols.values():
+            col.release()
+        self.cols = {}
+        self.mmap.close()
+
+    def _get_idx(self, pmid):
+        """Get the row of a PMID using a binary search of the sorted PMID column"""
+        s_pmids = self.pmids
+        idx = bisect_left(s_pmids, pmid)
+        return idx if idx < len(s_pmids) and s_pmids[idx] == pmid else None
+
+    def _init_header(self):
+        """Read and check the snapshot header"""
+        s_mmap = self.mmap
+        magic = NIHiCiteSnapshot.magic
+        if s_mmap[:len(magic)] != magic:
+            raise RuntimeError(f'**FATAL: NOT AN NIH iCite SNAPSHOT: {self.file_snapshot}')
+        (len_hdr,) = unpack_from('<Q', s_mmap, len(magic))
+        hdr_beg = len(magic) + 8
+        header = loads(s_mmap[hdr_beg:hdr_beg+len_hdr])
+        if header['byteorder'] != sys.byteorder:
+            raise RuntimeError(f'**FATAL: SNAPSHOT IS {header["byteorder"]}-endian: {self.file_snapshot}')
+        align = NIHiCiteSnapshot.align
+        header['data_beg'] = -(-(hdr_beg + len_hdr)//align)*align
+        return header
+
+    def _init_cols(self):
+        """Get a typed view on the mapped file for each column"""
+        view = memoryview(self.mmap)
+        data_beg = self.header['data_beg']
+        cols = {}
+        for name, col in self.header['columns'].items():
+            beg = data_beg + col['offset']
+            cols[name] = view[beg:beg+col['nbytes']].cast(col['typecode'])
+        view.release()
+        return cols
+
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
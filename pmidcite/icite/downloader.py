@@ -3,23 +3,89 @@
 __copyright__ = "Copyright (C) 2021-present, DV Klopfenstein, PhD. All rights reserved."
 __author__ = "DV Klopfenstein, PhD"
 
+from os.path import exists
+
+from pmidcite.icite.api import NIHiCiteAPI
 from pmidcite.icite.pmid_dnlder import NIHiCiteDownloader
 from pmidcite.icite.dnldr.pmid_dnlder_only import NIHiCiteDownloaderOnly
+from pmidcite.icite.dnldr.pmid_dnlder_db import NIHiCiteDownloaderDb
+from pmidcite.icite.dnldr.pmid_db import NIHiCiteDb
 
 
+# pylint: disable=too-many-arguments
 def get_downloader(
         nih_grouper=None,
         force_download=True,
         details_cites_refs=None,
-        dir_icite_py=None):
+        dir_icite_py=None,
+        pool_maxsize=10,
+        max_workers=1,
+        fields=None,
+        dnld_format='json',
+        coalescer=None,
+        icite_cache=None,
+        num_procs=1,
+        py_layout='auto',
+        lru=None,
+        refresh=None,
+        evictor=None,
+        entry_cls=None):
     """Get a Dowloader/Loader or Downloader-Only"""
+    # pool_maxsize: Number of keep-alive HTTP connections kept open to NIH iCite
+    # max_workers:  Number of 1,000-PMID requests sent to NIH iCite concurrently
+    # fields:       Download only these fields, e.g., ['pmid', 'year', 'nih_percentile', 'citation_count']
+    # dnld_format:  'json' or 'csv'; CSV is smaller on the wire and is parsed as it is streamed
+    # coalescer:    Share in-flight downloads (and the coalescer's API) w/other downloaders
+    if coalescer is None:
+        api = NIHiCiteAPI(
+            pool_maxsize=pool_maxsize,
+            max_workers=max_workers,
+            fl=fields,
+            format=dnld_format if dnld_format != 'json' else None)
+    elif pool_maxsize != 10 or max_workers != 1 or fields is not None or dnld_format != 'json':
+        raise RuntimeError('**FATAL: A COALESCER USES ITS OWN API: SET pool_maxsize, max_workers, '
+                           'fields, AND dnld_format ON THE API GIVEN TO NIHiCiteCoalescer')
+    else:
+        api = None
+    # lru:          NIHiCiteLru(max_entries, max_bytes); keep recently used entries in memory
+    # refresh:      NIHiCiteRefresh(max_days, check_modified); download old or modified cached entries
+    # evictor:      NIHiCiteEvictor(max_bytes=, max_entries=); bound the size of dir_icite_py
+    # entry_cls:    NIHiCiteEntry (default) or NIHiCiteEntryCompact, which uses less memory
     if not dir_icite_py or dir_icite_py == 'None':
-        return NIHiCiteDownloaderOnly(details_cites_refs, nih_grouper)
+        return NIHiCiteDownloaderOnly(
+            details_cites_refs, nih_grouper, api, coalescer, lru, entry_cls=entry_cls)
+    # icite_cache:  py, sqlite, or auto; auto uses sqlite if dir_icite_py contains the database
+    if icite_cache is None or icite_cache == 'auto':
+        icite_cache = 'sqlite' if exists(NIHiCiteDb.get_filename(dir_icite_py)) else 'py'
+    if icite_cache == 'sqlite':
+        return NIHiCiteDownloaderDb(
+            dir_icite_py,
+            force_download,
+            details_cites_refs,
+            nih_grouper,
+            api,
+            coalescer,
+            lru,
+            refresh,
+            evictor,
+            entry_cls)
+    if icite_cache != 'py':
+        raise RuntimeError(f'**FATAL: UNKNOWN icite_cache({icite_cache}): EXPECTED auto, py, or sqlite')
+    # num_procs:    Number of processes loading cached p{PMID}.py files; 0 uses one per CPU
+    # py_layout:    flat, sharded, or auto; auto uses sharded if dir_icite_py was migrated to sharded
     return NIHiCiteDownloader(
         dir_icite_py,
         force_download,
         details_cites_refs,
-        nih_grouper)
+        nih_grouper,
+        api,
+        coalescer,
+        num_procs,
+        py_layout,
+        lru,
+        refresh,
+        evictor,
+        entry_cls)
 
 
 # Copyright (C) 2021-present DV Klopfenstein, PhD. All rights reserved.
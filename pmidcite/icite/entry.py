@@ -5,6 +5,7 @@ __copyright__ = "Copyright (C) 2019-present, DV Klopfenstein, PhD. All rights re
 __author__ = "DV Klopfenstein, PhD"
 
 from sys import stdout
+from sys import getsizeof
 
 
 class NIHiCiteEntry:
@@ -71,36 +72,58 @@ class NIHiCiteEntry:
     def __init__(self, pmid=None, dct=None):
         self.pmid = pmid
         self.dct = dct
+        # (fnc, key) of the last sort key computed, or None
+        self.sortkey = None
+
+    def __getstate__(self):
+        """Pickle the PMID and NIH iCite data; the sort key is computed again when needed"""
+        return (self.pmid, self.dct)
+
+    def __setstate__(self, state):
+        self.pmid, self.dct = state
+        self.sortkey = None
 
     def get_dict(self):
         """Gets a dict containing all member data.
            Use `get_dict` instead of accessing the dict directly.
            The dict data member is deprecated and will be replaced by a namedtuple
         """
+        if 'all_citing_pmids' not in self.dct:
+            self.get('all_citing_pmids')
         return self.dct
 
     @classmethod
     def from_jsondct(cls, icite_dct, nih_group_num):
         """Construct NIHiCiteEntry from jsondct downloaded from NIH using Entrez utils"""
+        # icite_dct may contain only the fields requested from NIH using fl (e.g., fl=pmid,year)
         cls_dct = icite_dct
         cls_dct['nih_group'] = nih_group_num  # 0 - 5
-        cls_dct['num_auth'] = len(lst) if (lst := icite_dct['authors']) else 0
-        cit_clin = icite_dct['cited_by_clin']
-        cited_by = icite_dct['cited_by']
+        cls_dct['num_auth'] = len(lst) if (lst := icite_dct.get('authors')) else 0
+        cit_clin = icite_dct.get('cited_by_clin')
+        cited_by = icite_dct.get('cited_by')
         cls_dct['num_clin'] = len(cit_clin) if cit_clin else 0
         cls_dct['num_cite'] = len(cited_by) if cited_by else 0
 
         ##num_cites_all = len(set(cls_dct['cited_by_clin']).union(cls_dct['cited_by']))
-        all_citing_pmids = cls._get_cites_all(cit_clin, cited_by)
-        cls_dct['all_citing_pmids'] = all_citing_pmids
-        num_cites_all = len(all_citing_pmids) if all_citing_pmids is not None else 0
-        cls_dct['num_cites_all'] = num_cites_all
+        # all_citing_pmids is made when first read, by get or get_dict
+        cls_dct['num_cites_all'] = num_cites_all = cls._get_num_cites_all(icite_dct, cit_clin, cited_by)
 
-        nih_perc = icite_dct['nih_percentile']
+        nih_perc = icite_dct.get('nih_percentile')
         cls_dct['nih_perc'] = round(nih_perc) if nih_perc is not None else 110 + num_cites_all
-        cls_dct['num_refs'] = len(icite_dct['references'])
+        cls_dct['num_refs'] = len(refs) if (refs := icite_dct.get('references')) else 0
         return cls(icite_dct['pmid'], cls_dct)
 
+    @staticmethod
+    def _get_num_cites_all(icite_dct, cit_clin, cited_by):
+        """Count the papers in cited_by_clin or cited_by, w/o making a set of all citing PMIDs"""
+        if cit_clin is not None and cited_by is not None:
+            # cited_by_clin is usually a subset of cited_by: count clinical citers not in cited_by
+            return len(cited_by) + len(set(cit_clin).difference(cited_by)) if cit_clin else len(cited_by)
+        if cit_clin is not None or cited_by is not None:
+            return len(cit_clin if cited_by is None else cited_by)
+        # Citing PMIDs were not requested: Use the count reported by NIH
+        return icite_dct.get('citation_count') or 0
+
     @classmethod
     def _get_cites_all(cls, cit_clin, cited_by):
         if cit_clin is not None and cited_by is not None:
@@ -115,11 +138,34 @@ class NIHiCiteEntry:
         """Get the value of attrname. Use this rather than the deprecated dct data member"""
         if attrname in self.dct:
             return self.dct[attrname]
+        if attrname == 'all_citing_pmids':
+            dct = self.dct
+            dct[attrname] = pmids = self._get_cites_all(dct.get('cited_by_clin'), dct.get('cited_by'))
+            return pmids
         return None
 
     def get_attrnames(self):
         """Get a list of attribute names"""
-        return list(self.dct.keys())
+        return list(self.get_dict().keys())
+
+    def get_nbytes(self):
+        """Estimate the memory used by this entry, including its dict and the values in it"""
+        dct = self.dct
+        nbytes = getsizeof(self) + getsizeof(dct)
+        for val in dct.values():
+            nbytes += getsizeof(val)
+            if isinstance(val, (list, set)):
+                # PMIDs and authors contained in the list
+                nbytes += 32*len(val)
+        return nbytes
+
+    def get_sortkey(self, fnc):
+        """Get the sort key computed by fnc; the last key is stored for the next sort using fnc"""
+        if (sortkey := self.sortkey) is not None and sortkey[0] is fnc:
+            return sortkey[1]
+        key = tuple(fnc(self))
+        self.sortkey = (fnc, key)
+        return key
 
     def get_authors(self):
         """Get the list of authors from NIH's iCite for this paper"""
@@ -210,7 +256,7 @@ class NIHiCiteEntry:
         nih_perc = dct['nih_perc']
         return pat.format(
             pmid=self.pmid,
-            year=dct['year'],
+            year=dct.get('year', ''),
             aart_type=self.get_aart_type(),
             aart_animal=self.get_aart_translation(),
             nih_group=str(nih_group) if nih_group != 5 else 'i',
@@ -219,8 +265,8 @@ class NIHiCiteEntry:
             clin=dct['num_clin'],
             references=dct['num_refs'],
             A=dct['num_auth'],
-            author1=dct['authors'][0]['lastName'] if dct['authors'] else '',
-            title=dct['title'],
+            author1=dct['authors'][0]['lastName'] if dct.get('authors') else '',
+            title=dct.get('title', ''),
         )
 
     def get_assc_pmids(self, keys):
@@ -228,16 +274,16 @@ class NIHiCiteEntry:
         pmids = set()
         s_dct = self.dct
         for assc_key in keys:
-            if s_dct[assc_key]:
-                pmids.update(s_dct[assc_key])
+            if (assc_pmids := s_dct.get(assc_key)):
+                pmids.update(assc_pmids)
         return pmids
 
     def get_aart_type(self):
         """Get succinct ASCII art for concise info display"""
         lst = []
         dct = self.dct
-        lst.append('R' if dct['is_research_article'] else '.')
-        lst.append('P' if dct['provisional'] else '.')
+        lst.append('R' if dct.get('is_research_article') else '.')
+        lst.append('P' if dct.get('provisional') else '.')
         return ''.join(lst)
 
     def get_aart_translation(self):
@@ -248,11 +294,11 @@ class NIHiCiteEntry:
         # https://journals.plos.org/plosbiology/article?id=10.1371/journal.pbio.3000416
         lst = []
         dct = self.dct
-        lst.append('H' if dct['human'] != 0.0 else '.')
-        lst.append('A' if dct['animal'] != 0.0 else '.')
-        lst.append('M' if dct['molecular_cellular'] != 0.0 else '.')
-        lst.append('C' if dct['is_clinical'] else '.')
-        lst.append('c' if dct['cited_by_clin'] else '.')
+        lst.append('H' if dct.get('human', 0.0) != 0.0 else '.')
+        lst.append('A' if dct.get('animal', 0.0) != 0.0 else '.')
+        lst.append('M' if dct.get('molecular_cellular', 0.0) != 0.0 else '.')
+        lst.append('C' if dct.get('is_clinical') else '.')
+        lst.append('c' if dct.get('cited_by_clin') else '.')
         return ''.join(lst)
 
     def prt_dct(self, prt=stdout):
@@ -262,7 +308,7 @@ class NIHiCiteEntry:
     def str_dct(self):
         """Get a string describing object"""
         txt = []
-        for key, val in self.dct.items():
+        for key, val in self.get_dict().items():
             if isinstance(val, list):
                 val = f"[{len(val)}] {', '.join(str(e) for e in val)}"
             txt.append(f'{key:27} {val}'.format(K=key, V=val))
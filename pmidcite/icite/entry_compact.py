@@ -0,0 +1,247 @@
+"""Holds NIH iCite data for one PubMed ID (PMID) in typed slots, rather than in a dict"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from sys import getsizeof
+from array import array
+
+from pmidcite.icite.entry import NIHiCiteEntry
+from pmidcite.icite.pmids_sorted import get_pmids_sorted
+from pmidcite.icite.pmids_sorted import intersection
+from pmidcite.icite.pmids_sorted import union
+
+
+class NIHiCiteEntryCompact(NIHiCiteEntry):
+    """Holds NIH iCite data for one PubMed ID (PMID) in typed slots, rather than in a dict"""
+
+    # NIH iCite fields, in the order downloaded, and the type each number is stored as
+    field2type = {
+        'year': int,
+        'title': None,
+        'authors': None,
+        'journal': None,
+        'is_research_article': None,
+        'relative_citation_ratio': float,
+        'nih_percentile': float,
+        'human': float,
+        'animal': float,
+        'molecular_cellular': float,
+        'apt': float,
+        'is_clinical': None,
+        'citation_count': int,
+        'citations_per_year': float,
+        'expected_citations_per_year': float,
+        'field_citation_rate': float,
+        'provisional': None,
+        'x_coord': float,
+        'y_coord': float,
+        'cited_by_clin': array,
+        'cited_by': array,
+        'references': array,
+        'doi': None,
+        'last_modified': None,
+    }
+
+    # Authors are stored as tuples of these values, rather than as dicts
+    author_keys = ('firstName', 'lastName', 'fullName')
+
+    # Keys which from_jsondct adds to the dict of NIHiCiteEntry; derived from the slots when read
+    derived_keys = ('nih_group', 'num_auth', 'num_clin', 'num_cite',
+                    'all_citing_pmids', 'num_cites_all', 'nih_perc', 'num_refs')
+
+    # Fields not downloaded, e.g., not requested using fl, are left unset
+    # extra: dict of any fields NIH iCite adds in the future, or None
+    # sortkey: (fnc, key) of the last sort key computed, or None
+    __slots__ = ('pmid',) + tuple(field2type) + ('nih_group', 'extra', 'sortkey')
+
+    # Slots pickled and counted by get_nbytes; the sort key is computed again when needed
+    state_keys = __slots__[:-1]
+
+    # Bytes used by an empty array('I'), not counting the PMIDs it holds
+    nbytes_array = getsizeof(array('I'))
+
+    # pylint: disable=super-init-not-called
+    def __init__(self, pmid, nih_group_num=None):
+        self.pmid = pmid
+        self.nih_group = nih_group_num
+        self.extra = None
+        self.sortkey = None
+
+    @classmethod
+    def from_jsondct(cls, icite_dct, nih_group_num):
+        """Construct NIHiCiteEntryCompact from jsondct downloaded from NIH; icite_dct is not changed"""
+        obj = cls(icite_dct['pmid'], nih_group_num)
+        s_field2type = cls.field2type
+        s_derived = cls.derived_keys
+        for key, val in icite_dct.items():
+            if key in s_field2type:
+                setattr(obj, key, cls._get_val(key, val, s_field2type[key]))
+            elif key != 'pmid' and key not in s_derived:
+                if obj.extra is None:
+                    obj.extra = {}
+                obj.extra[key] = val
+        return obj
+
+    @classmethod
+    def from_entry(cls, nihentry):
+        """Construct NIHiCiteEntryCompact from a dict-based NIHiCiteEntry"""
+        return cls.from_jsondct(nihentry.get_dict(), nihentry.get('nih_group'))
+
+    @classmethod
+    def _get_val(cls, key, val, typ):
+        """Convert one NIH iCite value to the type stored"""
+        if val is None or typ is None:
+            if key == 'authors' and val:
+                s_keys = cls.author_keys
+                # Authors with other keys are kept as dicts
+                if all(tuple(a) == s_keys for a in val):
+                    return tuple(tuple(a.values()) for a in val)
+            return val
+        if typ is array:
+            # Sorted once at load, so unions and intersections are merges
+            return get_pmids_sorted(val)
+        if isinstance(val, (int, float)):
+            return typ(val)
+        return val
+
+    def __getstate__(self):
+        """Pickle the set slots, e.g., to send entries between processes"""
+        return {k:getattr(self, k) for k in self.state_keys if hasattr(self, k)}
+
+    def __setstate__(self, state):
+        self.sortkey = None
+        for key, val in state.items():
+            setattr(self, key, val)
+
+    @property
+    def dct(self):
+        """A new dict containing all member data; changing it does not change this entry"""
+        return self.get_dict()
+
+    def get_dict(self):
+        """Gets a dict containing all member data, as from_jsondct of NIHiCiteEntry would"""
+        dct = {'pmid': self.pmid}
+        for key in self.field2type:
+            if (val := self._get_field(key)) is not self:
+                dct[key] = list(val) if isinstance(val, array) else val
+        if self.extra:
+            dct.update(self.extra)
+        if 'authors' in dct and dct['authors']:
+            dct['authors'] = self.get_authors()
+        for key in self.derived_keys:
+            if key != 'all_citing_pmids':
+                dct[key] = self.get(key)
+            else:
+                dct[key] = self._get_cites_all(dct.get('cited_by_clin'), dct.get('cited_by'))
+        return dct
+
+    def get(self, attrname):
+        """Get the value of attrname. PMID lists are returned as sorted array('I')"""
+        if attrname == 'authors':
+            return self.get_authors()
+        if attrname in self.field2type:
+            val = self._get_field(attrname)
+            return val if val is not self else None
+        if attrname == 'pmid':
+            return self.pmid
+        if attrname == 'nih_group':
+            return self.nih_group
+        if attrname in self.derived_keys:
+            return self._get_derived(attrname)
+        return self.extra.get(attrname) if self.extra else None
+
+    def get_nbytes(self):
+        """Estimate the memory used by this entry from its slots, w/o building a dict"""
+        nbytes = getsizeof(self)
+        s_get_nbytes_val = self._get_nbytes_val
+        s_nbytes_array = self.nbytes_array
+        for key in self.state_keys:
+            if (val := getattr(self, key, None)) is None:
+                continue
+            if isinstance(val, array):
+                nbytes += s_nbytes_array + val.itemsize*len(val)
+            else:
+                nbytes += s_get_nbytes_val(val)
+        # The sort function is shared by all entries; only the key is counted
+        if self.sortkey is not None:
+            nbytes += s_get_nbytes_val(self.sortkey[1])
+        return nbytes
+
+    @classmethod
+    def _get_nbytes_val(cls, val):
+        """Estimate the memory used by one value, including the values in tuples, lists, and dicts"""
+        if val is None or val is True or val is False:
+            return 0
+        nbytes = getsizeof(val)
+        if isinstance(val, (tuple, list)):
+            nbytes += sum(cls._get_nbytes_val(v) for v in val)
+        elif isinstance(val, dict):
+            nbytes += sum(cls._get_nbytes_val(k) + cls._get_nbytes_val(v) for k, v in val.items())
+        return nbytes
+
+    def get_attrnames(self):
+        """Get a list of attribute names"""
+        return list(self.get_dict().keys())
+
+    def get_authors(self):
+        """Get the list of authors from NIH's iCite for this paper"""
+        if not (authors := getattr(self, 'authors', None)):
+            return authors
+        s_keys = self.author_keys
+        # pylint sees the slot's member descriptor, rather than the tuple of authors set in it
+        # pylint: disable=not-an-iterable
+        return [dict(zip(s_keys, a)) if isinstance(a, tuple) else a for a in authors]
+
+    def get_year(self):
+        """Get the publication year"""
+        return self.get('year')
+
+    def get_assc_pmids(self, keys):
+        """Get PMIDs associated with the given NIH iCite data"""
+        pmids = set()
+        for assc_key in keys:
+            if (assc_pmids := self.get(assc_key)):
+                pmids.update(assc_pmids)
+        return pmids
+
+    def _get_field(self, key):
+        """Get the value of one NIH iCite field; Return self if the field was not downloaded"""
+        return getattr(self, key, self)
+
+    def _get_derived(self, key):
+        """Get the value of a key which NIHiCiteEntry.from_jsondct adds to its dict"""
+        # pylint: disable=too-many-return-statements
+        if key == 'num_auth':
+            return len(authors) if (authors := getattr(self, 'authors', None)) else 0
+        if key == 'num_clin':
+            return len(pmids) if (pmids := self.get('cited_by_clin')) else 0
+        if key == 'num_cite':
+            return len(pmids) if (pmids := self.get('cited_by')) else 0
+        if key == 'num_refs':
+            return len(pmids) if (pmids := self.get('references')) else 0
+        if key == 'all_citing_pmids':
+            cit_clin = self.get('cited_by_clin')
+            cited_by = self.get('cited_by')
+            if cit_clin is None or cited_by is None:
+                return cited_by if cit_clin is None else cit_clin
+            # cited_by_clin is usually a subset of cited_by, which then holds all citing PMIDs
+            if len(intersection(cit_clin, cited_by)) == len(cit_clin):
+                return cited_by
+            return union(cit_clin, cited_by)
+        if key == 'num_cites_all':
+            cit_clin = self.get('cited_by_clin')
+            cited_by = self.get('cited_by')
+            if cit_clin is not None and cited_by is not None:
+                return len(cited_by) + len(cit_clin) - len(intersection(cit_clin, cited_by))
+            if cit_clin is not None or cited_by is not None:
+                return len(cit_clin if cited_by is None else cited_by)
+            # Citing PMIDs were not downloaded: Use the count reported by NIH
+            return self.get('citation_count') or 0
+        if key == 'nih_perc':
+            nih_perc = self.get('nih_percentile')
+            return round(nih_perc) if nih_perc is not None else 110 + self._get_derived('num_cites_all')
+        return self.nih_group
+
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
@@ -0,0 +1,97 @@
+"""Keep the most recently used NIHiCiteEntry objects in memory, bounded by count or size"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from threading import Lock
+from collections import OrderedDict
+
+
+class NIHiCiteLru:
+    """Keep the most recently used NIHiCiteEntry objects in memory, bounded by count or size"""
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        # Least recently used entries are dropped when either limit is exceeded; None is no limit
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.pmid2entry = OrderedDict()
+        self.pmid2nbytes = {}
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    def __len__(self):
+        return len(self.pmid2entry)
+
+    def get(self, pmid):
+        """Get the NIHiCiteEntry for a PMID, or None"""
+        with self.lock:
+            if (nihentry := self.pmid2entry.get(pmid)) is not None:
+                self.pmid2entry.move_to_end(pmid)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return nihentry
+
+    def get_pmid2entry(self, pmids):
+        """Get the NIHiCiteEntry objects which are in memory for the PMIDs"""
+        pmid2entry = {}
+        with self.lock:
+            s_pmid2entry = self.pmid2entry
+            for pmid in pmids:
+                if (nihentry := s_pmid2entry.get(pmid)) is not None:
+                    s_pmid2entry.move_to_end(pmid)
+                    pmid2entry[pmid] = nihentry
+            self.hits += len(pmid2entry)
+            self.misses += len(pmids) - len(pmid2entry)
+        return pmid2entry
+
+    def add_entries(self, nihentries):
+        """Add NIHiCiteEntry objects as the most recently used; Drop the least recently used"""
+        s_get_nbytes = self.get_nbytes
+        with self.lock:
+            s_pmid2entry = self.pmid2entry
+            s_pmid2nbytes = self.pmid2nbytes
+            for nihentry in nihentries:
+                pmid = nihentry.pmid
+                if pmid in s_pmid2entry:
+                    self.nbytes -= s_pmid2nbytes[pmid]
+                s_pmid2entry[pmid] = nihentry
+                s_pmid2entry.move_to_end(pmid)
+                s_pmid2nbytes[pmid] = nbytes = s_get_nbytes(nihentry)
+                self.nbytes += nbytes
+            self._evict()
+
+    def clear(self):
+        """Drop all entries; keep the hit and miss counts"""
+        with self.lock:
+            self.pmid2entry.clear()
+            self.pmid2nbytes.clear()
+            self.nbytes = 0
+
+    def str_stats(self):
+        """Get a one-line summary of the size and hit rate"""
+        num_req = self.hits + self.misses
+        hit_rate = 100.0*self.hits/num_req if num_req else 0.0
+        return (f'LRU: {len(self):,} entries {self.nbytes:,} bytes; '
+                f'{self.hits:,} hits {self.misses:,} misses ({hit_rate:.1f}% hits)')
+
+    @staticmethod
+    def get_nbytes(nihentry):
+        """Estimate the memory used by one NIHiCiteEntry or NIHiCiteEntryCompact"""
+        return nihentry.get_nbytes()
+
+    def _evict(self):
+        """Drop least recently used entries until the count and size are within the limits"""
+        s_pmid2entry = self.pmid2entry
+        s_pmid2nbytes = self.pmid2nbytes
+        max_entries = self.max_entries
+        max_bytes = self.max_bytes
+        while s_pmid2entry and ((max_entries is not None and len(s_pmid2entry) > max_entries) or
+                                (max_bytes is not None and self.nbytes > max_bytes)):
+            pmid, _ = s_pmid2entry.popitem(last=False)
+            self.nbytes -= s_pmid2nbytes.pop(pmid)
+
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
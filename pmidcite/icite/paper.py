@@ -4,23 +4,29 @@ __copyright__ = "Copyright (C) 2019-present, DV Klopfenstein, PhD. All rights re
 __author__ = "DV Klopfenstein, PhD"
 
 from sys import stdout
+from itertools import islice
+from heapq import nsmallest
 
 
 def sortby_year(obj):
     """Sort lists of iCite items"""
-    return [-1*obj.dct['year'], -1*obj.dct['nih_percentile']]
+    return [-1*_get_num(obj, 'year'), -1*_get_num(obj, 'nih_percentile')]
 
 def sortby_cite(obj):
     """Sort lists of iCite items"""
-    return [-1*obj.dct['citation_count'], -1*obj.dct['year']]
+    return [-1*_get_num(obj, 'citation_count'), -1*_get_num(obj, 'year')]
 
 def sortby_nih_group(obj):
     """Sort lists of iCite items"""
-    dct = obj.dct
-    return [-1*dct['nih_group'], -1*dct['year'], -1*dct['nih_perc'],
-            -1*dct['citation_count'] + -1*dct['num_clin'],
-            -1*dct['num_refs'],
-            -1*dct['pmid']]
+    return [-1*_get_num(obj, 'nih_group'), -1*_get_num(obj, 'year'), -1*_get_num(obj, 'nih_perc'),
+            -1*_get_num(obj, 'citation_count') + -1*_get_num(obj, 'num_clin'),
+            -1*_get_num(obj, 'num_refs'),
+            -1*obj.pmid]
+
+def _get_num(obj, key):
+    """Get a number to sort by; fields not downloaded (e.g., not requested using fl) sort as 0"""
+    val = obj.get(key)
+    return val if val is not None else 0
 
 
 # pylint: disable=too-many-instance-attributes
@@ -77,40 +83,50 @@ class NIHiCitePaper:
         prt.write('    CLI: A clinical paper that cited TOP\n')
         prt.write("    REF: A paper referenced in the TOP paper's bibliography\n")
 
-    def prt_summary(self, prt=stdout, sortby_cites='nih_group', sortby_refs='nih_group'):
-        """Print summary of paper"""
+    def prt_summary(self, prt=stdout, sortby_cites='nih_group', sortby_refs='nih_group', top_n=None):
+        """Print summary of paper; only the first top_n citations and references, if given"""
         if self.hdr:
             prt.write(f'NAME: {self.hdr}\n')
         prt.write(f'TOP {self.str_line()}\n')
         # Citations by clinical papers
         if self.cited_by_clin:
             prt.write(f'Cited by {len(self.cited_by_clin)} Clinical papers:\n')
-        self._prt_list(self.cited_by_clin, 'CLI', prt, sortby_cites)
+        self._prt_list(self.cited_by_clin, 'CLI', prt, sortby_cites, top_n)
         # Citations
         if self.cited_by:
-            prt.write(f'{len(self.cited_by)} of {self.icite.dct["citation_count"]} '
+            prt.write(f'{len(self.cited_by)} of {self.icite.get("citation_count")} '
                        'citations downloaded:\n')
-        self._prt_list(self.cited_by, 'CIT', prt, sortby_cites)
+        self._prt_list(self.cited_by, 'CIT', prt, sortby_cites, top_n)
         # References
         if self.references:
-            prt.write(f'{len(self.references)} of {self.icite.dct["num_refs"]} '
+            prt.write(f'{len(self.references)} of {self.icite.get("num_refs")} '
                        'References downloaded:\n')
-            self._prt_list(self.references, 'REF', prt, sortby_refs)
+            self._prt_list(self.references, 'REF', prt, sortby_refs, top_n)
 
-    def get_sorted(self, icites, sortby=None):
-        """Get citations or references, sorted"""
+    def get_sorted(self, icites, sortby=None, top_n=None):
+        """Get citations or references, sorted; only the first top_n, if given"""
+        if icites is None:
+            return None
         if sortby is None:
-            return icites
+            return icites if top_n is None else list(islice(icites, top_n))
         if sortby in self.sortby_dct:
-            sortby = self.sortby_dct[sortby]
-        return sorted(icites, key=sortby) if icites is not None else None
-
-    def _prt_list(self, icites, desc, prt, sortby=None):
+            sortby = self._get_sortkey_fnc(sortby)
+        # Keep the best few of many citations w/o sorting them all
+        if top_n is not None and top_n < len(icites):
+            return nsmallest(top_n, icites, key=sortby)
+        return sorted(icites, key=sortby)
+
+    def _get_sortkey_fnc(self, sortby):
+        """Get a function returning each entry's sort key, which is stored in the entry"""
+        fnc = self.sortby_dct[sortby]
+        return lambda icite: icite.get_sortkey(fnc)
+
+    def _prt_list(self, icites, desc, prt, sortby=None, top_n=None):
         """Print list of NIH iCites in summary format"""
         if icites is None:
             return
-        if sortby is not None:
-            icites = self.get_sorted(icites, sortby)
+        if sortby is not None or top_n is not None:
+            icites = self.get_sorted(icites, sortby, top_n)
         if self.pmid2note:
             s_pmid2note = self.pmid2note
             for icite in icites:
@@ -127,7 +143,7 @@ class NIHiCitePaper:
         if self.icite is None:
             return None
         ##print(f'FOR PMID({self.pmid}), INIT {name} PMIDs')
-        if (pmids := self.icite.dct[name]) is not None:
+        if (pmids := self.icite.get(name)) is not None:
             s_pmid2icite = self.pmid2icite
             return set(s_pmid2icite[pmid] for pmid in pmids if pmid in s_pmid2icite)
         return None
@@ -57,7 +57,8 @@ class NIHiCitePapers:
         au2firstlast = defaultdict(lambda: defaultdict(set))  # Author -to- First, Middle, Last
         for pmid, paper in self.pmid2paper.items():
             icite = paper.pmid2icite[pmid]
-            authors = icite.dct['authors']
+            # Authors are not present if they were not requested using fl
+            authors = icite.get('authors')
             ## print('PPPPPPPPPPPP', pmid, paper)
             if authors:
                 ## print('PPPPPPPPPPPP', authors)
@@ -73,7 +74,7 @@ class NIHiCitePapers:
         authors = Counter()
         for pmid, paper in self.pmid2paper.items():
             icite = paper.pmid2icite[pmid]
-            for author in icite.dct['authors']:
+            for author in icite.get('authors') or []:
                 authors[author] += 1
             ## print('sssssssssss', pmid, icite.dct)
         return authors
@@ -0,0 +1,51 @@
+"""Sets of PMIDs stored as sorted array('I'), combined by merging rather than by hashing"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from array import array
+from bisect import bisect_left
+from heapq import merge
+from itertools import groupby
+
+
+def get_pmids_sorted(pmids):
+    """Get an array('I') of unique PMIDs, sorted; 4 bytes per PMID rather than a set"""
+    return array('I', sorted(set(pmids)))
+
+def has_pmid(pmids_sorted, pmid):
+    """Return True if a sorted array of PMIDs contains the PMID"""
+    idx = bisect_left(pmids_sorted, pmid)
+    return idx != len(pmids_sorted) and pmids_sorted[idx] == pmid
+
+def union(pmids_a, pmids_b):
+    """Merge two sorted arrays of unique PMIDs into one sorted array of unique PMIDs"""
+    if not pmids_a:
+        return array('I', pmids_b)
+    if not pmids_b:
+        return array('I', pmids_a)
+    return array('I', (pmid for pmid, _ in groupby(merge(pmids_a, pmids_b))))
+
+def intersection(pmids_a, pmids_b):
+    """Get the PMIDs found in both sorted arrays of unique PMIDs, as a sorted array"""
+    if len(pmids_a) > len(pmids_b):
+        pmids_a, pmids_b = pmids_b, pmids_a
+    if not pmids_a:
+        return array('I')
+    # A few PMIDs in a long list, e.g., clinical citations of a hub paper: binary search
+    if len(pmids_a)*8 < len(pmids_b):
+        return array('I', (pmid for pmid in pmids_a if has_pmid(pmids_b, pmid)))
+    pmids = array('I')
+    idx_b = 0
+    len_b = len(pmids_b)
+    for pmid in pmids_a:
+        while idx_b < len_b and pmids_b[idx_b] < pmid:
+            idx_b += 1
+        if idx_b == len_b:
+            break
+        if pmids_b[idx_b] == pmid:
+            pmids.append(pmid)
+    return pmids
+
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
@@ -0,0 +1,51 @@
+"""Find cached NIH iCite entries to download again: too old, or modified at NIH since downloaded"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from time import time
+
+from pmidcite.icite.api import NIHiCiteAPI
+
+
+class NIHiCiteRefresh:
+    """Find cached NIH iCite entries to download again: too old, or modified at NIH since downloaded"""
+
+    def __init__(self, max_days=None, check_modified=False, api=None):
+        # Cached entries downloaded more than max_days ago are downloaded again
+        self.max_secs = max_days*86400.0 if max_days is not None else None
+        # Cached entries whose last_modified differs from NIH's are downloaded again
+        self.check_modified = check_modified
+        # Only the PMID and last_modified are downloaded to check for modified entries
+        self.api = api if api is not None else NIHiCiteAPI(fl='pmid,last_modified')
+
+    def close(self):
+        """Release the HTTP connections used to check last_modified"""
+        self.api.close()
+
+    def get_pmids_old(self, pmid2secs):
+        """Get PMIDs downloaded more than max_days ago, given their download times (secs since epoch)"""
+        if self.max_secs is None:
+            return set()
+        secs_min = time() - self.max_secs
+        return set(pmid for pmid, secs in pmid2secs.items() if secs < secs_min)
+
+    def get_pmids_modified(self, nihentries):
+        """Get PMIDs of cached entries whose last_modified differs from the value currently at NIH"""
+        if not self.check_modified or not nihentries:
+            return set()
+        pmid2lastmod = {o.pmid:o.get('last_modified') for o in nihentries}
+        nihdicts = self.api.dnld_nihdicts(list(pmid2lastmod.keys()))
+        return set(d['pmid'] for d in nihdicts if d.get('last_modified') != pmid2lastmod[d['pmid']])
+
+    def get_nihentries_fresh(self, nihentries):
+        """Split cached entries into fresh entries and the PMIDs of modified entries"""
+        if not self.check_modified:
+            return nihentries, set()
+        pmids_modified = self.get_pmids_modified(nihentries)
+        if pmids_modified:
+            print(f'{len(pmids_modified):,} of {len(nihentries):,} cached iCite entries modified at NIH')
+        return [o for o in nihentries if o.pmid not in pmids_modified], pmids_modified
+
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
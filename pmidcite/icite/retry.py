@@ -0,0 +1,57 @@
+"""Retry policy for requests sent to NIH iCite: exponential backoff, jitter, and Retry-After"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from random import uniform
+from datetime import datetime
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+
+
+class RetryPolicy:
+    """Retry policy for requests sent to NIH iCite: exponential backoff, jitter, and Retry-After"""
+
+    # Too Many Requests, Internal Server Error, Bad Gateway, Service Unavailable, Gateway Timeout
+    status_retry = {429, 500, 502, 503, 504}
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, max_tries=4, backoff=1.0, backoff_max=60.0, jitter=0.5, bisect_depth=3):
+        # Total number of times a request is sent, including the first
+        self.max_tries = max_tries
+        # Seconds to wait before the 2nd try; doubled for each following try
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        # Random fraction of the delay added, so concurrent workers do not retry in lockstep
+        self.jitter = jitter
+        # Number of times a failed chunk of PMIDs may be split in two and re-requested
+        self.bisect_depth = bisect_depth
+
+    def do_retry(self, status_code):
+        """Return True if a request which received this HTTP status code should be retried"""
+        return status_code in self.status_retry
+
+    def get_delay(self, attempt, retry_after=None):
+        """Get the number of seconds to wait after the attempt-th try failed"""
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        delay = min(self.backoff * 2**(attempt - 1), self.backoff_max)
+        return delay + uniform(0, self.jitter*delay)
+
+    @staticmethod
+    def get_retry_after(rsp):
+        """Get the seconds to wait from a Retry-After header: delay-seconds or an HTTP-date"""
+        if (retry_after := rsp.headers.get('Retry-After')) is None:
+            return None
+        if retry_after.strip().isdigit():
+            return float(retry_after)
+        try:
+            date = parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            return None
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+        return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
@@ -0,0 +1,165 @@
+"""NIH iCite data for many PMIDs, held in NumPy columns so groups, sorts, and filters are vectorized"""
+#
+# Requires numpy:
+#     $ pip install pmidcite[numpy]
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+import numpy as np
+
+
+class NIHiCiteTable:
+    """NIH iCite data for many PMIDs, held in NumPy columns so groups, sorts, and filters are vectorized"""
+
+    # Column name, NumPy type, and the value stored when NIH iCite has none
+    columns = (
+        ('pmid', np.uint32, 0),
+        ('year', np.int16, 0),
+        ('nih_percentile', np.float64, np.nan),
+        ('citation_count', np.int64, 0),
+        ('num_clin', np.int32, 0),
+        ('num_refs', np.int32, 0),
+        ('num_cites_all', np.int64, 0),
+        ('nih_group', np.int8, 5),
+        ('flags', np.uint8, 0),
+    )
+
+    # One bit per character in the RP and HAMCc sections of an iCite line
+    flag_chrs = 'RPHAMCc'
+    chr2flag = {c:1 << i for i, c in enumerate(flag_chrs)}
+
+    # Same order as the sort functions in pmidcite.icite.paper, most-significant key first
+    sortby_cols = {
+        'nih_group': ('nih_group', 'year', 'nih_perc', 'num_cites_nih', 'num_refs', 'pmid'),
+        'cite': ('citation_count', 'year'),
+        'year': ('year', 'nih_percentile'),
+    }
+
+    def __init__(self, col2vals, icites=None):
+        self.col2vals = col2vals
+        self.icites = icites  # NIHiCiteEntrys in row order, or None
+
+    def __len__(self):
+        return len(self.col2vals['pmid'])
+
+    def get(self, colname):
+        """Get one column, as a NumPy array"""
+        if colname in self.col2vals:
+            return self.col2vals[colname]
+        if colname == 'nih_perc':
+            # Same as NIHiCiteEntry: papers w/no NIH percentile are put above 100%
+            pct = self.col2vals['nih_percentile']
+            return np.where(np.isnan(pct), 110 + self.col2vals['num_cites_all'], np.round(pct))
+        if colname == 'num_cites_nih':
+            return self.col2vals['citation_count'] + self.col2vals['num_clin']
+        raise KeyError(f'UNKNOWN COLUMN({colname}): {" ".join(c for c, _, _ in self.columns)}')
+
+    def get_pmids(self):
+        """Get the PMIDs, in row order"""
+        return self.col2vals['pmid'].tolist()
+
+    def get_icites(self):
+        """Get the NIHiCiteEntrys, in row order"""
+        return self.icites
+
+    # -- NIH groups --------------------------------------------------------------
+    def get_groups(self, nihgrouper):
+        """Get NihGrouper.get_group for all rows at once"""
+        pct = self.col2vals['nih_percentile']
+        grps = np.searchsorted(np.asarray(nihgrouper.get_list()), pct, side='right').astype(np.int8)
+        grps[np.isnan(pct) | (pct == -1)] = 5
+        return grps
+
+    def set_groups(self, nihgrouper):
+        """Re-group all rows using the given NIH percentile dividers"""
+        self.col2vals['nih_group'] = self.get_groups(nihgrouper)
+
+    def get_group_counts(self, nihgrouper=None):
+        """Get the number of papers in each NIH group: 0, 1, 2, 3, 4, and 5 (i)"""
+        grps = self.get_groups(nihgrouper) if nihgrouper is not None else self.col2vals['nih_group']
+        return np.bincount(grps, minlength=6)
+
+    # -- Sorts -------------------------------------------------------------------
+    def argsort(self, sortby='nih_group'):
+        """Get row indices sorted as the sort functions in pmidcite.icite.paper sort entries"""
+        # lexsort sorts by its last key first; all keys are descending
+        keys = [-self.get(c).astype(np.float64) for c in reversed(self.sortby_cols[sortby])]
+        return np.lexsort(keys)
+
+    def get_sorted(self, sortby='nih_group'):
+        """Get a new NIHiCiteTable w/the rows sorted"""
+        return self.take(self.argsort(sortby))
+
+    # -- Filters -----------------------------------------------------------------
+    def get_mask_groups(self, groups, nihgrouper=None):
+        """Get a mask of rows in any of the given NIH groups; 'i' and 5 are the same group"""
+        grps = self.get_groups(nihgrouper) if nihgrouper is not None else self.col2vals['nih_group']
+        return np.isin(grps, [5 if g == 'i' else int(g) for g in groups])
+
+    def get_mask_years(self, year_min=None, year_max=None):
+        """Get a mask of rows published from year_min to year_max, inclusive"""
+        years = self.col2vals['year']
+        mask = np.ones(len(years), dtype=bool)
+        if year_min is not None:
+            mask &= years >= year_min
+        if year_max is not None:
+            mask &= years <= year_max
+        return mask
+
+    def get_mask_flags(self, chrs):
+        """Get a mask of rows which have all the given RPHAMCc flags, e.g., 'C' or 'Hc'"""
+        bits = 0
+        for chr_flag in chrs:
+            bits |= self.chr2flag[chr_flag]
+        return (self.col2vals['flags'] & bits) == bits
+
+    def filter(self, mask):
+        """Get a new NIHiCiteTable containing only the rows where mask is True"""
+        return self.take(np.flatnonzero(mask))
+
+    def take(self, idxs):
+        """Get a new NIHiCiteTable containing the rows at the given indices, in that order"""
+        icites = self.icites
+        return NIHiCiteTable(
+            {c:v[idxs] for c, v in self.col2vals.items()},
+            [icites[i] for i in idxs.tolist()] if icites is not None else None)
+
+    # -- Constructors ------------------------------------------------------------
+    @classmethod
+    def from_icites(cls, icites, keep_icites=True):
+        """Get a NIHiCiteTable, given NIHiCiteEntrys or NIHiCiteEntryCompacts"""
+        icites = list(icites)
+        col2lst = {c:[] for c, _, _ in cls.columns}
+        get_flags = cls._get_flags
+        for icite in icites:
+            for col, _, dflt in cls.columns[:-1]:
+                val = icite.pmid if col == 'pmid' else icite.get(col)
+                col2lst[col].append(val if val is not None else dflt)
+            col2lst['flags'].append(get_flags(icite))
+        return cls({c:np.array(col2lst[c], dtype=t) for c, t, _ in cls.columns},
+                   icites if keep_icites else None)
+
+    @classmethod
+    def _get_flags(cls, icite):
+        """Get the RPHAMCc flags of one NIHiCiteEntry, as bits"""
+        flags = 0
+        s_chr2flag = cls.chr2flag
+        if icite.get('is_research_article'):
+            flags |= s_chr2flag['R']
+        if icite.get('provisional'):
+            flags |= s_chr2flag['P']
+        if icite.get('human'):
+            flags |= s_chr2flag['H']
+        if icite.get('animal'):
+            flags |= s_chr2flag['A']
+        if icite.get('molecular_cellular'):
+            flags |= s_chr2flag['M']
+        if icite.get('is_clinical'):
+            flags |= s_chr2flag['C']
+        if icite.get('num_clin'):
+            flags |= s_chr2flag['c']
+        return flags
+
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
@@ -8,14 +8,18 @@ from collections import namedtuple
 from pmidcite.cfg import get_cfgparser
 from pmidcite.eutils.cmds.pubmed import PubMed
 #### from pmidcite.cli.utils import wr_pmids
+from pmidcite.icite.api import NIHiCiteAPI
+from pmidcite.icite.coalescer import NIHiCiteCoalescer
 from pmidcite.icite.downloader import get_downloader
 
 
 class PubMedQueryToICite:
     """Run PubMed user query and download PMIDs. Run iCite on PMIDs. Write text file."""
 
-    def __init__(self, force_dnld, verbose=True, pmid2note=None):
+    def __init__(self, force_dnld, verbose=True, pmid2note=None, refresh=None):
         self.force_dnld = force_dnld
+        # NIHiCiteRefresh: Download only cached iCite entries which are old or modified at NIH
+        self.refresh = refresh
         self.verbose = verbose
         self.pmid2note = {} if pmid2note is None else pmid2note
         self.cfg = get_cfgparser()
@@ -23,6 +27,9 @@ class PubMedQueryToICite:
             email=self.cfg.get_email(),
             apikey=self.cfg.get_apikey(),
             tool=self.cfg.get_tool())
+        # Downloaders for all queries share HTTP connections and in-flight iCite downloads.
+        # Papers found by several queries are downloaded once per hour
+        self.coalescer = NIHiCiteCoalescer(NIHiCiteAPI(), max_done=10000, max_secs=3600)
 
     #### def run(self, nts_fout_query, dnld_idxs=None):
     def get_pmid2paper(self, nts_fout_query, dnld_idxs=None):
@@ -96,7 +103,11 @@ class PubMedQueryToICite:
             force_download=self.force_dnld,
             # all citations references
             details_cites_refs=details_cites_refs,
-            dir_icite_py=cfg.get_dir_icite_py())
+            dir_icite_py=cfg.get_dir_icite_py(),
+            coalescer=self.coalescer,
+            icite_cache=cfg.get_icite_cache(),
+            refresh=self.refresh,
+            evictor=cfg.get_icite_evictor())
         ## print('PMIDCITE PPPPPPPPPPPPPPPPP dnldr.get_pmid2paper {N} PMIDs'.format(N=len(pmids)))
         pmid2paper = dnldr.get_pmid2paper(pmids, self.pmid2note)
         ## print('PMIDCITE PPPPPPPPPPPPPPPPP dnldr.wr_papers{N} PMIDs'.format(N=len(pmids)))
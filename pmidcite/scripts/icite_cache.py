@@ -0,0 +1,15 @@
+"""Manage the NIH iCite data cached in dir_icite_py"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from pmidcite.cli.icite_cache import NIHiCiteCacheCli
+from pmidcite.cfg import get_cfgparser
+
+
+def main():
+    """Manage the NIH iCite data cached in dir_icite_py"""
+    NIHiCiteCacheCli(get_cfgparser(prt=None)).cli()
+
+
+# Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved.
@@ -0,0 +1,61 @@
+"""NIH iCite data and a stand-in NIH iCite server, for tests which run w/o a network"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from pmidcite.icite.api import NIHiCiteAPI
+
+
+def get_nihdict(pmid, cited_by=None, references=None):
+    """Get NIH iCite data for one paper, as downloaded from NIH"""
+    return {
+        'pmid': pmid,
+        'year': 2020,
+        'title': f'Title of paper {pmid}',
+        'authors': [{'firstName': 'D V', 'lastName': 'Klopfenstein', 'fullName': 'D V Klopfenstein'}],
+        'journal': 'Res Synth Methods',
+        'is_research_article': True,
+        'relative_citation_ratio': 1.25,
+        'nih_percentile': 55.4,
+        'human': 1.0,
+        'animal': 0.0,
+        'molecular_cellular': 0.0,
+        'apt': 0.05,
+        'is_clinical': False,
+        'citation_count': len(cited_by) if cited_by else 0,
+        'citations_per_year': 1.0,
+        'expected_citations_per_year': 1.0,
+        'field_citation_rate': 3.1,
+        'provisional': False,
+        'x_coord': 0.0,
+        'y_coord': 1.0,
+        'cited_by_clin': [],
+        'cited_by': cited_by if cited_by else [],
+        'references': references if references else [],
+        'doi': f'10.1000/{pmid}',
+        'last_modified': '07/24/2025, 10:41:27',
+    }
+
+
+class ServerAPI(NIHiCiteAPI):
+    """Stand-in for NIHiCiteAPI which returns the current NIH iCite data w/o a network"""
+
+    def __init__(self, pmid2nihdict, **kws):
+        super().__init__(**kws)
+        self.pmid2nihdict = pmid2nihdict
+        self.pmids_requested = []
+
+    def dnld_nihdict(self, pmid):
+        """Return the current NIH data for one PMID"""
+        nihdicts = self.dnld_nihdicts([pmid])
+        return nihdicts[0] if nihdicts else None
+
+    def dnld_nihdicts(self, pmids):
+        """Return the current NIH data, projected to the requested fields"""
+        self.pmids_requested.extend(pmids)
+        fields = self.get_fields()
+        return [{k:v for k, v in self.pmid2nihdict[p].items() if fields is None or k in fields}
+                for p in pmids]
+
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Test AsyncNIHiCiteAPI retries failed requests and splits failed chunks w/o stopping other chunks"""
+#
+# Requires aiohttp:
+#     $ pip install pmidcite[async]
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+import asyncio
+from aiohttp import ContentTypeError
+from aiohttp import RequestInfo
+from yarl import URL
+
+from pmidcite.icite.api_async import AsyncNIHiCiteAPI
+from pmidcite.icite.chunker import ChunkSizer
+from pmidcite.icite.retry import RetryPolicy
+
+
+class AioRsp:
+    """Stand-in for an aiohttp response"""
+
+    def __init__(self, pmids, status=200, headers=None, err_json=None):
+        self.status = status
+        self.reason = 'ERROR' if status != 200 else 'OK'
+        self.url = URL('https://icite.od.nih.gov/api/pubs')
+        self.headers = headers if headers is not None else {}
+        self.pmids = pmids
+        self.err_json = err_json
+
+    async def json(self):
+        """Return the NIH iCite data for the requested PMIDs, or raise the error requested"""
+        if self.err_json is not None:
+            raise self.err_json
+        return {'data': [{'pmid':p, 'cited_by':[1, 2]} for p in self.pmids]}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_tb):
+        return False
+
+
+class AioSession:
+    """Stand-in for aiohttp.ClientSession: the first request of some chunks fails"""
+
+    def __init__(self):
+        self.pmid_lists = []
+
+    def get(self, cmd):
+        """Return a response which fails as scripted by the PMIDs requested"""
+        pmids = [int(p) for p in cmd.split('pmids=')[1].split('&')[0].split(',')]
+        is_first = pmids not in self.pmid_lists
+        self.pmid_lists.append(pmids)
+        if pmids[0] == 1 and is_first:
+            raise asyncio.TimeoutError()
+        if pmids[0] == 5 and is_first:
+            url = URL(cmd)
+            return AioRsp(pmids, err_json=ContentTypeError(
+                RequestInfo(url, 'GET', {}, url), (), message='text/html'))
+        if pmids == [9, 10, 11, 12] and is_first:
+            return AioRsp(pmids, status=429, headers={'Retry-After': '0'})
+        # The chunk of PMIDs 9-12 always fails after its first try: it is split in two
+        if pmids[0] == 9 and len(pmids) > 2:
+            return AioRsp(pmids, status=503)
+        return AioRsp(pmids)
+
+    async def close(self):
+        """Close the session"""
+
+
+def test_api_async_retry():
+    """Test AsyncNIHiCiteAPI retries failed requests and splits failed chunks w/o stopping other chunks"""
+    pmids = list(range(1, 13))
+    api = AsyncNIHiCiteAPI(retry=RetryPolicy(max_tries=2, backoff=0.0, jitter=0.0),
+                           chunker=ChunkSizer(max_pmids=4))
+    api.aiosession = session = AioSession()
+    nihdicts = asyncio.run(api.dnld_nihdicts(pmids))
+    assert [d['pmid'] for d in nihdicts] == pmids
+    assert sorted(session.pmid_lists) == sorted([
+        [1, 2, 3, 4], [1, 2, 3, 4],
+        [5, 6, 7, 8], [5, 6, 7, 8],
+        [9, 10, 11, 12], [9, 10, 11, 12], [9, 10], [11, 12]])
+    assert len(api.msgs) == 1, api.msgs
+
+
+if __name__ == '__main__':
+    test_api_async_retry()
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
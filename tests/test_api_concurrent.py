@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""Test that concurrent downloads return the same NIH citation data as sequential downloads"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from timeit import default_timer
+
+from pmidcite.icite.api import NIHiCiteAPI
+
+from tests.prt_hms import prt_hms
+from tests.pmids_i3 import PMIDS
+
+
+def test_api_concurrent():
+    """Test that concurrent downloads return the same NIH citation data as sequential downloads"""
+    pmids = PMIDS[:5000]
+
+    tic = default_timer()
+    with NIHiCiteAPI(max_workers=1) as api:
+        nihdicts_seq = api.dnld_nihdicts(pmids)
+    tic = prt_hms(tic, f'{len(nihdicts_seq):,} NIH dicts downloaded sequentially')
+
+    with NIHiCiteAPI(max_workers=5) as api:
+        nihdicts_con = api.dnld_nihdicts(pmids)
+    tic = prt_hms(tic, f'{len(nihdicts_con):,} NIH dicts downloaded concurrently')
+
+    # Chunks are returned in the order requested, regardless of which finished first
+    assert [d['pmid'] for d in nihdicts_seq] == [d['pmid'] for d in nihdicts_con]
+
+
+if __name__ == '__main__':
+    test_api_concurrent()
+
+# Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved.
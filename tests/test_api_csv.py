@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""Test that NIH citation data downloaded as CSV matches the data downloaded as JSON"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from pmidcite.icite.api import NIHiCiteAPI
+
+from tests.pmids import PMIDS
+
+
+def test_api_csv():
+    """Test that NIH citation data downloaded as CSV matches the data downloaded as JSON"""
+    pmids = PMIDS[:200]
+    with NIHiCiteAPI() as api:
+        pmid2json = {d['pmid']:d for d in api.dnld_nihdicts(pmids)}
+    with NIHiCiteAPI(format='csv') as api:
+        pmid2csv = {d['pmid']:d for d in api.dnld_nihdicts(pmids)}
+    assert pmid2json.keys() == pmid2csv.keys()
+    keys = ['year', 'citation_count', 'is_research_article', 'cited_by', 'references']
+    for pmid, dct_json in pmid2json.items():
+        dct_csv = pmid2csv[pmid]
+        for key in keys:
+            assert dct_json[key] == dct_csv[key], f'{pmid} {key}'
+
+
+if __name__ == '__main__':
+    test_api_csv()
+
+# Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved.
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Test that responses which fail while the body is read are retried, then split in two"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from io import BytesIO
+from timeit import default_timer
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+from requests.exceptions import ChunkedEncodingError
+from urllib3.exceptions import ProtocolError
+
+from pmidcite.icite.api import NIHiCiteAPI
+from pmidcite.icite.retry import RetryPolicy
+from pmidcite.icite.chunker import ChunkSizer
+
+
+class StreamBody(BytesIO):
+    """Response body which drops the connection after num_ok bytes are read"""
+
+    def __init__(self, data, num_ok=None):
+        super().__init__(data)
+        self.num_ok = num_ok
+        self.num_read = 0
+        self.decode_content = False
+
+    def tell(self):
+        """Get the number of bytes read, as urllib3's HTTPResponse does, even once closed"""
+        return self.num_read
+
+    def read(self, size=-1):
+        return self._chk(super().read(size))
+
+    def read1(self, size=-1):
+        return self._chk(super().read1(size))
+
+    def _chk(self, data):
+        self.num_read += len(data)
+        if self.num_ok is not None and self.num_read > self.num_ok:
+            raise ProtocolError('Connection broken: IncompleteRead')
+        return data
+
+
+class StreamRsp:
+    """Stand-in for a streamed requests.Response"""
+
+    def __init__(self, body):
+        self.status_code = 200
+        self.raw = body
+
+    def close(self):
+        """Close the response"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
+
+
+class StreamSession:
+    """Stand-in for requests.Session: returns CSV bodies which fail as requested"""
+
+    def __init__(self, get_failure):
+        self.get_failure = get_failure
+        self.pmid_lists = []
+
+    def get(self, cmd, timeout, stream):
+        """Return a CSV response for the PMIDs in the request"""
+        assert stream and timeout
+        pmids = [int(p) for p in cmd.split('pmids=')[1].split('&')[0].split(',')]
+        self.pmid_lists.append(pmids)
+        lines = ['pmid,year,cited_by'] + [f'{p},2020,"1 2"' for p in pmids]
+        failure = self.get_failure(len(self.pmid_lists), pmids)
+        if failure == 'truncated':
+            lines[-1] = lines[-1].split(',')[0]
+        data = '\n'.join(lines).encode('utf-8') + b'\n'
+        return StreamRsp(StreamBody(data, len(data)//2 if failure == 'reset' else None))
+
+    def close(self):
+        """Close the session"""
+
+
+def test_api_stream():
+    """Test that CSV responses which fail while the body streams are retried, then split in two"""
+    pmids = [1, 2, 3, 4]
+    # The first response is reset mid-stream; the retry succeeds
+    session = _run(pmids, lambda num, pmids: 'reset' if num == 1 else None)
+    assert session.pmid_lists == [pmids, pmids]
+    # The last row of the first response is truncated; the retry succeeds
+    session = _run(pmids, lambda num, pmids: 'truncated' if num == 1 else None)
+    assert session.pmid_lists == [pmids, pmids]
+    # Responses for more than two PMIDs are always reset: the chunk is split in two
+    session = _run(pmids, lambda num, pmids: 'reset' if len(pmids) > 2 else None)
+    assert session.pmid_lists == [pmids, pmids, [1, 2], [3, 4]]
+
+
+def _run(pmids, get_failure):
+    """Download NIH iCite data as CSV from a session which fails as requested"""
+    api = NIHiCiteAPI(format='csv', retry=RetryPolicy(max_tries=2, backoff=0.0, jitter=0.0))
+    api.session = session = StreamSession(get_failure)
+    nihdicts = api.dnld_nihdicts(pmids)
+    assert [d['pmid'] for d in nihdicts] == pmids
+    assert all(d['cited_by'] == [1, 2] for d in nihdicts)
+    return session
+
+
+class JsonRsp:
+    """Stand-in for a requests.Response whose JSON body was read w/the headers"""
+
+    def __init__(self, pmids):
+        self.status_code = 200
+        self.content = b'{}'
+        self.pmids = pmids
+
+    def json(self):
+        """Return the NIH iCite data for the requested PMIDs"""
+        return {'data': [{'pmid':p, 'cited_by':[1, 2]} for p in self.pmids]}
+
+    def close(self):
+        """Close the response"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
+
+
+class JsonSession:
+    """Stand-in for requests.Session: the body of the first response for each chunk is cut off"""
+
+    def __init__(self, get_failure):
+        self.get_failure = get_failure
+        self.pmid_lists = []
+        self.lock = Lock()
+
+    def get(self, cmd, timeout, stream):
+        """Return a JSON response for the PMIDs in the request, or fail while reading the body"""
+        assert not stream and timeout
+        pmids = [int(p) for p in cmd.split('pmids=')[1].split('&')[0].split(',')]
+        with self.lock:
+            num = sum(pmids == p for p in self.pmid_lists) + 1
+            self.pmid_lists.append(pmids)
+        if self.get_failure(num, pmids):
+            raise ChunkedEncodingError('Connection broken: IncompleteRead')
+        return JsonRsp(pmids)
+
+    def close(self):
+        """Close the session"""
+
+
+def test_api_json_body():
+    """Test that JSON responses which fail while the body is read are retried, then split in two"""
+    pmids = list(range(1, 9))
+    for max_workers in [1, 2]:
+        # The first response for each chunk is cut off; the retry succeeds
+        session = _run_json(pmids, lambda num, pmids: num == 1, max_workers)
+        assert sorted(session.pmid_lists) == [[1, 2, 3, 4]]*2 + [[5, 6, 7, 8]]*2
+        # Responses for more than two PMIDs are always cut off: the chunks are split in two
+        session = _run_json(pmids, lambda num, pmids: len(pmids) > 2, max_workers)
+        assert sorted(session.pmid_lists) == sorted(
+            [[1, 2, 3, 4]]*2 + [[5, 6, 7, 8]]*2 + [[1, 2], [3, 4], [5, 6], [7, 8]])
+
+
+def test_api_session():
+    """Test concurrent workers share one HTTP session"""
+    api = NIHiCiteAPI(max_workers=8)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        sessions = list(executor.map(lambda _: api.get_session(), range(64)))
+    assert all(o is sessions[0] for o in sessions)
+    api.close()
+
+
+class ThrottleRsp(JsonRsp):
+    """Stand-in for a 429 Too Many Requests response w/a Retry-After header"""
+
+    def __init__(self, pmids):
+        super().__init__(pmids)
+        self.status_code = 429
+        self.reason = 'Too Many Requests'
+        self.url = 'https://icite.od.nih.gov/api/pubs'
+        self.headers = {'Retry-After': '1'}
+
+
+class ThrottleSession(JsonSession):
+    """Stand-in for requests.Session: the first request is throttled"""
+
+    def get(self, cmd, timeout, stream):
+        """Return 429 for the first request, then the JSON response"""
+        rsp = super().get(cmd, timeout, stream)
+        return ThrottleRsp(rsp.pmids) if len(self.pmid_lists) == 1 else rsp
+
+
+class LatencyChunker(ChunkSizer):
+    """ChunkSizer which records the latencies it is given"""
+
+    def __init__(self, **kws):
+        super().__init__(**kws)
+        self.secs = []
+
+    def update(self, num_pmids, secs, num_bytes):
+        self.secs.append(secs)
+        super().update(num_pmids, secs, num_bytes)
+
+
+def test_api_latency():
+    """Test the latency used to size chunks excludes the waits before retries"""
+    api = NIHiCiteAPI(chunker=LatencyChunker(max_pmids=4),
+                      retry=RetryPolicy(max_tries=2, backoff=0.0, jitter=0.0))
+    api.session = session = ThrottleSession(lambda num, pmids: False)
+    tic = default_timer()
+    assert [d['pmid'] for d in api.dnld_nihdicts([1, 2, 3])] == [1, 2, 3]
+    # The request waited for Retry-After; the try which succeeded was fast
+    assert default_timer() - tic >= 1.0
+    assert len(session.pmid_lists) == 2
+    assert len(api.chunker.secs) == 1 and api.chunker.secs[0] < 0.5, api.chunker.secs
+
+
+def _run_json(pmids, get_failure, max_workers):
+    """Download NIH iCite data as JSON from a session which fails as requested"""
+    api = NIHiCiteAPI(max_workers=max_workers, chunker=ChunkSizer(max_pmids=4),
+                      retry=RetryPolicy(max_tries=2, backoff=0.0, jitter=0.0))
+    api.session = session = JsonSession(get_failure)
+    nihdicts = api.dnld_nihdicts(pmids)
+    assert [d['pmid'] for d in nihdicts] == pmids
+    return session
+
+
+if __name__ == '__main__':
+    test_api_stream()
+    test_api_json_body()
+    test_api_session()
+    test_api_latency()
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Test keeping the iCite cache within the size limits set in .pmidciterc"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from os import utime
+from os.path import join
+from time import time
+from tempfile import TemporaryDirectory
+
+from pmidcite.cfg import Cfg
+from pmidcite.icite.api import NIHiCiteAPI
+from pmidcite.icite.dnldr.pmid_layout import NIHiCitePyLayout
+from pmidcite.icite.dnldr.pmid_dnlder import NIHiCiteDownloader
+from pmidcite.icite.dnldr.pmid_dnlder_db import NIHiCiteDownloaderDb
+from tests.icite_data import get_nihdict
+from tests.icite_data import ServerAPI
+
+
+def test_cfg_evictor():
+    """Test reading the cache size limits from .pmidciterc"""
+    cfg = Cfg(check=False)
+    assert cfg.get_icite_evictor() is None
+    cfg.cfgparser['pmidcite']['icite_cache_max_entries'] = '3'
+    cfg.cfgparser['pmidcite']['icite_cache_evict'] = 'oldest'
+    evictor = cfg.get_icite_evictor()
+    assert evictor.max_entries == 3 and evictor.max_bytes is None and evictor.policy == 'oldest'
+
+
+def test_cache_bounded():
+    """Test evicting the least-recently-used entries after a bulk write exceeds the limit"""
+    cfg = Cfg(check=False)
+    cfg.cfgparser['pmidcite']['icite_cache_max_entries'] = '3'
+    server = {p:get_nihdict(p) for p in range(1, 6)}
+    tic = time()
+    with TemporaryDirectory() as dir_icite_py:
+        # PMIDs 1, 2, 3 are cached; PMID 2 was read least recently, then PMID 1
+        for pmid in [1, 2, 3]:
+            file_pmid = join(dir_icite_py, f'p{pmid}.py')
+            with open(file_pmid, 'w', encoding='utf-8') as prt:
+                NIHiCiteAPI.prt_dct(dict(server[pmid]), prt)
+            secs = tic - {1: 2, 2: 3, 3: 1}[pmid]*86400
+            utime(file_pmid, (secs, tic - 5*86400))
+        api = ServerAPI(server)
+        with NIHiCiteDownloader(dir_icite_py, False, api=api, evictor=cfg.get_icite_evictor()) as dnldr:
+            assert [o.pmid for o in dnldr.get_icites([4, 5])] == [4, 5]
+        assert sorted(NIHiCitePyLayout(dir_icite_py).get_pmid2file()) == [3, 4, 5]
+
+    with TemporaryDirectory() as dir_icite_py:
+        # SQLite: PMID 1 was downloaded first
+        api = ServerAPI(server)
+        with NIHiCiteDownloaderDb(dir_icite_py, False, api=api, evictor=cfg.get_icite_evictor()) as dnldr:
+            dnldr.nihdb.wr_nihdicts([server[1], server[2], server[3]],
+                                    {1: tic - 3*86400, 2: tic - 2*86400, 3: tic - 86400})
+            assert [o.pmid for o in dnldr.get_icites([4])] == [4]
+            assert dnldr.nihdb.get_pmids() == [2, 3, 4]
+
+
+def test_cache_totals():
+    """Test a large cache is read in full only once, then again only when it is over its limits"""
+    num_cached = 3000
+    server = {p:get_nihdict(p) for p in range(1, num_cached + 6)}
+    cfg = Cfg(check=False)
+    cfg.cfgparser['pmidcite']['icite_cache_max_entries'] = str(num_cached + 3)
+    for cls in [NIHiCiteDownloader, NIHiCiteDownloaderDb]:
+        with TemporaryDirectory() as dir_icite_py:
+            with cls(dir_icite_py, False, api=ServerAPI(server), evictor=cfg.get_icite_evictor()) as dnldr:
+                store = dnldr.cachesize.store
+                if cls is NIHiCiteDownloader:
+                    for pmid in range(1, num_cached + 1):
+                        with open(store.get_file_pmid(pmid), 'w', encoding='utf-8') as prt:
+                            NIHiCiteAPI.prt_dct(dict(server[pmid]), prt)
+                else:
+                    store.wr_nihdicts([server[p] for p in range(1, num_cached + 1)])
+                num_stat = _count_calls(store, 'get_pmid2stat')
+                num_size = _count_calls(store, 'get_ntsize')
+                # The cache is counted once; Writes under the limit update the totals only
+                for pmid in [num_cached + 1, num_cached + 2, num_cached + 3]:
+                    assert [o.pmid for o in dnldr.get_icites([pmid])] == [pmid]
+                assert num_size == [1, 4], cls
+                assert dnldr.cachesize.num_entries == num_cached + 3, cls
+                # Counting the p{PMID}.py files lists them once
+                num_stat_cnt = 1 if cls is NIHiCiteDownloader else 0
+                assert num_stat[0] == num_stat_cnt, cls
+                # A write over the limit reads the whole cache once to choose entries to evict
+                pmids = [num_cached + 4, num_cached + 5]
+                assert [o.pmid for o in dnldr.get_icites(pmids)] == pmids
+                assert num_stat[0] == num_stat_cnt + 1, cls
+                assert dnldr.cachesize.num_entries == num_cached + 3, cls
+                assert store.get_ntsize().num_entries == num_cached + 3, cls
+
+
+def _count_calls(store, name):
+    """Count calls to a store method: [calls w/no PMIDs, calls w/PMIDs]"""
+    fnc = getattr(store, name)
+    counts = [0, 0]
+    def _fnc(*args):
+        counts[1 if args and args[0] is not None else 0] += 1
+        return fnc(*args)
+    setattr(store, name, _fnc)
+    return counts
+
+
+if __name__ == '__main__':
+    test_cfg_evictor()
+    test_cache_bounded()
+    test_cache_totals()
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
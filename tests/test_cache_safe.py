@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Test atomic cache writes, the cache lock, and quarantining corrupt cache entries"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from os import listdir
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from pmidcite.icite.api import NIHiCiteAPI
+from pmidcite.icite.dnldr.pmid_dnlder import NIHiCiteDownloader
+from pmidcite.icite.dnldr.pmid_dnlder_db import NIHiCiteDownloaderDb
+from pmidcite.icite.dnldr.pmid_lock import NIHiCiteLock
+from pmidcite.icite.dnldr.pmid_lock import fcntl
+from tests.icite_data import get_nihdict
+from tests.icite_data import ServerAPI
+
+
+def test_quarantine_py():
+    """Test corrupt p{PMID}.py files are quarantined and downloaded again"""
+    pmids = [1, 2, 3]
+    server = {p:get_nihdict(p) for p in pmids}
+    with TemporaryDirectory() as dir_icite_py:
+        for pmid in pmids:
+            with open(join(dir_icite_py, f'p{pmid}.py'), 'w', encoding='utf-8') as prt:
+                NIHiCiteAPI.prt_dct(dict(server[pmid]), prt)
+        # Truncate PMID 2, as a killed writer would have before writes were atomic
+        with open(join(dir_icite_py, 'p2.py'), 'r+', encoding='utf-8') as ostrm:
+            ostrm.truncate(120)
+        api = ServerAPI(server)
+        with NIHiCiteDownloader(dir_icite_py, False, api=api) as dnldr:
+            assert [o.pmid for o in dnldr.get_icites(pmids)] == pmids
+        assert api.pmids_requested == [2]
+        assert [f[:6] for f in listdir(join(dir_icite_py, 'quarantine'))] == ['p2.py.']
+        # The file was written again, w/no temporary files left behind
+        assert sorted(f for f in listdir(dir_icite_py) if f != 'quarantine') == \
+            ['.lock', 'p1.py', 'p2.py', 'p3.py']
+        with NIHiCiteDownloader(dir_icite_py, False, api=ServerAPI(server)) as dnldr:
+            assert dnldr.get_icite(2).dct == dnldr.get_icites([2])[0].dct
+
+
+def test_quarantine_db():
+    """Test corrupt SQLite rows are quarantined and downloaded again"""
+    pmids = [1, 2, 3]
+    server = {p:get_nihdict(p) for p in pmids}
+    with TemporaryDirectory() as dir_icite_py:
+        api = ServerAPI(server)
+        with NIHiCiteDownloaderDb(dir_icite_py, False, api=api) as dnldr:
+            dnldr.nihdb.wr_nihdicts(server.values())
+            with dnldr.nihdb.conn as conn:
+                conn.execute("UPDATE icite SET nihdict = '{\"pmid\": 2,' WHERE pmid = 2")
+            assert [o.pmid for o in dnldr.get_icites(pmids)] == pmids
+            assert api.pmids_requested == [2]
+            num_quarantined = dnldr.nihdb.conn.execute(
+                'SELECT COUNT(*) FROM icite_quarantine').fetchone()[0]
+            assert num_quarantined == 1
+            assert dnldr.nihdb.get_num_pmids() == 3
+
+
+def test_lock():
+    """Test that only one process or thread holds the dir_icite_py lock"""
+    if fcntl is None:
+        return
+    with TemporaryDirectory() as dir_icite_py:
+        with NIHiCiteLock(dir_icite_py):
+            with open(join(dir_icite_py, NIHiCiteLock.basename), encoding='utf-8') as ifstrm:
+                try:
+                    fcntl.flock(ifstrm.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    assert False, 'EXPECTED THE LOCK TO BE HELD'
+                except BlockingIOError:
+                    pass
+        with open(join(dir_icite_py, NIHiCiteLock.basename), encoding='utf-8') as ifstrm:
+            fcntl.flock(ifstrm.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+if __name__ == '__main__':
+    test_quarantine_py()
+    test_quarantine_db()
+    test_lock()
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
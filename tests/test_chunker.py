@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""Test sizing chunks of PMIDs by URL length, latency, and payload size"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from pmidcite.icite.chunker import ChunkSizer
+from tests.pmids_i3 import PMIDS
+
+
+def test_chunker():
+    """Test sizing chunks of PMIDs by URL length, latency, and payload size"""
+    pmids = PMIDS[:5000]
+    len_url = len('https://icite.od.nih.gov/api/pubs?pmids=')
+
+    # Chunks never exceed the maximum URL length or 1,000 PMIDs
+    chunker = ChunkSizer()
+    chunks = chunker.split_list(pmids, len_url)
+    assert [p for c in chunks for p in c] == pmids
+    for chunk in chunks:
+        assert len(chunk) <= 1000
+        assert len_url + len(','.join(str(p) for p in chunk)) <= chunker.max_url_len
+
+    # Short PMIDs are sent 1,000 at a time
+    assert ChunkSizer().get_idx_end(list(range(1000, 3000)), 0, len_url) == 1000
+
+    # Slow or large responses shrink the chunk size; fast, small responses grow it back
+    chunker = ChunkSizer(target_secs=10.0, target_bytes=1000000)
+    chunker.update(800, secs=40.0, num_bytes=100000)
+    assert chunker.num_pmids == 200
+    chunker.update(200, secs=1.0, num_bytes=100000)
+    assert chunker.num_pmids == 300
+    chunker.update(300, secs=1.0, num_bytes=3000000)
+    assert chunker.num_pmids == 100
+    for _ in range(20):
+        chunker.update(chunker.num_pmids, secs=0.5, num_bytes=1000)
+    assert chunker.num_pmids == 1000
+
+
+if __name__ == '__main__':
+    test_chunker()
+
+# Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved.
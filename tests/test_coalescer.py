@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Test that PMIDs already being downloaded are not requested again"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from time import time
+from time import sleep
+from tempfile import TemporaryDirectory
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+
+from pmidcite.icite.coalescer import NIHiCiteCoalescer
+from pmidcite.icite.downloader import get_downloader
+from tests.icite_data import get_nihdict
+from tests.icite_data import ServerAPI
+
+
+class SlowAPI:
+    """Stand-in for NIHiCiteAPI which records the PMIDs requested"""
+
+    def __init__(self):
+        self.pmids_requested = []
+        self.lock = Lock()
+
+    def dnld_nihdicts(self, pmids):
+        """Return one dict per PMID after a delay"""
+        with self.lock:
+            self.pmids_requested.extend(pmids)
+        sleep(0.2)
+        return [{'pmid':p, 'cited_by':[1, 2]} for p in pmids]
+
+
+def test_coalescer():
+    """Test that PMIDs already being downloaded are not requested again"""
+    api = SlowAPI()
+    coalescer = NIHiCiteCoalescer(api)
+    pmid_lists = [[1, 2, 3, 4], [3, 4, 5, 6], [4, 6, 7, 7]]
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        results = list(executor.map(coalescer.dnld_nihdicts, pmid_lists))
+    # Each PMID was requested once
+    assert sorted(api.pmids_requested) == [1, 2, 3, 4, 5, 6, 7]
+    # Each caller receives its PMIDs in the order requested, w/o duplicates
+    for pmids, nihdicts in zip(pmid_lists, results):
+        assert [d['pmid'] for d in nihdicts] == list(dict.fromkeys(pmids))
+    # Each caller receives its own dict
+    pmid2dcts = {}
+    for nihdicts in results:
+        for dct in nihdicts:
+            pmid2dcts.setdefault(dct['pmid'], []).append(id(dct))
+    assert len(set(pmid2dcts[4])) == 3
+    assert not coalescer.pmid2future
+
+
+def test_coalescer_queries():
+    """Test PMIDs found by several queries, one after another, are requested only once"""
+    pmid2nihdict = {p:get_nihdict(p, cited_by=[p+100, 200]) for p in range(1, 7)}
+    pmid2nihdict.update((p, get_nihdict(p)) for p in list(range(101, 107)) + [200])
+    api = ServerAPI(pmid2nihdict)
+    coalescer = NIHiCiteCoalescer(api, max_done=100, max_secs=3600)
+    # As PubMedQueryToICite does: A new downloader for each query shares one coalescer
+    for pmids in [[1, 2, 3, 4], [3, 4, 5, 6], [2, 6]]:
+        dnldr = get_downloader(details_cites_refs='citations', dir_icite_py=None, coalescer=coalescer)
+        with dnldr:
+            pmid2paper = dnldr.get_pmid2paper(pmids)
+        assert list(pmid2paper.keys()) == pmids
+        assert [len(o.cited_by) for o in pmid2paper.values()] == [2]*len(pmids)
+    assert sorted(api.pmids_requested) == sorted(pmid2nihdict.keys()), api.pmids_requested
+    # Recent downloads older than max_secs are downloaded again
+    coalescer.pmid2done[1] = (time() - 7200, coalescer.pmid2done[1][1])
+    with get_downloader(dir_icite_py=None, coalescer=coalescer) as dnldr:
+        assert [o.pmid for o in dnldr.get_icites([1, 2])] == [1, 2]
+    assert api.pmids_requested[-1:] == [1], api.pmids_requested
+    # The API is set on the API given to the coalescer, not passed to get_downloader
+    for kws in [{'max_workers': 4}, {'fields': ['pmid', 'year']}, {'dnld_format': 'csv'}]:
+        try:
+            get_downloader(coalescer=coalescer, **kws)
+            assert False, kws
+        except RuntimeError:
+            pass
+
+
+
+def test_coalescer_fresh():
+    """Test downloaders download again by default, and always if forced or refreshing"""
+    pmid2nihdict = {1: get_nihdict(1)}
+    api = ServerAPI(pmid2nihdict)
+    # By default, only in-flight downloads are shared
+    with get_downloader(dir_icite_py=None, coalescer=NIHiCiteCoalescer(api)) as dnldr:
+        assert dnldr.get_icites([1])[0].get('citation_count') == pmid2nihdict[1]['citation_count']
+        pmid2nihdict[1]['citation_count'] = 99
+        assert dnldr.get_icites([1])[0].get('citation_count') == 99
+    assert api.pmids_requested == [1, 1], api.pmids_requested
+    # Forced downloads do not use the recent downloads
+    coalescer = NIHiCiteCoalescer(api, max_done=100)
+    with TemporaryDirectory() as dir_icite_py:
+        for cnt in [7, 8]:
+            pmid2nihdict[1]['citation_count'] = cnt
+            with get_downloader(force_download=True, dir_icite_py=dir_icite_py, coalescer=coalescer) as dnldr:
+                assert dnldr.get_icites([1])[0].get('citation_count') == cnt
+    assert api.pmids_requested == [1, 1, 1, 1], api.pmids_requested
+
+
+if __name__ == '__main__':
+    test_coalescer()
+    test_coalescer_queries()
+    test_coalescer_fresh()
+
+# Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved.
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Test NIHiCiteEntryCompact holds the same NIH iCite data as NIHiCiteEntry, in less memory"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from io import StringIO
+from pickle import dumps
+from pickle import loads
+from tracemalloc import start
+from tracemalloc import stop
+from tracemalloc import get_traced_memory
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from pmidcite.icite.api import NIHiCiteAPI
+from pmidcite.icite.coalescer import NIHiCiteCoalescer
+from pmidcite.icite.downloader import get_downloader
+from pmidcite.icite.dnldr.pmid_loader import NIHiCiteLoader
+from pmidcite.icite.entry import NIHiCiteEntry
+from pmidcite.icite.entry_compact import NIHiCiteEntryCompact
+from pmidcite.icite.nih_grouper import NihGrouper
+from pmidcite.icite.paper import NIHiCitePaper
+from tests.icite_data import get_nihdict
+from tests.icite_data import ServerAPI
+
+
+def test_entry_compact():
+    """Test NIHiCiteEntryCompact holds the same NIH iCite data as NIHiCiteEntry"""
+    nihdict = get_nihdict(33031632, cited_by=[1, 2, 3], references=[4, 5])
+    nihdict['cited_by_clin'] = [2]
+    nihdict['nih_percentile'] = None
+    nihdict['new_field'] = 'new'
+    compact = NIHiCiteEntryCompact.from_jsondct(dict(nihdict), 3)
+    nihentry = NIHiCiteEntry.from_jsondct(dict(nihdict), 3)
+    assert compact.get_dict() == nihentry.get_dict()
+    assert compact.get_dict() == NIHiCiteEntryCompact.from_entry(nihentry).get_dict()
+    assert str(compact) == str(nihentry)
+    assert compact.str_md() == nihentry.str_md()
+    assert compact.get_authors() == nihentry.get_authors()
+    for key in nihentry.get_attrnames():
+        if key not in {'all_citing_pmids', 'cited_by', 'cited_by_clin', 'references'}:
+            assert compact.get(key) == nihentry.get(key), key
+    assert list(compact.get('cited_by')) == [1, 2, 3]
+    assert list(compact.get('all_citing_pmids')) == [1, 2, 3]
+    # PMID lists are sorted once, at load
+    unsorted = NIHiCiteEntryCompact.from_jsondct({'pmid': 6, 'cited_by': [9, 7, 8], 'cited_by_clin': [8]}, 2)
+    assert list(unsorted.get('cited_by')) == [7, 8, 9]
+    assert unsorted.get_dict()['all_citing_pmids'] == {7, 8, 9}
+    # Clinical citations which are not in cited_by are merged in
+    merged = NIHiCiteEntryCompact.from_jsondct({'pmid': 6, 'cited_by': [9, 7], 'cited_by_clin': [8, 5, 7]}, 2)
+    assert list(merged.get('all_citing_pmids')) == [5, 7, 8, 9]
+    assert merged.get('num_cites_all') == 4
+    assert compact.get('num_cites_all') == 3
+    assert compact.get('unknown') is None
+    assert compact.get_assc_pmids(NIHiCiteEntry.associated_pmid_keys) == {1, 2, 3, 4, 5}
+    assert loads(dumps(compact)).get_dict() == compact.get_dict()
+    # Fields not downloaded using fl are not in the dict
+    partial = NIHiCiteEntryCompact.from_jsondct({'pmid': 7, 'year': 2021, 'citation_count': 4}, 5)
+    assert partial.get_dict() == NIHiCiteEntry.from_jsondct(
+        {'pmid': 7, 'year': 2021, 'citation_count': 4}, 5).get_dict()
+
+
+def test_paper_compact():
+    """Test a paper made of NIHiCiteEntryCompact prints the same as one made of NIHiCiteEntry"""
+    nihdicts = [get_nihdict(1, cited_by=[2, 3], references=[4])] + [get_nihdict(p) for p in [2, 3, 4]]
+    txts = []
+    for cls in [NIHiCiteEntry, NIHiCiteEntryCompact]:
+        pmid2icite = {d['pmid']:cls.from_jsondct(dict(d), 2) for d in nihdicts}
+        prt = StringIO()
+        NIHiCitePaper(1, pmid2icite).prt_summary(prt)
+        txts.append(prt.getvalue())
+    assert txts[0] == txts[1], txts
+    assert 'CIT' in txts[1] and 'REF' in txts[1]
+
+
+def test_entry_compact_memory():
+    """Test NIHiCiteEntryCompact uses less memory than NIHiCiteEntry"""
+    nihdicts = [get_nihdict(p, cited_by=list(range(p, p+40)), references=list(range(30)))
+                for p in range(1, 1001)]
+    nbytes_dct = _get_nbytes(NIHiCiteEntry, nihdicts)
+    nbytes_compact = _get_nbytes(NIHiCiteEntryCompact, nihdicts)
+    print(f'{nbytes_dct:,} bytes NIHiCiteEntry; {nbytes_compact:,} bytes NIHiCiteEntryCompact')
+    assert 3*nbytes_compact < 2*nbytes_dct
+
+
+def test_entry_cls():
+    """Test downloaders and loaders build NIHiCiteEntryCompact directly, if asked"""
+    # Attributes can be added to NIHiCiteEntry, which has a __dict__
+    nihentry = NIHiCiteEntry.from_jsondct(get_nihdict(1), 3)
+    nihentry.note = 'note'
+    assert loads(dumps(nihentry)).get_dict() == nihentry.get_dict()
+    server = {p:get_nihdict(p, cited_by=[p+1], references=[p+2]) for p in range(1, 10)}
+    for icite_cache in ['None', 'py', 'sqlite']:
+        with TemporaryDirectory() as dir_icite_py:
+            if icite_cache == 'py':
+                with open(join(dir_icite_py, 'p1.py'), 'w', encoding='utf-8') as prt:
+                    NIHiCiteAPI.prt_dct(server[1], prt)
+            coalescer = NIHiCiteCoalescer(ServerAPI(server))
+            kws = {} if icite_cache == 'None' else \
+                {'dir_icite_py': dir_icite_py, 'icite_cache': icite_cache}
+            with get_downloader(force_download=False, coalescer=coalescer,
+                                entry_cls=NIHiCiteEntryCompact, **kws) as dnldr:
+                # Downloaded, then loaded from the cache
+                for _ in range(2):
+                    nihentries = dnldr.get_icites([1, 2, 3]) + [dnldr.get_icite(4)]
+                    assert [type(o) for o in nihentries] == 4*[NIHiCiteEntryCompact], icite_cache
+                    assert [o.get_dict() for o in nihentries] == [NIHiCiteEntry.from_jsondct(
+                        dict(server[o.pmid]), o.get('nih_group')).get_dict() for o in nihentries]
+            if icite_cache == 'py':
+                loader = NIHiCiteLoader(
+                    NihGrouper(), dir_icite_py, NIHiCiteEntry.associated_pmid_keys,
+                    entry_cls=NIHiCiteEntryCompact)
+                nihentries = loader.load_icite_mods_all([1, 2])
+                assert {o.pmid for o in nihentries} == {1, 2, 3, 4}
+                assert {type(o) for o in nihentries} == {NIHiCiteEntryCompact}
+
+
+def _get_nbytes(cls, nihdicts):
+    """Get the memory allocated to hold entries created from copies of NIH iCite dicts"""
+    start()
+    nihdicts = [{k:(list(v) if isinstance(v, list) else v) for k, v in d.items()} for d in nihdicts]
+    nihentries = [cls.from_jsondct(d, 2) for d in nihdicts]
+    # NIHiCiteEntry keeps the downloaded dicts; NIHiCiteEntryCompact does not
+    nihdicts.clear()
+    nbytes = get_traced_memory()[0]
+    stop()
+    assert len(nihentries) == 1000
+    return nbytes
+
+
+if __name__ == '__main__':
+    test_entry_compact()
+    test_paper_compact()
+    test_entry_compact_memory()
+    test_entry_cls()
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
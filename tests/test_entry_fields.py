@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Test that NIH citation data containing only some fields (fl=) can be used"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from io import StringIO
+
+from pmidcite.icite.api import NIHiCiteAPI
+from pmidcite.icite.entry import NIHiCiteEntry
+from pmidcite.icite.nih_grouper import NihGrouper
+from pmidcite.icite.paper import NIHiCitePaper
+from pmidcite.icite.papers import NIHiCitePapers
+from pmidcite.icite.dnldr.pmid_dnlder_only import NIHiCiteDownloaderOnly
+
+
+def test_entry_fields():
+    """Test that NIH citation data containing only some fields (fl=) can be used"""
+    # The PMID is always requested because it is used to key each entry
+    api = NIHiCiteAPI(fl=['year', 'nih_percentile', 'citation_count'])
+    assert api.get_fields() == ['pmid', 'year', 'nih_percentile', 'citation_count']
+    assert api._get_params() == '&fl=pmid,year,nih_percentile,citation_count'
+
+    # Citations and references are requested if they will be printed
+    NIHiCiteDownloaderOnly(details_cites_refs='references', api=api)
+    assert api.get_fields() == ['pmid', 'year', 'nih_percentile', 'citation_count', 'references']
+
+    # All fields are requested by default
+    assert NIHiCiteAPI().get_fields() is None
+    assert NIHiCiteAPI()._get_params() == ''
+
+    # Partial entries are carried into NIHiCiteEntry
+    nihdct = api._adjust_json_entry({
+        'pmid': 33031632, 'year': 2020, 'nih_percentile': 45.3, 'citation_count': 12})
+    grpr = NihGrouper()
+    entry = NIHiCiteEntry.from_jsondct(nihdct, grpr.get_group(nihdct.get('nih_percentile')))
+    assert entry.get('num_cites_all') == 12
+    assert entry.get('num_refs') == 0
+    assert entry.get('nih_perc') == 45
+    assert entry.get('title') is None
+    print(entry)
+    assert '33031632' in str(entry)
+
+
+
+def test_paper_fields():
+    """Test that papers containing only some fields (fl=) can be sorted and printed"""
+    api = NIHiCiteAPI(fl=['nih_percentile', 'citation_count'])
+    dnldr = NIHiCiteDownloaderOnly(details_cites_refs={'cited_by', 'references'}, api=api)
+    grpr = NihGrouper()
+    pmid2icite = {}
+    for pmid, cited_by, nih_perc in [(1, [2, 3, 4], 50.0), (2, [], None), (3, [], 90.0), (4, [], 10.0)]:
+        nihdct = {'pmid': pmid, 'nih_percentile': nih_perc, 'citation_count': len(cited_by),
+                  'cited_by': cited_by, 'references': []}
+        assert set(nihdct) == set(api.get_fields())
+        pmid2icite[pmid] = NIHiCiteEntry.from_jsondct(nihdct, grpr.get_group(nih_perc))
+    paper = NIHiCitePaper(1, pmid2icite)
+    for sortby in NIHiCitePaper.sortby_dct:
+        assert len(paper.get_sorted(paper.cited_by, sortby)) == 3
+    assert [o.pmid for o in paper.get_sorted(paper.cited_by, 'nih_group')] == [2, 3, 4]
+    prt = StringIO()
+    dnldr.prt_papers({1: paper}, prt)
+    assert sum(ln[:3] == 'CIT' for ln in prt.getvalue().splitlines()) == 3, prt.getvalue()
+    assert not NIHiCitePapers({1: paper}).author2cnt
+
+
+if __name__ == '__main__':
+    test_entry_fields()
+    test_paper_fields()
+
+# Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved.
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Test that all citing PMIDs are combined only when read and that counts match the combined set"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from pmidcite.icite.entry import NIHiCiteEntry
+from pmidcite.icite.entry_compact import NIHiCiteEntryCompact
+from tests.icite_data import get_nihdict
+
+
+def test_entry_lazy():
+    """Test that all citing PMIDs are combined only when read and that counts match the combined set"""
+    # cited_by_clin is usually a subset of cited_by; PMID 9 shows it may not be
+    for cit_clin, cited_by in [([2], [1, 2, 3]), ([], [1, 2, 3]), ([2, 9], [1, 2, 3]),
+                               ([2], None), (None, [1, 2]), (None, None)]:
+        nihdict = get_nihdict(5)
+        nihdict['citation_count'] = 7
+        for key, val in [('cited_by_clin', cit_clin), ('cited_by', cited_by)]:
+            if val is None:
+                del nihdict[key]
+            else:
+                nihdict[key] = val
+        pmids_exp = None if cit_clin is None and cited_by is None else \
+            set(cit_clin or []).union(cited_by or [])
+        num_exp = len(pmids_exp) if pmids_exp is not None else 7
+
+        nihentry = NIHiCiteEntry.from_jsondct(dict(nihdict), 2)
+        assert 'all_citing_pmids' not in nihentry.dct
+        assert nihentry.get('num_cites_all') == num_exp, (cit_clin, cited_by)
+        pmids_act = nihentry.get('all_citing_pmids')
+        assert (set(pmids_act) if pmids_act is not None else None) == pmids_exp
+        assert 'all_citing_pmids' in nihentry.get_dict()
+
+        compact = NIHiCiteEntryCompact.from_jsondct(dict(nihdict), 2)
+        assert compact.get('num_cites_all') == num_exp, (cit_clin, cited_by)
+        pmids_act = compact.get('all_citing_pmids')
+        assert (set(pmids_act) if pmids_act is not None else None) == pmids_exp
+
+
+if __name__ == '__main__':
+    test_entry_lazy()
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Test the iCite cache commands: stats, verify, evict, and compact"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from os import utime
+from os import listdir
+from os.path import join
+from io import StringIO
+from time import time
+from tempfile import TemporaryDirectory
+
+from pmidcite.cfg import Cfg
+from pmidcite.cli.icite_cache import NIHiCiteCacheCli
+from pmidcite.icite.api import NIHiCiteAPI
+from pmidcite.icite.dnldr.pmid_db import NIHiCiteDb
+from pmidcite.icite.dnldr.pmid_evict import NIHiCiteEvictor
+from pmidcite.icite.dnldr.pmid_layout import NIHiCitePyLayout
+from tests.icite_data import get_nihdict
+
+
+def test_evictor():
+    """Test choosing entries to evict by age, size, and number of entries"""
+    ntstat = NIHiCiteEvictor.ntstat
+    tic = time()
+    # PMID 1 was downloaded first; PMID 3 was read least recently
+    pmid2stat = {
+        1: ntstat(100, tic - 50*86400, tic - 1),
+        2: ntstat(100, tic - 2*86400, tic - 2),
+        3: ntstat(100, tic - 1*86400, tic - 3),
+    }
+    assert not NIHiCiteEvictor().is_bounded()
+    assert NIHiCiteEvictor(max_days=30).get_pmids_evict(pmid2stat) == {1}
+    assert NIHiCiteEvictor(max_entries=2).get_pmids_evict(pmid2stat) == {3}
+    assert NIHiCiteEvictor(max_entries=2, policy='oldest').get_pmids_evict(pmid2stat) == {1}
+    assert NIHiCiteEvictor(max_bytes=150).get_pmids_evict(pmid2stat) == {3, 2}
+    assert NIHiCiteEvictor(max_days=30, max_bytes=150).get_pmids_evict(pmid2stat) == {1, 3}
+    assert NIHiCiteEvictor(max_bytes=300).get_pmids_evict(pmid2stat) == set()
+
+
+def test_icite_cache_cli():
+    """Test the iCite cache commands: stats, verify, evict, and compact"""
+    pmids = [1, 2, 3, 4, 5]
+    tic = time()
+    with TemporaryDirectory() as dir_icite_py:
+        for pmid in pmids:
+            with open(join(dir_icite_py, f'p{pmid}.py'), 'w', encoding='utf-8') as prt:
+                NIHiCiteAPI.prt_dct(get_nihdict(pmid), prt)
+            # PMID 1 was downloaded 100 days ago and PMID 5 was downloaded today
+            secs = tic - (5 - pmid)*25*86400
+            utime(join(dir_icite_py, f'p{pmid}.py'), (secs, secs))
+
+        # stats: the age of each entry is the age of its p{PMID}.py file
+        txt = _run(dir_icite_py, 'stats')
+        assert '              5 entries\n' in txt, txt
+        assert '              2 entries   30-90   days\n' in txt, txt
+
+        # verify: a truncated file and a file containing the wrong PMID are quarantined
+        with open(join(dir_icite_py, 'p2.py'), 'r+', encoding='utf-8') as ostrm:
+            ostrm.truncate(120)
+        with open(join(dir_icite_py, 'p3.py'), 'w', encoding='utf-8') as prt:
+            NIHiCiteAPI.prt_dct(get_nihdict(33), prt)
+        txt = _run(dir_icite_py, 'verify', '--num_procs', '2')
+        assert '3 of 5 p{PMID}.py files are OK' in txt, txt
+        assert sorted(f[:5] for f in listdir(join(dir_icite_py, 'quarantine'))) == ['p2.py', 'p3.py']
+        assert sorted(NIHiCitePyLayout(dir_icite_py).get_pmid2file()) == [1, 4, 5]
+
+        # evict: PMID 1 is older than 60 days
+        _run(dir_icite_py, 'evict', '--max_days', '60')
+        assert sorted(NIHiCitePyLayout(dir_icite_py).get_pmid2file()) == [4, 5]
+
+        # compact: the p{PMID}.py files are moved into SQLite, keeping their download times
+        _run(dir_icite_py, 'compact', '--num_procs', '1')
+        assert not NIHiCitePyLayout(dir_icite_py).get_pmid2file()
+        nihdb = NIHiCiteDb(NIHiCiteDb.get_filename(dir_icite_py))
+        assert nihdb.get_pmids() == [4, 5]
+        pmid2downloaded = nihdb.get_pmid2downloaded([4, 5])
+        assert abs(pmid2downloaded[4] - (tic - 25*86400)) < 1, pmid2downloaded
+        assert nihdb.load_nihdicts([4]) == [get_nihdict(4)]
+
+        # verify: a corrupt SQLite entry is quarantined
+        with nihdb.conn as conn:
+            conn.execute("UPDATE icite SET nihdict = '{\"pmid\": 4,' WHERE pmid = 4")
+        txt = _run(dir_icite_py, 'verify', '--num_procs', '1')
+        assert '1 of 2 SQLite entries are OK' in txt, txt
+        assert nihdb.get_pmids() == [5]
+
+        # evict: the limits apply to the p{PMID}.py files and SQLite together
+        for pmid, days in [(6, 10), (7, 1)]:
+            with open(join(dir_icite_py, f'p{pmid}.py'), 'w', encoding='utf-8') as prt:
+                NIHiCiteAPI.prt_dct(get_nihdict(pmid), prt)
+            secs = tic - days*86400
+            utime(join(dir_icite_py, f'p{pmid}.py'), (secs, secs))
+        txt = _run(dir_icite_py, 'evict', '--max_entries', '2')
+        assert '1 p{PMID}.py files evicted' in txt, txt
+        assert '0 iCite entries evicted' in txt, txt
+        assert sorted(NIHiCitePyLayout(dir_icite_py).get_pmid2file()) == [7]
+        assert nihdb.get_pmids() == [5]
+        _run(dir_icite_py, 'evict', '--max_entries', '1', '--policy', 'oldest')
+        assert not NIHiCitePyLayout(dir_icite_py).get_pmid2file()
+        assert nihdb.get_pmids() == [5]
+
+        # evict: keep at most 0 SQLite entries
+        _run(dir_icite_py, 'evict', '--max_entries', '0')
+        assert nihdb.get_num_pmids() == 0
+        nihdb.close()
+
+
+def _run(dir_icite_py, *args):
+    """Run one iCite cache command and return what it printed"""
+    prt = StringIO()
+    NIHiCiteCacheCli(Cfg(check=False)).cli(['--dir_icite_py', dir_icite_py, *args], prt)
+    return prt.getvalue()
+
+
+if __name__ == '__main__':
+    test_evictor()
+    test_icite_cache_cli()
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
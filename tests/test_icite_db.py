@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Test storing NIH iCite data in one SQLite database"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from tempfile import TemporaryDirectory
+
+from pmidcite.icite.downloader import get_downloader
+from pmidcite.icite.dnldr.pmid_db import NIHiCiteDb
+from pmidcite.icite.dnldr.pmid_dnlder_db import NIHiCiteDownloaderDb
+from tests.icite_data import get_nihdict
+
+
+def test_icite_db():
+    """Test storing NIH iCite data in one SQLite database"""
+    pmids = [33031632, 32960048, 31818253]
+    nihdicts = [get_nihdict(p, cited_by=[1, 2, 3], references=[4, 5]) for p in pmids]
+    with TemporaryDirectory() as dir_icite_py:
+        nihdb = NIHiCiteDb(NIHiCiteDb.get_filename(dir_icite_py))
+        nihdb.wr_nihdicts(nihdicts)
+        assert nihdb.get_num_pmids() == 3
+        assert nihdb.get_pmids_cached(pmids + [123]) == set(pmids)
+        assert sorted(nihdb.load_nihdicts(pmids), key=lambda d: d['pmid']) == \
+            sorted(nihdicts, key=lambda d: d['pmid'])
+        nihdb.close()
+
+        # The SQLite database is found in dir_icite_py and used
+        with get_downloader(force_download=False, dir_icite_py=dir_icite_py) as dnldr:
+            assert isinstance(dnldr, NIHiCiteDownloaderDb)
+            nihentries = dnldr.get_icites(pmids)
+            assert [o.pmid for o in nihentries] == pmids
+            assert nihentries[0].get('num_cites_all') == 3
+            assert dnldr.get_icite(pmids[1]).pmid == pmids[1]
+
+
+if __name__ == '__main__':
+    test_icite_db()
+
+# Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved.
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Test migrating the p{PMID}.py files in dir_icite_py between flat and sharded layouts"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from os import listdir
+from os.path import join
+from os.path import exists
+from tempfile import TemporaryDirectory
+
+from pmidcite.cfg import Cfg
+from pmidcite.cli.icite_cache import NIHiCiteCacheCli
+from pmidcite.icite.api import NIHiCiteAPI
+from pmidcite.icite.dnldr.pmid_layout import NIHiCitePyLayout
+from pmidcite.icite.dnldr.pmid_dnlder import NIHiCiteDownloader
+from tests.icite_data import get_nihdict
+
+
+def test_icite_layout():
+    """Test migrating the p{PMID}.py files in dir_icite_py between flat and sharded layouts"""
+    pmids = [33031632, 32960048, 31818253, 7]
+    with TemporaryDirectory() as dir_icite_py:
+        for pmid in pmids:
+            with open(join(dir_icite_py, f'p{pmid}.py'), 'w', encoding='utf-8') as prt:
+                NIHiCiteAPI.prt_dct(get_nihdict(pmid), prt)
+        assert NIHiCitePyLayout(dir_icite_py).layout == 'flat'
+
+        # Migrate to sharded subdirectories
+        NIHiCiteCacheCli(Cfg(check=False)).cli(['--dir_icite_py', dir_icite_py, 'migrate', 'sharded'])
+        pylayout = NIHiCitePyLayout(dir_icite_py)
+        assert pylayout.layout == 'sharded'
+        assert pylayout.get_file_pmid(33031632) == join(dir_icite_py, '33', '03', 'p33031632.py')
+        assert pylayout.get_file_pmid(7) == join(dir_icite_py, '00', '07', 'p7.py')
+        assert sorted(pylayout.get_pmid2file()) == sorted(pmids)
+        assert not any(f.endswith('.py') for f in listdir(dir_icite_py))
+
+        # The downloader and loader find the sharded files
+        with NIHiCiteDownloader(dir_icite_py, False) as dnldr:
+            assert dnldr.loader.get_file_pmid(32960048) == join(dir_icite_py, '32', '96', 'p32960048.py')
+            assert not dnldr._get_pmids_missing(pmids)
+            assert [o.pmid for o in dnldr.get_icites(pmids)] == pmids
+
+        # Migrate back to one flat directory
+        assert pylayout.migrate('flat') == len(pmids)
+        assert sorted(f for f in listdir(dir_icite_py) if f != '.lock') == sorted(f'p{p}.py' for p in pmids)
+        assert not exists(join(dir_icite_py, NIHiCitePyLayout.file_sharded))
+
+
+def test_pmids_cached():
+    """Test finding cached PMIDs by listing directories matches checking each file"""
+    pmids_cached = [33031632, 33031633, 32960048, 7]
+    pmids_req = pmids_cached + [33031634, 12345678, 8]
+    with TemporaryDirectory() as dir_icite_py:
+        for layout in NIHiCitePyLayout.layouts:
+            pylayout = NIHiCitePyLayout(dir_icite_py, layout)
+            for pmid in pmids_cached:
+                file_pmid = pylayout.get_file_pmid(pmid)
+                pylayout.mk_dir_pmid(file_pmid)
+                with open(file_pmid, 'w', encoding='utf-8') as prt:
+                    NIHiCiteAPI.prt_dct(get_nihdict(pmid), prt)
+            # Check each file exists
+            assert pylayout.get_pmids_cached(pmids_req) == set(pmids_cached)
+            # List directories
+            pylayout.min_pmids_listdir = 1
+            assert pylayout.get_pmids_cached(pmids_req) == set(pmids_cached)
+            assert pylayout.get_pmids_cached([8]) == set()
+
+
+def test_pmids_cached_listdir():
+    """Test a directory is listed only if it is not much larger than the PMIDs checked"""
+    pmids_cached = list(range(1000, 1400))
+    with TemporaryDirectory() as dir_icite_py:
+        pylayout = ListdirLayout(dir_icite_py, 'flat')
+        for pmid in pmids_cached:
+            with open(pylayout.get_file_pmid(pmid), 'w', encoding='utf-8') as prt:
+                prt.write('')
+        # 300 PMIDs are checked in 400 files: List the directory
+        assert pylayout.get_pmids_cached(list(range(900, 1200))) == set(range(1000, 1200))
+        assert pylayout.num_listdir == 1 and pylayout.dir2num[dir_icite_py] == 400
+        # 64 PMIDs are checked in 400 files: Check each file exists
+        assert pylayout.get_pmids_cached(list(range(1380, 1444))) == set(range(1380, 1400))
+        assert pylayout.num_listdir == 1
+
+
+class ListdirLayout(NIHiCitePyLayout):
+    """NIHiCitePyLayout which counts the directories listed"""
+
+    def __init__(self, dir_icite_py, layout):
+        super().__init__(dir_icite_py, layout)
+        self.num_listdir = 0
+
+    def _get_pmids_dir(self, dir_files):
+        self.num_listdir += 1
+        return super()._get_pmids_dir(dir_files)
+
+
+if __name__ == '__main__':
+    test_icite_layout()
+    test_pmids_cached()
+    test_pmids_cached_listdir()
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Test reading p{PMID}.py files as literals matches importing them"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from os.path import join
+from tempfile import TemporaryDirectory
+from timeit import default_timer
+from importlib.util import spec_from_file_location
+from importlib.util import module_from_spec
+
+from pmidcite.icite.api import NIHiCiteAPI
+from pmidcite.icite.dnldr.pmid_literal import NIHiCiteLiteral
+from tests.icite_data import get_nihdict
+
+
+def test_icite_literal():
+    """Test reading p{PMID}.py files as literals matches importing them"""
+    nihdicts = [
+        get_nihdict(1, cited_by=[2, 3, 4], references=[5]),
+        get_nihdict(2),
+        {**get_nihdict(3), 'title': 'A "quoted" title', 'nih_percentile': None},
+        {**get_nihdict(4), 'title': 'A title\nwhich spans two lines', 'year': -1},
+        {**get_nihdict(5), 'authors': [{'fullName': "D'Arcy O'Neil"}]},
+    ]
+    with TemporaryDirectory() as dir_icite_py:
+        for nihdict in nihdicts:
+            file_pmid = join(dir_icite_py, f'p{nihdict["pmid"]}.py')
+            with open(file_pmid, 'w', encoding='utf-8') as prt:
+                NIHiCiteAPI.prt_dct(nihdict, prt)
+            act = NIHiCiteLiteral.load_nihdict(file_pmid)
+            assert act == _exec_icite(file_pmid), f'{act}'
+            assert act == nihdict
+
+        # Reading literals is faster than importing the module
+        file_pmid = join(dir_icite_py, 'p1.py')
+        tic = default_timer()
+        for _ in range(200):
+            _exec_icite(file_pmid)
+        secs_exec = default_timer() - tic
+        tic = default_timer()
+        for _ in range(200):
+            NIHiCiteLiteral.load_nihdict(file_pmid)
+        secs_literal = default_timer() - tic
+        print(f'{secs_exec:8.4f} secs exec_module\n{secs_literal:8.4f} secs NIHiCiteLiteral')
+        assert secs_literal < secs_exec
+
+    # No code is executed
+    for text in ['ICITE = {\n    \'pmid\': __import__("os").getpid(),\n}\n', 'x = 1\n']:
+        try:
+            NIHiCiteLiteral.get_nihdict(text)
+            assert False, text
+        except ValueError:
+            pass
+
+
+def _exec_icite(file_pmid):
+    """Import a p{PMID}.py file, as done before NIHiCiteLiteral"""
+    spec = spec_from_file_location("module.name", file_pmid)
+    mod = module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod.ICITE
+
+
+if __name__ == '__main__':
+    test_icite_literal()
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
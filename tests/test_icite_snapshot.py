@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Test writing the NIH iCite cache to a columnar snapshot and loading it memory-mapped"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from pmidcite.cfg import Cfg
+from pmidcite.cli.icite_cache import NIHiCiteCacheCli
+from pmidcite.icite.api import NIHiCiteAPI
+from pmidcite.icite.nih_grouper import NihGrouper
+from pmidcite.icite.dnldr.pmid_db import NIHiCiteDb
+from pmidcite.icite.dnldr.pmid_snapshot import NIHiCiteSnapshot
+from pmidcite.icite.dnldr.pmid_snapshot_loader import NIHiCiteSnapshotLoader
+from tests.icite_data import get_nihdict
+
+
+def test_icite_snapshot():
+    """Test writing the NIH iCite cache to a columnar snapshot and loading it memory-mapped"""
+    nihdicts = [
+        get_nihdict(7, cited_by=[33031632, 31818253], references=[5]),
+        {**get_nihdict(31818253), 'nih_percentile': None, 'is_clinical': None, 'year': None},
+        get_nihdict(33031632, references=[7, 31818253]),
+    ]
+    with TemporaryDirectory() as dir_icite_py:
+        # Snapshot the p{PMID}.py cache
+        for nihdict in reversed(nihdicts):
+            with open(join(dir_icite_py, f'p{nihdict["pmid"]}.py'), 'w', encoding='utf-8') as prt:
+                NIHiCiteAPI.prt_dct(nihdict, prt)
+        file_py = join(dir_icite_py, 'py.snapshot')
+        NIHiCiteCacheCli(Cfg(check=False)).cli(['--dir_icite_py', dir_icite_py, 'snapshot', file_py])
+        _chk_snapshot(file_py, nihdicts)
+
+        # Snapshot the SQLite cache
+        nihdb = NIHiCiteDb(NIHiCiteDb.get_filename(dir_icite_py))
+        nihdb.wr_nihdicts(nihdicts)
+        nihdb.close()
+        file_db = join(dir_icite_py, 'db.snapshot')
+        NIHiCiteCacheCli(Cfg(check=False)).cli(['--dir_icite_py', dir_icite_py, 'snapshot', file_db])
+        _chk_snapshot(file_db, nihdicts)
+
+        # PMIDs must be added in order
+        try:
+            NIHiCiteSnapshot().add_nihdicts(reversed(nihdicts))
+            assert False, 'EXPECTED RuntimeError'
+        except RuntimeError:
+            pass
+
+
+def _chk_snapshot(file_snapshot, nihdicts):
+    """Check that the snapshot contains the NIH iCite dicts"""
+    with NIHiCiteSnapshotLoader(NihGrouper(), file_snapshot) as loader:
+        assert len(loader) == len(nihdicts)
+        for nihdict in nihdicts:
+            assert loader.get_nihdict(nihdict['pmid']) == nihdict
+        assert loader.get_nihdict(8) is None
+        assert loader.get_pmids(7, 'cited_by') == [33031632, 31818253]
+        assert loader.get_pmids_cached([7, 8, 33031632]) == {7, 33031632}
+        icites = loader.load_icite_mods_all([7])
+        assert [o.pmid for o in icites[:1]] == [7]
+        assert set(o.pmid for o in icites[1:]) == {33031632, 31818253}
+
+
+if __name__ == '__main__':
+    test_icite_snapshot()
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
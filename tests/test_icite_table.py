@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Test NIHiCiteTable groups, sorts, and filters papers as the per-entry functions do"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from random import Random
+
+from pmidcite.icite.entry import NIHiCiteEntry
+from pmidcite.icite.entry_compact import NIHiCiteEntryCompact
+from pmidcite.icite.nih_grouper import NihGrouper
+from pmidcite.icite.paper import NIHiCitePaper
+from pmidcite.icite.table import NIHiCiteTable
+from tests.icite_data import get_nihdict
+
+
+def test_icite_table():
+    """Test NIHiCiteTable groups, sorts, and filters papers as the per-entry functions do"""
+    nihgrouper = NihGrouper()
+    nihdicts = _get_nihdicts(500)
+    for cls in [NIHiCiteEntry, NIHiCiteEntryCompact]:
+        icites = [cls.from_jsondct(dict(d), nihgrouper.get_group(d['nih_percentile'])) for d in nihdicts]
+        table = NIHiCiteTable.from_icites(icites)
+        assert len(table) == 500
+        assert table.get_pmids() == [o.pmid for o in icites]
+
+        # Vectorized NihGrouper.get_group
+        assert table.get_groups(nihgrouper).tolist() == [o.get('nih_group') for o in icites]
+        grpr2 = NihGrouper(10.0, 20.0, 30.0, 40.0)
+        assert table.get_groups(grpr2).tolist() == [grpr2.get_group(d['nih_percentile']) for d in nihdicts]
+        counts = table.get_group_counts()
+        assert counts.tolist() == [sum(o.get('nih_group') == g for o in icites) for g in range(6)]
+        assert table.get('nih_perc').tolist() == [o.get('nih_perc') for o in icites]
+
+        # Vectorized sorts
+        for sortby, fnc in NIHiCitePaper.sortby_dct.items():
+            if sortby == 'year':
+                continue  # sortby_year can not compare papers w/no NIH percentile
+            exp = [o.pmid for o in sorted(icites, key=fnc)]
+            assert table.get_sorted(sortby).get_pmids() == exp, sortby
+            assert [o.pmid for o in table.get_sorted(sortby).get_icites()] == exp
+        icites_pct = [o for o in icites if o.get('nih_percentile') is not None]
+        assert NIHiCiteTable.from_icites(icites_pct).get_sorted('year').get_pmids() == \
+            [o.pmid for o in sorted(icites_pct, key=NIHiCitePaper.sortby_dct['year'])]
+
+        # Vectorized filters
+        mask = table.get_mask_groups(['i', 4]) & table.get_mask_years(2010, 2015)
+        assert table.filter(mask).get_pmids() == [
+            o.pmid for o in icites if o.get('nih_group') in {4, 5} and 2010 <= o.get('year') <= 2015]
+        assert table.filter(table.get_mask_flags('Hc')).get_pmids() == [
+            o.pmid for o in icites if o.get_aart_translation()[0] == 'H' and o.get('num_clin')]
+        assert table.filter(table.get_mask_flags('RPHAMCc')).get_pmids() == [
+            o.pmid for o in icites if o.get_aart_type() + o.get_aart_translation() == 'RPHAMCc']
+    assert NIHiCiteTable.from_icites([]).get_pmids() == []
+
+
+def _get_nihdicts(num):
+    """Get NIH iCite data for papers w/various years, percentiles, counts, and flags"""
+    rng = Random(7)
+    nihdicts = []
+    for pmid in rng.sample(range(1, 10*num), num):
+        nihdict = get_nihdict(pmid, references=list(range(rng.randrange(5))))
+        nihdict['year'] = rng.randrange(2005, 2021)
+        nihdict['nih_percentile'] = rng.choice([None, -1, 2.1, 15.7, 50.5, 97.5, 99.9, rng.uniform(0, 100)])
+        nihdict['citation_count'] = rng.randrange(4)
+        nihdict['cited_by_clin'] = list(range(rng.randrange(3)))
+        for key in ['is_research_article', 'provisional', 'is_clinical']:
+            nihdict[key] = rng.random() < 0.5
+        for key in ['human', 'animal', 'molecular_cellular']:
+            nihdict[key] = rng.choice([0.0, 0.5, 1.0])
+        nihdicts.append(nihdict)
+    return nihdicts
+
+
+if __name__ == '__main__':
+    test_icite_table()
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
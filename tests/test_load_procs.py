@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""Test loading cached p{PMID}.py files in worker processes"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from pmidcite.icite.api import NIHiCiteAPI
+from pmidcite.icite.dnldr.pmid_dnlder import NIHiCiteDownloader
+from tests.icite_data import get_nihdict
+
+
+def test_load_procs():
+    """Test loading cached p{PMID}.py files in worker processes"""
+    pmids = list(range(100, 150))
+    with TemporaryDirectory() as dir_icite_py:
+        for pmid in pmids:
+            with open(join(dir_icite_py, f'p{pmid}.py'), 'w', encoding='utf-8') as prt:
+                NIHiCiteAPI.prt_dct(get_nihdict(pmid, cited_by=[pmid+1], references=[pmid-1]), prt)
+        with NIHiCiteDownloader(dir_icite_py, False) as dnldr:
+            exp = [o.dct for o in dnldr.get_icites(pmids)]
+        with NIHiCiteDownloader(dir_icite_py, False, num_procs=3) as dnldr:
+            dnldr.min_pmids_procs = 10
+            act = [o.dct for o in dnldr.get_icites(pmids)]
+        assert [d['pmid'] for d in act] == pmids
+        assert act == exp
+
+
+if __name__ == '__main__':
+    test_load_procs()
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Test keeping recently used NIHiCiteEntry objects in memory"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from os import remove
+from os import utime
+from os.path import join
+from time import time
+from tempfile import TemporaryDirectory
+
+from pmidcite.icite.api import NIHiCiteAPI
+from pmidcite.icite.entry import NIHiCiteEntry
+from pmidcite.icite.entry_compact import NIHiCiteEntryCompact
+from pmidcite.icite.lru import NIHiCiteLru
+from pmidcite.icite.refresh import NIHiCiteRefresh
+from pmidcite.icite.downloader import get_downloader
+from pmidcite.icite.dnldr.pmid_dnlder import NIHiCiteDownloader
+from pmidcite.icite.dnldr.pmid_dnlder_db import NIHiCiteDownloaderDb
+from tests.icite_data import get_nihdict
+from tests.icite_data import ServerAPI
+
+
+def test_lru_limits():
+    """Test dropping the least recently used entries"""
+    nihentries = [NIHiCiteEntry.from_jsondct(get_nihdict(p), 3) for p in range(1, 6)]
+    # Limit the number of entries
+    lru = NIHiCiteLru(max_entries=3)
+    lru.add_entries(nihentries[:3])
+    assert lru.get(1) is nihentries[0]           # 1 is now the most recently used
+    lru.add_entries(nihentries[3:])
+    assert set(lru.pmid2entry) == {1, 4, 5}
+    assert lru.get(2) is None
+    assert set(lru.get_pmid2entry([1, 2, 3, 4])) == {1, 4}
+    assert (lru.hits, lru.misses) == (3, 3), lru.str_stats()
+    # Limit the size
+    nbytes = NIHiCiteLru.get_nbytes(nihentries[0])
+    lru = NIHiCiteLru(max_bytes=2*nbytes + nbytes//2)
+    lru.add_entries(nihentries)
+    assert set(lru.pmid2entry) == {4, 5}
+    assert lru.nbytes == sum(lru.pmid2nbytes.values())
+    print(lru.str_stats())
+
+
+def test_lru_nbytes():
+    """Test the size of compact entries is estimated from their slots, w/o building a dict"""
+    nihdict = get_nihdict(1, cited_by=list(range(1000, 3000)), references=list(range(50)))
+    nihentry = NIHiCiteEntry.from_jsondct(dict(nihdict), 3)
+    compact = NoDictCompact.from_jsondct(dict(nihdict), 3)
+    nbytes = NIHiCiteLru.get_nbytes(compact)
+    assert nbytes == compact.get_nbytes()
+    # The PMIDs are stored as 4-byte unsigned ints in array('I')
+    assert 4*2050 < nbytes < 4*2050 + 4000, nbytes
+    assert nbytes < NIHiCiteLru.get_nbytes(nihentry)//4
+    lru = NIHiCiteLru(max_bytes=nbytes)
+    lru.add_entries([compact])
+    assert lru.nbytes == nbytes
+
+
+class NoDictCompact(NIHiCiteEntryCompact):
+    """NIHiCiteEntryCompact which fails if its data is copied into a dict"""
+
+    __slots__ = ()
+
+    def get_dict(self):
+        raise RuntimeError('get_dict CALLED')
+
+
+def test_lru_downloader():
+    """Test the downloader returns entries in memory without loading them again"""
+    pmids = [33031632, 32960048, 31818253]
+    with TemporaryDirectory() as dir_icite_py:
+        for pmid in pmids:
+            with open(join(dir_icite_py, f'p{pmid}.py'), 'w', encoding='utf-8') as prt:
+                NIHiCiteAPI.prt_dct(get_nihdict(pmid), prt)
+        lru = NIHiCiteLru(max_entries=100)
+        with get_downloader(force_download=False, dir_icite_py=dir_icite_py, lru=lru) as dnldr:
+            nihentries = dnldr.get_icites(pmids)
+            assert (lru.hits, lru.misses) == (0, 3)
+            # Entries are returned from memory even though the files are gone
+            for pmid in pmids:
+                remove(join(dir_icite_py, f'p{pmid}.py'))
+            assert dnldr.get_icites(pmids[::-1]) == nihentries[::-1]
+            assert dnldr.get_icite(pmids[1]) is nihentries[1]
+            assert (lru.hits, lru.misses) == (4, 3)
+
+
+def test_lru_force_refresh():
+    """Test entries in memory are downloaded again if forced or if the refresh policy says so"""
+    pmids = [1, 2, 3]
+    cached = {p:{**get_nihdict(p), 'last_modified': 'A'} for p in pmids}
+    # At NIH, PMID 2 was modified after it was cached
+    server = {**cached, 2: {**cached[2], 'last_modified': 'B', 'citation_count': 5}}
+    for cls in [NIHiCiteDownloader, NIHiCiteDownloaderDb]:
+        # Forced downloads do not return the entries in memory
+        with TemporaryDirectory() as dir_icite_py:
+            lru = _get_lru(cls, dir_icite_py, cached, pmids)
+            api = ServerAPI(server)
+            with cls(dir_icite_py, True, api=api, lru=lru) as dnldr:
+                assert dnldr.get_icite(2).get('last_modified') == 'B'
+                assert [o.get('citation_count') for o in dnldr.get_icites(pmids)] == [0, 5, 0]
+            # Forced downloads request all PMIDs again
+            assert api.pmids_requested == [2, 1, 2, 3], api.pmids_requested
+            assert lru.get(2).get('last_modified') == 'B'
+
+        # Entries in memory modified at NIH are downloaded again
+        with TemporaryDirectory() as dir_icite_py:
+            lru = _get_lru(cls, dir_icite_py, cached, pmids)
+            api = ServerAPI(server)
+            refresh = NIHiCiteRefresh(check_modified=True, api=ServerAPI(server, fl='pmid,last_modified'))
+            with cls(dir_icite_py, False, api=api, lru=lru, refresh=refresh) as dnldr:
+                assert [o.get('last_modified') for o in dnldr.get_icites(pmids)] == ['A', 'B', 'A']
+            assert api.pmids_requested == [2], api.pmids_requested
+            assert lru.get(2).get('last_modified') == 'B'
+
+        # Entries in memory downloaded more than max_days ago are downloaded again
+        with TemporaryDirectory() as dir_icite_py:
+            lru = _get_lru(cls, dir_icite_py, cached, pmids)
+            _set_old(cls, dir_icite_py, 3)
+            api = ServerAPI(server)
+            with cls(dir_icite_py, False, api=api, lru=lru, refresh=NIHiCiteRefresh(max_days=30)) as dnldr:
+                assert dnldr.get_icite(3).pmid == 3
+                assert [o.get('last_modified') for o in dnldr.get_icites(pmids)] == ['A', 'A', 'A']
+            assert api.pmids_requested == [3], api.pmids_requested
+
+
+def _get_lru(cls, dir_icite_py, pmid2nihdict, pmids):
+    """Get an LRU holding entries downloaded into an empty cache"""
+    lru = NIHiCiteLru()
+    with cls(dir_icite_py, False, api=ServerAPI(pmid2nihdict), lru=lru) as dnldr:
+        dnldr.get_icites(pmids)
+    assert len(lru) == len(pmids)
+    return lru
+
+
+def _set_old(cls, dir_icite_py, pmid):
+    """Set a cached PMID as downloaded 40 days ago"""
+    secs_old = time() - 40*86400
+    if cls is NIHiCiteDownloaderDb:
+        with NIHiCiteDownloaderDb(dir_icite_py, False) as dnldr_db:
+            with dnldr_db.nihdb.conn as conn:
+                conn.execute('UPDATE icite SET downloaded = ? WHERE pmid = ?', (secs_old, pmid))
+    else:
+        utime(join(dir_icite_py, f'p{pmid}.py'), (secs_old, secs_old))
+
+
+if __name__ == '__main__':
+    test_lru_limits()
+    test_lru_nbytes()
+    test_lru_downloader()
+    test_lru_force_refresh()
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Test NIHiCitePaper sorts using stored sort keys and can keep only the best top_n papers"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from io import StringIO
+from pickle import dumps
+from pickle import loads
+from random import Random
+
+from pmidcite.icite.entry import NIHiCiteEntry
+from pmidcite.icite.entry_compact import NIHiCiteEntryCompact
+from pmidcite.icite.paper import NIHiCitePaper
+from pmidcite.icite.dnldr.pmid_dnlder_base import NIHiCiteDownloaderBase
+from tests.icite_data import get_nihdict
+from tests.icite_data import ServerAPI
+
+
+def test_paper_topn():
+    """Test NIHiCitePaper sorts using stored sort keys and can keep only the best top_n papers"""
+    rng = Random(11)
+    pmids_cit = list(range(100, 400))
+    nihdicts = [get_nihdict(1, cited_by=pmids_cit, references=[2, 3])]
+    for pmid in pmids_cit + [2, 3]:
+        nihdict = get_nihdict(pmid)
+        nihdict['year'] = rng.randrange(2000, 2021)
+        nihdict['nih_percentile'] = rng.choice([1.0, 10.0, 50.0, 90.0, 99.0])
+        nihdict['citation_count'] = rng.randrange(20)
+        nihdicts.append(nihdict)
+    for cls in [NIHiCiteEntry, NIHiCiteEntryCompact]:
+        pmid2icite = {d['pmid']:cls.from_jsondct(dict(d), round(d['nih_percentile'])//25) for d in nihdicts}
+        paper = NIHiCitePaper(1, pmid2icite)
+        for sortby, fnc in NIHiCitePaper.sortby_dct.items():
+            exp = sorted(paper.cited_by, key=fnc)
+            assert paper.get_sorted(paper.cited_by, sortby) == exp, sortby
+            assert paper.get_sorted(paper.cited_by, sortby, top_n=50) == exp[:50], sortby
+            assert paper.get_sorted(paper.cited_by, sortby, top_n=1000) == exp, sortby
+        # The last sort key is stored in each entry, along w/the function which computed it
+        paper.get_sorted(paper.cited_by, 'nih_group')
+        icite = pmid2icite[100]
+        fnc = NIHiCitePaper.sortby_dct['nih_group']
+        assert icite.sortkey == (fnc, tuple(fnc(icite)))
+        assert loads(dumps(icite)).get_dict() == icite.get_dict()
+        assert loads(dumps(icite)).sortkey is None
+        # A different function under the same name does not return the stored key
+        exp = sorted(paper.cited_by, key=lambda o: o.pmid)
+        assert PaperByPmid(1, pmid2icite).get_sorted(paper.cited_by, 'nih_group') == exp
+        assert len(paper.get_sorted(paper.cited_by, None, top_n=5)) == 5
+        assert paper.get_sorted(None, 'nih_group', top_n=5) is None
+
+        prt = StringIO()
+        paper.prt_summary(prt, top_n=10)
+        lines = prt.getvalue().splitlines()
+        assert sum(ln[:3] == 'CIT' for ln in lines) == 10
+        assert sum(ln[:3] == 'REF' for ln in lines) == 2
+        exp = [f'CIT {str(o)}' for o in sorted(paper.cited_by, key=NIHiCitePaper.sortby_dct['nih_group'])[:10]]
+        assert [ln for ln in lines if ln[:3] == 'CIT'] == exp
+
+        # icite --top_n
+        prt = StringIO()
+        dnldr = NIHiCiteDownloaderBase({'cited_by', 'references'}, api=ServerAPI({}))
+        dnldr.prt_papers({1: paper}, prt, top_n=10)
+        assert [ln for ln in prt.getvalue().splitlines() if ln[:3] == 'CIT'] == exp
+
+
+class PaperByPmid(NIHiCitePaper):
+    """NIHiCitePaper w/a different function for the nih_group sort"""
+
+    sortby_dct = {'nih_group': lambda o: [o.pmid]}
+
+
+if __name__ == '__main__':
+    test_paper_topn()
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
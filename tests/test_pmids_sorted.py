@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""Test combining sorted arrays of PMIDs by merging"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from random import Random
+
+from pmidcite.icite.pmids_sorted import get_pmids_sorted
+from pmidcite.icite.pmids_sorted import has_pmid
+from pmidcite.icite.pmids_sorted import union
+from pmidcite.icite.pmids_sorted import intersection
+
+
+def test_pmids_sorted():
+    """Test combining sorted arrays of PMIDs by merging"""
+    rng = Random(843571)
+    for len_a, len_b in [(0, 0), (0, 5), (5, 0), (30, 40), (3, 30000), (30000, 500)]:
+        pmids_a = [rng.randrange(1, 60000) for _ in range(len_a)]
+        pmids_b = [rng.randrange(1, 60000) for _ in range(len_b)]
+        arr_a = get_pmids_sorted(pmids_a)
+        arr_b = get_pmids_sorted(pmids_b)
+        assert list(arr_a) == sorted(set(pmids_a))
+        assert list(union(arr_a, arr_b)) == sorted(set(pmids_a).union(pmids_b))
+        assert list(intersection(arr_a, arr_b)) == sorted(set(pmids_a).intersection(pmids_b))
+        for pmid in pmids_b[:50]:
+            assert has_pmid(arr_a, pmid) == (pmid in set(pmids_a))
+    assert not has_pmid(get_pmids_sorted([]), 1)
+
+
+if __name__ == '__main__':
+    test_pmids_sorted()
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
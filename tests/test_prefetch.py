@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Test caching NIH iCite data for papers and their citations and references ahead of time"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from io import StringIO
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from pmidcite.icite.api import NIHiCiteAPI
+from pmidcite.icite.dnldr.pmid_layout import NIHiCitePyLayout
+from pmidcite.icite.dnldr.pmid_dnlder import NIHiCiteDownloader
+from pmidcite.icite.dnldr.pmid_dnlder_db import NIHiCiteDownloaderDb
+from tests.icite_data import get_nihdict
+from tests.icite_data import ServerAPI
+
+
+def test_prefetch():
+    """Test caching NIH iCite data for papers and their citations and references ahead of time"""
+    # PMID 1 is cited by 2 and 3 and references 4; PMID 5 is cited by 3
+    server = {
+        1: get_nihdict(1, cited_by=[2, 3], references=[4]),
+        2: get_nihdict(2),
+        3: get_nihdict(3),
+        4: get_nihdict(4),
+        5: get_nihdict(5, cited_by=[3]),
+    }
+    with TemporaryDirectory() as dir_icite_py:
+        # PMID 3 is already cached
+        with open(join(dir_icite_py, 'p3.py'), 'w', encoding='utf-8') as prt:
+            NIHiCiteAPI.prt_dct(dict(server[3]), prt)
+        api = ServerAPI(server)
+        prt = StringIO()
+        with NIHiCiteDownloader(dir_icite_py, False, api=api) as dnldr:
+            assert dnldr.prefetch([1, 5], prt) == {1, 2, 3, 4, 5}
+        # Cached citations and references are neither downloaded nor loaded
+        assert api.pmids_requested == [1, 5, 2, 4], api.pmids_requested
+        assert '2 of 2 uncached entries fetched' in prt.getvalue(), prt.getvalue()
+        assert sorted(NIHiCitePyLayout(dir_icite_py).get_pmid2file()) == [1, 2, 3, 4, 5]
+        # The warm cache is used without downloading
+        api = ServerAPI(server)
+        with NIHiCiteDownloader(dir_icite_py, False, api=api) as dnldr:
+            assert len(dnldr.get_pmid2paper([1, 5])) == 2
+        assert not api.pmids_requested
+
+    with TemporaryDirectory() as dir_icite_py:
+        api = ServerAPI(server)
+        with NIHiCiteDownloaderDb(dir_icite_py, False, api=api) as dnldr:
+            dnldr.nihdb.wr_nihdicts([server[3]])
+            dnldr.prefetch([1, 5], prt=None)
+            assert dnldr.nihdb.get_pmids() == [1, 2, 3, 4, 5]
+        assert api.pmids_requested == [1, 5, 2, 4], api.pmids_requested
+
+
+if __name__ == '__main__':
+    test_prefetch()
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
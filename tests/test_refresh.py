@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Test downloading only cached iCite entries which are old or were modified at NIH"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from os import utime
+from os.path import join
+from time import time
+from tempfile import TemporaryDirectory
+
+from pmidcite.icite.api import NIHiCiteAPI
+from pmidcite.icite.refresh import NIHiCiteRefresh
+from pmidcite.icite.dnldr.pmid_dnlder import NIHiCiteDownloader
+from pmidcite.icite.dnldr.pmid_dnlder_db import NIHiCiteDownloaderDb
+from tests.icite_data import get_nihdict
+from tests.icite_data import ServerAPI
+
+
+def test_refresh():
+    """Test downloading only cached iCite entries which are old or were modified at NIH"""
+    pmids = [1, 2, 3]
+    cached = {p:{**get_nihdict(p), 'last_modified': 'A'} for p in pmids}
+    # At NIH, PMID 2 was modified after it was cached
+    server = {**cached, 2: {**cached[2], 'last_modified': 'B', 'citation_count': 5}}
+    with TemporaryDirectory() as dir_icite_py:
+        # p{PMID}.py cache: PMID 3 was written 40 days ago
+        for pmid, nihdict in cached.items():
+            with open(join(dir_icite_py, f'p{pmid}.py'), 'w', encoding='utf-8') as prt:
+                NIHiCiteAPI.prt_dct(dict(nihdict), prt)
+        secs_old = time() - 40*86400
+        utime(join(dir_icite_py, 'p3.py'), (secs_old, secs_old))
+        _run(NIHiCiteDownloader, dir_icite_py, server, pmids)
+
+    with TemporaryDirectory() as dir_icite_py:
+        # SQLite cache: PMID 3 was downloaded 40 days ago
+        with NIHiCiteDownloaderDb(dir_icite_py, False) as dnldr:
+            dnldr.nihdb.wr_nihdicts(cached.values())
+            with dnldr.nihdb.conn as conn:
+                conn.execute('UPDATE icite SET downloaded = ? WHERE pmid = 3', (secs_old,))
+        _run(NIHiCiteDownloaderDb, dir_icite_py, server, pmids)
+
+
+def _run(cls, dir_icite_py, server, pmids):
+    """Get entries using a downloader which refreshes entries older than 30 days or modified"""
+    api = ServerAPI(server)
+    api_modified = ServerAPI(server, fl='pmid,last_modified')
+    refresh = NIHiCiteRefresh(max_days=30, check_modified=True, api=api_modified)
+    with cls(dir_icite_py, False, api=api, refresh=refresh) as dnldr:
+        nihentries = dnldr.get_icites(pmids)
+    # last_modified is checked for the recent cached entries; old and modified entries are downloaded
+    assert sorted(api_modified.pmids_requested) == [1, 2], api_modified.pmids_requested
+    assert sorted(api.pmids_requested) == [2, 3], api.pmids_requested
+    assert [o.pmid for o in nihentries] == pmids
+    assert [o.dct['last_modified'] for o in nihentries] == ['A', 'B', 'A']
+    assert nihentries[1].dct['citation_count'] == 5
+    # The refreshed entries are now cached and are not downloaded again
+    api = ServerAPI(server)
+    with cls(dir_icite_py, False, api=api, refresh=NIHiCiteRefresh(max_days=30)) as dnldr:
+        assert [o.pmid for o in dnldr.get_icites(pmids)] == pmids
+    assert not api.pmids_requested
+
+
+if __name__ == '__main__':
+    test_refresh()
+
+# Copyright (C) 2026-present DV Klopfenstein, PhD. All rights reserved.
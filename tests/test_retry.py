@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""Test the retry policy used for requests sent to NIH iCite"""
+
+__copyright__ = "Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved."
+__author__ = "DV Klopfenstein, PhD"
+
+from collections import namedtuple
+from pmidcite.icite.retry import RetryPolicy
+
+
+def test_retry():
+    """Test the retry policy used for requests sent to NIH iCite"""
+    retry = RetryPolicy(backoff=1.0, backoff_max=10.0, jitter=0.5)
+    # Server errors and throttling are retried; client errors are not
+    assert retry.do_retry(503)
+    assert retry.do_retry(429)
+    assert not retry.do_retry(404)
+
+    # Exponential backoff with up to 50% jitter, capped at backoff_max
+    for attempt, delay_min in [(1, 1.0), (2, 2.0), (3, 4.0), (4, 8.0)]:
+        delay = retry.get_delay(attempt)
+        assert delay_min <= delay <= 1.5*delay_min, f'{attempt} {delay}'
+    assert retry.get_delay(10) <= 15.0
+
+    # Retry-After overrides backoff
+    assert retry.get_delay(1, retry_after=3.0) == 3.0
+    ntrsp = namedtuple('Rsp', 'headers')
+    assert retry.get_retry_after(ntrsp(headers={'Retry-After': '7'})) == 7.0
+    assert retry.get_retry_after(ntrsp(headers={})) is None
+    assert retry.get_retry_after(ntrsp(headers={'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})) == 0.0
+
+
+if __name__ == '__main__':
+    test_retry()
+
+# Copyright (C) 2026-present, DV Klopfenstein, PhD. All rights reserved.